@@ -2,10 +2,23 @@
 Main application file for the Udemy Coupon Finder
 """
 import os
+import json
 import logging
-from flask import Flask, render_template, jsonify, request
-from scrapers.hacksnation import get_latest_coupon_posts
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+from flask import Flask, Response, g, render_template, jsonify, request
+import config
+from scrapers.sources import SourceFanout, build_sources
 from scrapers.course_extractor import extract_courses_from_url
+from scrapers.coupon_checker import CouponChecker
+from utils.cache import CacheResult, ResultCache
+from utils.events import EventHub, EventHubFull
+from utils.singleflight import SingleFlight, SingleFlightTimeout, normalize_scrape_key
+from utils.responses import decode_cursor, encode_cursor, gzip_response, result_etag
+from utils.metrics import REGISTRY, count_fallback, finish_trace, format_trace, start_trace
+from scheduler import RefreshScheduler, ScrapeStore, acquire_process_lock, refresh_coupon_data
+from storage import CouponDatabase
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,34 +26,221 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Latency of HTTP requests by route', ('method', 'route', 'status'))
+LISTING_SERVED = REGISTRY.counter(
+    'coupon_listing_served_total', 'Coupon listings served by where they came from', ('source',))
+
+# Cache in front of the coupon listing scrapers
+coupon_cache = ResultCache(
+    ttl=config.COUPON_CACHE_TTL,
+    stale_ttl=config.COUPON_CACHE_STALE_TTL,
+    negative_ttl=config.COUPON_CACHE_NEGATIVE_TTL
+)
+
+# Every configured listing site, queried concurrently
+listing_sources = SourceFanout(build_sources(config.LISTING_SOURCES, config.LISTING_SOURCE_TIMEOUT))
+
+def load_coupon_posts(limit=5):
+    """Scrape the latest coupon posts from every listing source into one feed"""
+    coupon_posts = listing_sources.fetch(limit)
+    logger.info(f"Found {len(coupon_posts)} coupon posts")
+    return coupon_posts
+
+# At most one scrape in flight per listing or post URL
+scrape_flight = SingleFlight(timeout=config.SINGLEFLIGHT_WAIT_TIMEOUT)
+
+def load_coupon_posts_once(limit=5):
+    """Scrape the listing, joining a scrape of the same listing already in flight"""
+    key = ('listing', limit)
+    return scrape_flight.do(key, lambda: load_coupon_posts(limit))
+
+# Cached, concurrent Udemy coupon validity checks
+coupon_checker = CouponChecker(
+    api_base=config.UDEMY_API_BASE,
+    valid_ttl=config.COUPON_CHECK_VALID_TTL,
+    expired_ttl=config.COUPON_CHECK_EXPIRED_TTL,
+    unknown_ttl=config.COUPON_CHECK_UNKNOWN_TTL,
+    max_workers=config.COUPON_CHECK_WORKERS,
+    host_concurrency=config.COUPON_CHECK_HOST_CONCURRENCY,
+    host_rate=config.COUPON_CHECK_HOST_RATE,
+    host_burst=config.COUPON_CHECK_HOST_RATE
+)
+
+def wants_validation():
+    """Whether the request asked for coupon statuses with ?validate=1"""
+    return request.args.get('validate') in ('1', 'true')
+
+# Persistent database of every post and course crawled so far
+coupon_db = CouponDatabase(
+    config.DATABASE_PATH,
+    seen_capacity=config.SEEN_INDEX_CAPACITY,
+    seen_error_rate=config.SEEN_INDEX_ERROR_RATE
+)
+
+# Live feed of new posts and courses, read from the database's events table
+event_hub = EventHub(
+    coupon_db.get_events_after,
+    poll_interval=config.SSE_POLL_INTERVAL,
+    replay_size=config.SSE_REPLAY_SIZE,
+    queue_size=config.SSE_QUEUE_SIZE,
+    max_subscribers=config.SSE_MAX_SUBSCRIBERS
+)
+
+# Posts and courses pre-scraped by the background scheduler
+scrape_store = ScrapeStore()
+scheduler = RefreshScheduler()
+scheduler.add_job(
+    'refresh-coupons',
+    lambda: refresh_coupon_data(
+        scrape_store,
+        coupon_db,
+        lambda: load_coupon_posts_once(config.SCHEDULER_POST_LIMIT),
+        lambda url: extract_courses_from_url(url, raise_errors=True)
+    ),
+    interval=config.SCHEDULER_INTERVAL,
+    jitter=config.SCHEDULER_JITTER,
+    timeout=config.SCHEDULER_TIMEOUT
+)
+
+# Held by the one server process that runs the scheduler
+scheduler_lock = None
+# True in server processes that leave the scheduler to another process
+refresh_elsewhere = False
+
+def start_background_refresh():
+    """Fill the seen index, and start the refresh scheduler in one serving process per machine"""
+    global scheduler_lock, refresh_elsewhere
+    coupon_db.seen_index.warm()
+    if not config.SCHEDULER_ENABLED:
+        logger.info("Background refresh scheduler disabled")
+        return
+    # With the debug reloader only the child process serves requests
+    if app.debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return
+
+    if scheduler_lock is None:
+        scheduler_lock = acquire_process_lock(config.SCHEDULER_LOCK_PATH)
+    if scheduler_lock is None:
+        # Another worker refreshes the shared database; serve from it
+        refresh_elsewhere = True
+        logger.info("Background refresh runs in another process")
+        return
+    refresh_elsewhere = False
+    scheduler.start()
+
+def stop_background_refresh():
+    """Stop the refresh scheduler and let another process take it over"""
+    global scheduler_lock
+    if scheduler.running:
+        scheduler.stop(timeout=5)
+    if scheduler_lock is not None:
+        scheduler_lock.close()
+        scheduler_lock = None
+    # Ends any stream still open; under gunicorn serve.py already closed the
+    # hub when the worker began shutting down, before its graceful wait
+    event_hub.close()
+
+def get_cached_coupon_posts(limit=5):
+    """Return the latest coupon posts, preferring the scheduler's pre-scraped copy"""
+    result = load_cached_coupon_posts(limit)
+    LISTING_SERVED.inc(source=result.status if result.value else 'empty')
+    return result
+
+def load_cached_coupon_posts(limit):
+    """Look up the coupon posts in the store, the database and the cache, in that order"""
+    posts = scrape_store.get_posts()
+    if posts and limit <= config.SCHEDULER_POST_LIMIT:
+        return CacheResult(posts[:limit], scrape_store.age(), 'scheduled')
+
+    # Until the scheduler's first run, serve what earlier runs stored
+    if config.SCHEDULER_ENABLED and (scheduler.running or refresh_elsewhere):
+        posts = coupon_db.get_latest_posts(limit)
+        if posts:
+            return CacheResult(posts, 0, 'stored')
+
+    result = coupon_cache.get(('coupon_posts', limit), lambda: load_coupon_posts_once(limit), default=[])
+    logger.info(f"Coupon cache {result.status} (age {result.age:.1f}s)")
+
+    if not result.value:
+        posts = coupon_db.get_latest_posts(limit)
+        if posts:
+            count_fallback('scrape', 'database')
+            return CacheResult(posts, 0, 'stored')
+    return result
+
+def get_post_courses(url, raise_errors=False):
+    """Return the courses of a post from the scheduler, the database or a live scrape"""
+    courses = scrape_store.get_courses(url)
+    if courses is None:
+        courses = coupon_db.get_post_courses(url)
+    if courses is None:
+        try:
+            courses = scrape_flight.do(('post', normalize_scrape_key(url)), lambda: scrape_post_courses(url))
+        except SingleFlightTimeout:
+            raise
+        except Exception:
+            if raise_errors:
+                raise
+            return []
+        # The result is shared with coalesced requests
+        courses = [dict(course) for course in courses]
+    return courses
+
+def annotate_course_history(url, courses, since=None):
+    """
+    Attach when and where each course was first seen
+
+    A course first listed in another post is marked ``repeat``; with a
+    ``since`` cursor, courses stored after it are marked ``is_new``.
+    """
+    history = coupon_db.get_course_history([course['url'] for course in courses], since)
+    post_key = normalize_scrape_key(url)
+    annotated = []
+    for course in courses:
+        entry = history.get(course['url'])
+        if entry is None:
+            annotated.append(dict(course, repeat=False, is_new=since is not None))
+            continue
+        first_post_url = entry['first_post_url']
+        annotated.append(dict(
+            course,
+            first_seen_at=entry['first_seen_at'],
+            first_post_url=first_post_url,
+            post_count=entry['post_count'],
+            repeat=bool(first_post_url) and normalize_scrape_key(first_post_url) != post_key,
+            is_new=entry['is_new']
+        ))
+    return annotated
+
+def is_listing_source_url(url):
+    """Check that a URL points to one of the listing sources"""
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    return parts.scheme in ('http', 'https') and any(
+        host == source_host or host.endswith('.' + source_host) for source_host in listing_sources.hosts)
+
+def scrape_post_courses(url):
+    """
+    Scrape a post live and store its courses
+
+    Only posts of the configured listing sources are stored (and published to
+    the live feed and search); courses of any other page are returned only
+    to the caller.
+    """
+    courses = extract_courses_from_url(url, raise_errors=True)
+    if courses and is_listing_source_url(url):
+        coupon_db.save_post_courses(url, courses)
+    return courses
+
 @app.route('/')
 def home():
     """Home page route that displays the latest Udemy coupon posts"""
-    # Try with Selenium first (AJAX support), fallback to BS4
     logger.info("Processing request for home page")
-    coupon_posts = get_latest_coupon_posts(limit=5, use_selenium=True)
-    logger.info(f"Found {len(coupon_posts)} coupon posts")
+    coupon_posts = get_cached_coupon_posts(limit=5).value
 
-    # Add error checking - ensure we actually have data
     if not coupon_posts:
-        # Try direct BS4 method as a last resort
-        logger.info("No coupons found with Selenium, trying BS4 directly")
-        coupon_posts = get_latest_coupon_posts(limit=5, use_selenium=False)
-        logger.info(f"BS4 direct method found {len(coupon_posts)} coupon posts")
-
-        # If still no data, add some dummy data for debugging
-        if not coupon_posts:
-            logger.warning("No data found with any method, adding dummy data for debugging")
-            coupon_posts = [
-                {
-                    'title': 'Debug: Udemy Free Courses for 12 April 2025',
-                    'url': 'https://hacksnation.com/t/udemy-free-courses-debug'
-                },
-                {
-                    'title': 'Debug: More Udemy Coupons for Testing',
-                    'url': 'https://hacksnation.com/t/more-debug-coupons'
-                }
-            ]
+        logger.warning("No coupon posts available, rendering empty page")
 
     logger.info(f"Rendering template with {len(coupon_posts)} coupons")
     return render_template('index.html', coupons=coupon_posts)
@@ -48,8 +248,22 @@ def home():
 @app.route('/api/coupons')
 def api_coupons():
     """API endpoint that returns the latest Udemy coupon posts as JSON"""
-    coupon_posts = get_latest_coupon_posts(limit=5, use_selenium=True)
-    return jsonify(coupon_posts)
+    result = get_cached_coupon_posts(limit=5)
+    response = jsonify(result.value)
+
+    # Let browsers and CDNs reuse the response for the rest of its freshness window
+    age = int(result.age)
+    if result.status == 'scheduled':
+        max_age = max(int(config.SCHEDULER_INTERVAL) - age, 0)
+    elif result.status in ('fresh', 'miss'):
+        max_age = max(int(coupon_cache.ttl) - age, 0)
+    else:
+        max_age = 0
+    response.headers['Age'] = str(age)
+    response.headers['Cache-Control'] = (
+        f"public, max-age={max_age}, stale-while-revalidate={int(coupon_cache.stale_ttl)}"
+    )
+    return response
 
 @app.route('/api/extract-courses', methods=['GET'])
 def api_extract_courses():
@@ -59,12 +273,334 @@ def api_extract_courses():
     if not url:
         return jsonify({'error': 'No URL provided. Please add ?url=https://example.com parameter'}), 400
 
-    courses = extract_courses_from_url(url)
-    return jsonify({
+    sort = request.args.get('sort', 'position')
+    order = request.args.get('order', 'asc')
+    if sort not in ('position', 'title') or order not in ('asc', 'desc'):
+        return jsonify({'error': 'sort must be "position" or "title" and order "asc" or "desc"'}), 400
+
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            offset = decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    if (limit is not None and limit < 1) or offset < 0:
+        return jsonify({'error': 'limit must be positive and offset non-negative'}), 400
+
+    # Course id cursor from /api/courses/new, kept by the client since its last visit
+    since = request.args.get('since', type=int)
+    skip_known = request.args.get('skip_known') in ('1', 'true')
+
+    try:
+        courses = get_post_courses(url)
+    except SingleFlightTimeout as e:
+        return jsonify({'error': str(e)}), 504
+
+    known_count = None
+    if since is not None or skip_known:
+        courses = annotate_course_history(url, courses, since)
+        known_count = sum(course['repeat'] for course in courses)
+        if skip_known:
+            # Courses already listed in an earlier post
+            courses = [course for course in courses if not course['repeat']]
+
+    if sort == 'title':
+        courses = sorted(courses, key=lambda course: course['title'].lower(), reverse=order == 'desc')
+    elif order == 'desc':
+        courses = courses[::-1]
+
+    page = courses[offset:offset + limit] if limit else courses[offset:]
+    validate = wants_validation()
+    if validate and len(page) > config.COUPON_CHECK_MAX_URLS:
+        return jsonify({'error': f'validate=1 checks at most {config.COUPON_CHECK_MAX_URLS} courses; '
+                                 f'use a smaller limit'}), 400
+
+    new_count = sum(course['is_new'] for course in courses) if since is not None else None
+
+    def page_etag():
+        # Built from what the response holds: this page, the counts and the
+        # paging parameters, so the cost follows the page size and not the post's.
+        # With validation the cached coupon results are part of the response
+        checks = coupon_checker.peek_many(course['url'] for course in page) if validate else None
+        return result_etag(url, sort, order, offset, limit, len(courses), known_count, new_count, page, checks)
+
+    # Stable ETag for this slice of the result set, checked before any coupon
+    # is checked or the body serialised
+    etag = page_etag()
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    if validate:
+        # Only the courses on this page are checked
+        page = coupon_checker.annotate(page)
+        etag = page_etag()
+
+    body = {
         'url': url,
         'count': len(courses),
+        'courses': page
+    }
+    if known_count is not None:
+        body['known_count'] = known_count
+    if new_count is not None:
+        body['new_count'] = new_count
+    if limit:
+        next_offset = offset + len(page)
+        body.update({
+            'offset': offset,
+            'limit': limit,
+            'sort': sort,
+            'order': order,
+            'next_cursor': encode_cursor(next_offset) if next_offset < len(courses) else None
+        })
+
+    response = jsonify(body)
+    response.set_etag(etag)
+    # Clients may keep the response but must revalidate it with If-None-Match
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/courses/new')
+def api_new_courses():
+    """
+    API endpoint that counts the courses stored since the client's last visit
+
+    ``since`` is the ``cursor`` returned by the previous call; without it
+    only the current cursor is returned. Clients keep the cursor between
+    visits and pass it again, or to /api/extract-courses to mark new courses.
+    """
+    since = request.args.get('since', type=int)
+    limit = min(max(request.args.get('limit', 20, type=int), 0), 100)
+
+    cursor, new_count, courses = coupon_db.get_courses_since(since, limit)
+    response = jsonify({
+        'since': since,
+        'cursor': cursor,
+        'new_count': new_count,
         'courses': courses
     })
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/search')
+def api_search():
+    """API endpoint that searches every course title extracted so far"""
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+
+    if not query:
+        return jsonify({'error': 'No query provided. Please add ?q=python parameter'}), 400
+
+    total, results = coupon_db.search_courses(query, limit=per_page, offset=(page - 1) * per_page)
+    return jsonify({
+        'query': query,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'results': results
+    })
+
+def read_url_payload():
+    """
+    Read the JSON body of a POST request listing URLs
+
+    Returns:
+        tuple: (payload dictionary, error message or None); GET requests and
+            bodies that are not JSON give an empty payload
+    """
+    if request.method != 'POST':
+        return {}, None
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return {}, None
+    if not isinstance(payload, dict):
+        return {}, 'The JSON body must be an object, e.g. {"urls": [...]}'
+    urls = payload.get('urls')
+    if urls is not None and not (isinstance(urls, list) and all(isinstance(url, str) for url in urls)):
+        return {}, '"urls" must be a list of strings'
+    return payload, None
+
+@app.route('/api/validate-coupons', methods=['GET', 'POST'])
+def api_validate_coupons():
+    """
+    API endpoint that checks whether Udemy coupon links are still valid
+
+    URLs are given as repeated ``?url=`` parameters or as ``{"urls": [...]}``
+    in a JSON body. Each result is 'valid', 'expired' or 'unknown' with the
+    time it was checked.
+    """
+    payload, error = read_url_payload()
+    if error:
+        return jsonify({'error': error}), 400
+    urls = [url for url in (payload.get('urls') or request.args.getlist('url')) if isinstance(url, str) and url]
+
+    if not urls:
+        return jsonify({'error': 'No URLs provided. Use ?url=... (repeatable) or a JSON body {"urls": [...]}'}), 400
+    if len(urls) > config.COUPON_CHECK_MAX_URLS:
+        return jsonify({'error': f'Too many URLs; the maximum is {config.COUPON_CHECK_MAX_URLS}'}), 400
+
+    results = coupon_checker.check_many(urls)
+    return jsonify({
+        'count': len(results),
+        'results': [dict(result, url=url) for url, result in results.items()]
+    })
+
+# Worker pool shared by all batch extraction requests
+batch_executor = ThreadPoolExecutor(max_workers=config.BATCH_MAX_WORKERS, thread_name_prefix='batch')
+
+@app.route('/api/extract-courses/batch', methods=['GET', 'POST'])
+def api_extract_courses_batch():
+    """
+    API endpoint that extracts courses from many HacksNation URLs concurrently
+
+    URLs are given as repeated ``?url=`` parameters, as ``{"urls": [...]}`` in a
+    JSON body, or with ``all=1`` / ``{"all": true}`` for every current listing post.
+    Results are streamed as newline-delimited JSON in completion order, one
+    line per URL, followed by a summary line. Add ``validate=1`` to attach
+    coupon statuses to the first COUPON_CHECK_MAX_URLS courses; the summary
+    counts the courses left ``unvalidated``.
+    """
+    validate = wants_validation()
+    payload, error = read_url_payload()
+    if error:
+        return jsonify({'error': error}), 400
+    urls = list(payload.get('urls') or request.args.getlist('url'))
+
+    if payload.get('all') or request.args.get('all') in ('1', 'true'):
+        # Every distinct limit is its own cache and scrape key, so only a bounded range is accepted
+        limit = min(max(request.args.get('limit', config.SCHEDULER_POST_LIMIT, type=int), 1), config.BATCH_MAX_URLS)
+        urls.extend(post['url'] for post in get_cached_coupon_posts(limit=limit).value)
+
+    # Keep the first occurrence of every URL
+    urls = list(dict.fromkeys(url for url in urls if isinstance(url, str) and url))
+
+    if not urls:
+        return jsonify({'error': 'No URLs provided. Use ?url=... (repeatable), ?all=1 or a JSON body {"urls": [...]}'}), 400
+    if len(urls) > config.BATCH_MAX_URLS:
+        return jsonify({'error': f'Too many URLs; the maximum is {config.BATCH_MAX_URLS}'}), 400
+
+    def generate():
+        errors = 0
+        # Coupon checks run while the client waits, so a batch shares one request's allowance
+        check_budget = config.COUPON_CHECK_MAX_URLS
+        unvalidated = 0
+        futures = {}
+        for url in urls:
+            if not is_listing_source_url(url):
+                errors += 1
+                yield json.dumps({'url': url, 'error': 'Not a listing source URL'}) + '\n'
+                continue
+            futures[batch_executor.submit(get_post_courses, url, True)] = url
+
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                courses = future.result()
+                if validate:
+                    checked = courses[:check_budget]
+                    check_budget -= len(checked)
+                    unvalidated += len(courses) - len(checked)
+                    courses = coupon_checker.annotate(checked) + courses[len(checked):]
+                line = {'url': url, 'count': len(courses), 'courses': courses}
+            except Exception as e:
+                errors += 1
+                line = {'url': url, 'error': str(e)}
+            yield json.dumps(line) + '\n'
+
+        summary = {'done': True, 'total': len(urls), 'errors': errors}
+        if validate:
+            summary['unvalidated'] = unvalidated
+        yield json.dumps(summary) + '\n'
+
+    logger.info(f"Streaming batch extraction for {len(urls)} URLs")
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/api/events')
+def api_events():
+    """
+    Server-Sent Events stream of newly discovered posts and courses
+
+    Events: ``posts`` (new listing posts), ``courses`` (new courses in a post)
+    and ``reset`` (the client missed too much and should reload). Browsers
+    resume after a reconnect with the Last-Event-ID header; the lastEventId
+    query parameter does the same for clients that cannot set headers.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    try:
+        subscription = event_hub.subscribe(last_event_id)
+    except EventHubFull:
+        response = jsonify({'error': 'Too many live-feed subscribers, try again later'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+
+    response = Response(event_hub.stream(subscription, heartbeat=config.SSE_HEARTBEAT),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/scheduler/status')
+def api_scheduler_status():
+    """API endpoint that reports the background refresh scheduler state"""
+    return jsonify({
+        'enabled': config.SCHEDULER_ENABLED,
+        'scheduler': scheduler.status(),
+        'store': scrape_store.status(),
+        'database': coupon_db.stats(),
+        'coalescing': scrape_flight.stats(),
+        'coupon_checker': coupon_checker.stats(),
+        'live_feed': event_hub.stats(),
+        'sources': listing_sources.stats(),
+        'seen_index': coupon_db.seen_index.stats()
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics endpoint"""
+    if not config.METRICS_ENABLED:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.before_request
+def start_request_timer():
+    """Remember when the request started and start its stage trace"""
+    g.request_started = time.perf_counter()
+    if config.TRACE_REQUESTS:
+        start_trace()
+
+@app.after_request
+def record_request_metrics(response):
+    """Observe the request latency per route and log its trace"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else '<unmatched>'
+    REQUEST_SECONDS.observe(elapsed, method=request.method, route=route, status=response.status_code)
+
+    trace = finish_trace()
+    if trace:
+        logger.info(f"Trace {request.method} {request.full_path.rstrip('?')} -> {response.status_code} "
+                    f"in {format_trace(*trace)}")
+    return response
+
+# Registered after the metrics hook so that it runs first and is timed too
+@app.after_request
+def compress_response(response):
+    """Gzip large responses for clients that accept it"""
+    return gzip_response(response, request.headers.get('Accept-Encoding'))
 
 def ensure_template_exists():
     """Ensure that the template directory and index.html file exist"""
@@ -139,4 +675,6 @@ if __name__ == '__main__':
 
     # Start Flask server
     logger.info("Starting app on http://127.0.0.1:5000")
+    app.debug = True
+    start_background_refresh()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+Recorded and synthetic HTML fixtures for the benchmark suite
+"""
+import json
+import os
+import random
+from datetime import datetime
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Recorded pages use this token where the post year appears, so that the
+# scrapers' current-year filter keeps them whenever the benchmark runs
+YEAR_TOKEN = '__YEAR__'
+
+TOPICS = [
+    'Python', 'JavaScript', 'Excel', 'Photoshop', 'Machine Learning', 'Data Science',
+    'React', 'Node.js', 'SQL', 'Digital Marketing', 'Project Management', 'Cybersecurity',
+    'AWS', 'Docker', 'Kubernetes', 'Java', 'C#', 'Unity', 'Blender', 'Copywriting',
+]
+KINDS = [
+    'Complete Bootcamp', 'for Beginners', 'Masterclass', 'Crash Course', 'Practice Tests',
+    'From Zero to Hero', 'Advanced Guide', 'Essentials',
+]
+
+
+def load_fixture(name):
+    """Read a recorded fixture, filling in the current year"""
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read().replace(YEAR_TOKEN, str(datetime.now().year))
+
+
+def generate_giant_thread(course_count, seed=0):
+    """
+    Build a synthetic discussion page with ``course_count`` "Enroll for Free" entries
+
+    The markup mirrors the recorded discussion: batches of ``<li>`` items inside
+    ``<ul>`` lists, with a few plain coupon links and duplicates mixed in.
+    """
+    rng = random.Random(seed)
+    year = datetime.now().year
+    parts = [
+        '<!doctype html><html lang="en"><head><meta charset="utf-8">',
+        f'<title>Udemy Free Courses for 1 January {year} - HacksNation</title></head>',
+        '<body><div id="app" class="App"><main class="App-content"><noscript id="flarum-content">',
+        f'<div class="container"><h1>Udemy Free Courses for 1 January {year}</h1><div><article>',
+        '<p>Grab these free courses before the coupons run out.</p>',
+    ]
+
+    for index in range(course_count):
+        if index % 50 == 0:
+            parts.append(f'<p><strong>Batch {index // 50 + 1}</strong></p><ul>')
+
+        title = f'{rng.choice(TOPICS)} {rng.choice(KINDS)} #{index}'
+        slug = f'course-{index}'
+        url = f'https://www.udemy.com/course/{slug}/?couponCode=HN{rng.randint(100000, 999999)}'
+        if index % 97 == 0:
+            # Plain coupon link without the "Enroll for Free" label
+            parts.append(f'<li>{title} – <a href="{url}" rel="ugc nofollow">{url}</a></li>')
+        else:
+            parts.append(f'<li>{title} – <strong><a href="{url}" rel="ugc nofollow">Enroll for Free</a></strong></li>')
+        if index % 211 == 0 and index:
+            # Reposted course, removed by URL dedup
+            parts.append(f'<li>{title} – <strong><a href="{url}" rel="ugc nofollow">Enroll for Free</a></strong></li>')
+
+        if index % 50 == 49 or index == course_count - 1:
+            parts.append('</ul>')
+
+    parts.append('<p>Found an expired coupon? Let us know in the replies.</p>')
+    parts.append('</article><hr></div></div></noscript></main></div></body></html>')
+    return '\n'.join(parts)
+
+
+def generate_flarum_discussions(total=60, offset=0, limit=20, base_url='https://hacksnation.com'):
+    """Build one page of a Flarum JSON:API discussions document for the coupons tag"""
+    year = datetime.now().year
+    data = []
+    for index in range(offset, min(offset + limit, total)):
+        day = 28 - index % 28
+        month = ['December', 'November', 'October'][index // 28 % 3]
+        data.append({
+            'type': 'discussions',
+            'id': str(40000 - index),
+            'attributes': {
+                'title': f'Udemy Free Courses for {day} {month} {year}',
+                'slug': f'udemy-free-courses-for-{day}-{month.lower()}-{year}',
+                'commentCount': 1,
+            },
+        })
+
+    links = {'first': f'{base_url}/api/discussions?filter%5Btag%5D=free-coupons&page%5Blimit%5D={limit}'}
+    if offset + limit < total:
+        links['next'] = (f'{base_url}/api/discussions?filter%5Btag%5D=free-coupons'
+                         f'&page%5Boffset%5D={offset + limit}&page%5Blimit%5D={limit}')
+    return json.dumps({'links': links, 'data': data})
@@ -0,0 +1,228 @@
+"""
+Offline benchmark suite for the scrapers and Flask endpoints
+
+Runs every benchmark against a local stand-in HacksNation server and writes
+throughput, latency percentiles and peak memory to a JSON file, optionally
+comparing against a previous run:
+
+    python -m benchmarks.run --output bench_results.json --compare old.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Keep benchmark runs away from the real database and background jobs
+_data_dir = tempfile.mkdtemp(prefix='udemy-coupon-bench-')
+os.environ.setdefault('DATABASE_PATH', os.path.join(_data_dir, 'bench.db'))
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+os.environ.setdefault('SNAPSHOT_ARCHIVE_ENABLED', 'false')
+
+import app as flask_app  # noqa: E402
+import config  # noqa: E402
+from scrapers import course_extractor, fetcher, hacksnation  # noqa: E402
+from scrapers.coupon_checker import CouponChecker  # noqa: E402
+try:
+    from scrapers import async_scrapers  # noqa: E402
+except ImportError:  # aiohttp is optional
+    async_scrapers = None
+from benchmarks.fixtures import generate_giant_thread  # noqa: E402
+from benchmarks.server import FixtureServer  # noqa: E402
+
+GIANT_SIZES = (1000, 5000)
+COUPON_CHECK_SIZE = 2000
+ASYNC_POST_COUNT = 20
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def measure(func, iterations, warmup=1):
+    """Time ``iterations`` calls of ``func`` and one extra call for peak memory"""
+    for _ in range(warmup):
+        func(0)
+
+    latencies = []
+    started = time.perf_counter()
+    for iteration in range(iterations):
+        call_started = time.perf_counter()
+        func(iteration + 1)
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    func(iterations + 1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'throughput_per_s': round(iterations / elapsed, 2) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def build_benchmarks(base_url, client, polite=False):
+    """Return (name, function, iterations multiplier) for every benchmark"""
+    recorded_post = f'{base_url}/d/36450-udemy-free-courses-for-28-april'
+    giant_html = {size: generate_giant_thread(size) for size in GIANT_SIZES}
+    coupon_urls = [course['url'] for course in course_extractor.parse_courses(generate_giant_thread(COUPON_CHECK_SIZE))]
+    limits = {} if polite else {'host_concurrency': 64, 'host_rate': 1e9, 'host_burst': 1e9}
+    cached_checker = CouponChecker(api_base=base_url, **limits)
+
+    def expect(response, status=200):
+        if response.status_code != status:
+            raise RuntimeError(f'Unexpected status {response.status_code}')
+        return response
+
+    benchmarks = [
+        ('get_latest_coupon_posts_bs4', lambda i: hacksnation.get_latest_coupon_posts_bs4(limit=5), 1),
+        ('get_latest_coupon_posts_api', lambda i: hacksnation.get_latest_coupon_posts_api(limit=None), 1),
+        ('extract_courses_from_url[recorded]', lambda i: course_extractor.extract_courses_from_url(recorded_post), 1),
+    ]
+    for size in GIANT_SIZES:
+        benchmarks.append((
+            f'extract_courses_from_url[giant-{size}]',
+            lambda i, size=size: course_extractor.extract_courses_from_url(f'{base_url}/d/giant-{size}'),
+            0.2,
+        ))
+        benchmarks.append((
+            f'parse_courses[giant-{size}]',
+            lambda i, size=size: course_extractor.parse_courses(giant_html[size]),
+            0.2,
+        ))
+
+    if async_scrapers is not None:
+        async def extract_posts_async():
+            async with async_scrapers.AsyncFetcher(**limits) as async_fetcher:
+                urls = [f'{base_url}/d/{index}-async' for index in range(ASYNC_POST_COUNT)]
+                return await async_scrapers.extract_courses_from_urls_async(urls, fetcher=async_fetcher)
+
+        async def listing_async():
+            async with async_scrapers.AsyncFetcher(**limits) as async_fetcher:
+                return await async_scrapers.get_latest_coupon_posts_bs4_async(fetcher=async_fetcher)
+
+        benchmarks.extend([
+            ('get_latest_coupon_posts_bs4_async', lambda i: asyncio.run(listing_async()), 1),
+            (f'extract_courses_from_urls_async[{ASYNC_POST_COUNT} posts]',
+             lambda i: asyncio.run(extract_posts_async()), 0.3),
+        ])
+
+    benchmarks.extend([
+        # A new checker every call checks every coupon; the shared one serves them from its cache
+        (f'CouponChecker.check_many[{COUPON_CHECK_SIZE}, cold]',
+         lambda i: CouponChecker(api_base=base_url, **limits).check_many(coupon_urls), 0.1),
+        (f'CouponChecker.check_many[{COUPON_CHECK_SIZE}, cached]',
+         lambda i: cached_checker.check_many(coupon_urls), 1),
+        # The largest check one /api/validate-coupons request may ask for
+        (f'CouponChecker.check_many[{config.COUPON_CHECK_MAX_URLS}, cold]',
+         lambda i: CouponChecker(api_base=base_url, **limits).check_many(coupon_urls[:config.COUPON_CHECK_MAX_URLS]), 0.1),
+        ('GET /', lambda i: expect(client.get('/')), 1),
+        ('GET /api/coupons', lambda i: expect(client.get('/api/coupons')), 1),
+        # A new URL every call misses the store and database and scrapes live
+        ('GET /api/extract-courses[live]',
+         lambda i: expect(client.get(f'/api/extract-courses?url={base_url}/d/{100000 + i}-bench')), 1),
+        ('GET /api/extract-courses[stored, limit=10]',
+         lambda i: expect(client.get(f'/api/extract-courses?url={recorded_post}&limit=10')), 1),
+        ('GET /api/search', lambda i: expect(client.get('/api/search?q=python')), 1),
+    ])
+    return benchmarks
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(results, previous_path):
+    """Print the change of p50 latency and throughput against a previous run"""
+    with open(previous_path, encoding='utf-8') as f:
+        previous = json.load(f)['results']
+
+    print(f"\nComparison with {previous_path}:")
+    for name, result in results.items():
+        old = previous.get(name)
+        if not old:
+            print(f"  {name:50s} (new)")
+            continue
+        p50_change = (result['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0
+        throughput_change = ((result['throughput_per_s'] - old['throughput_per_s'])
+                             / old['throughput_per_s'] * 100 if old['throughput_per_s'] else 0)
+        print(f"  {name:50s} p50 {p50_change:+7.1f}%  throughput {throughput_change:+7.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the offline scraper benchmarks')
+    parser.add_argument('--iterations', type=int, default=30, help='timed calls per benchmark')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated upstream latency in seconds')
+    parser.add_argument('--output', default='bench_results.json', help='file to write results to')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    parser.add_argument('--filter', help='only run benchmarks whose name contains this text')
+    parser.add_argument('--polite', action='store_true',
+                        help='keep the fetcher rate limits instead of disabling them')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+
+    with FixtureServer(latency=args.latency) as server:
+        # Point the scrapers at the stand-in server
+        hacksnation.HACKSNATION_BASE_URL = server.base_url
+        hacksnation.HACKSNATION_URL = f'{server.base_url}/t/free-coupons'
+        if not args.polite:
+            fetcher._fetcher = fetcher.Fetcher(host_rate=1e9, host_burst=1e9, host_concurrency=64)
+
+        client = flask_app.app.test_client()
+        results = {}
+        for name, func, multiplier in build_benchmarks(server.base_url, client, args.polite):
+            if args.filter and args.filter not in name:
+                continue
+            iterations = max(int(args.iterations * multiplier), 3)
+            results[name] = measure(func, iterations)
+            result = results[name]
+            print(f"{name:50s} {result['throughput_per_s']:>9.1f}/s  p50 {result['p50_ms']:>9.2f}ms  "
+                  f"p95 {result['p95_ms']:>9.2f}ms  p99 {result['p99_ms']:>9.2f}ms  "
+                  f"peak {result['peak_memory_kb']:>9.1f}KB")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'latency_s': args.latency,
+            'polite': args.polite,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
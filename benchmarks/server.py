@@ -0,0 +1,159 @@
+"""
+Local stand-in for hacksnation.com that replays fixtures with configurable latency
+"""
+import json
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from benchmarks.fixtures import generate_flarum_discussions, generate_giant_thread, load_fixture
+
+
+class BenchHTTPServer(ThreadingHTTPServer):
+    """Threaded server with a listen backlog sized for concurrent benchmark clients"""
+
+    # With the default backlog of 5, extra connections wait for a SYN retry (1s)
+    request_queue_size = 128
+
+
+def udemy_coupon_status(code):
+    """Deterministic stand-in coupon status: about one code in three is expired"""
+    return 'expired' if zlib.crc32(code.encode()) % 3 == 0 else 'applied'
+
+
+class FixtureServer:
+    """
+    Serves the listing page, discussion pages, the Flarum discussions API and
+    the Udemy endpoints used by the coupon checker
+
+    * ``/t/free-coupons`` replays the recorded listing
+    * ``/d/giant-<n>`` serves a synthetic thread with ``n`` courses
+    * ``/d/<anything else>`` replays the recorded discussion
+    * ``/api/discussions`` serves generated JSON:API pages
+    * ``/api-2.0/courses/<slug>/`` answers the course id (404 for ``removed-*`` slugs)
+    * ``/api-2.0/course-landing-components/<id>/me/`` answers the coupon status
+    """
+
+    def __init__(self, latency=0.0, host='127.0.0.1', port=0):
+        """
+        Args:
+            latency (float): Seconds to wait before answering each request
+            host (str): Interface to bind
+            port (int): Port to bind, 0 for any free port
+        """
+        self.latency = latency
+        self.requests = 0
+        self._listing = load_fixture('listing.html').encode('utf-8')
+        self._discussion = load_fixture('discussion.html').encode('utf-8')
+        self._giant = {}
+        self._lock = threading.Lock()
+        self._httpd = BenchHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _giant_thread(self, count):
+        with self._lock:
+            if count not in self._giant:
+                self._giant[count] = generate_giant_thread(count).encode('utf-8')
+            return self._giant[count]
+
+    def _route(self, path):
+        """Return (status, content type, body) for a request path"""
+        parts = urlsplit(path)
+        if parts.path.rstrip('/') == '/t/free-coupons':
+            return 200, 'text/html; charset=utf-8', self._listing
+
+        if parts.path == '/api/discussions':
+            query = parse_qs(parts.query)
+            offset = int(query.get('page[offset]', ['0'])[0])
+            limit = int(query.get('page[limit]', ['20'])[0])
+            body = generate_flarum_discussions(offset=offset, limit=limit, base_url=self.base_url)
+            return 200, 'application/vnd.api+json', body.encode('utf-8')
+
+        course = re.match(r'^/api-2\.0/courses/([^/]+)/?$', parts.path)
+        if course:
+            slug = course.group(1)
+            if slug.startswith('removed'):
+                return 404, 'application/json', b'{"detail": "Not found."}'
+            body = {'_class': 'course', 'id': 1000 + zlib.crc32(slug.encode()) % 1000000}
+            return 200, 'application/json', json.dumps(body).encode('utf-8')
+
+        if re.match(r'^/api-2\.0/course-landing-components/\d+/me/?$', parts.path):
+            code = parse_qs(parts.query).get('couponCode', [''])[0]
+            attempts = [{'code': code, 'status': udemy_coupon_status(code)}] if code else []
+            body = {'redeem_coupon': {'discount_attempts': attempts}}
+            return 200, 'application/json', json.dumps(body).encode('utf-8')
+
+        giant = re.match(r'^/d/giant-(\d+)', parts.path)
+        if giant:
+            return 200, 'text/html; charset=utf-8', self._giant_thread(int(giant.group(1)))
+
+        if parts.path.startswith('/d/'):
+            return 200, 'text/html; charset=utf-8', self._discussion
+
+        return 404, 'text/plain', b'Not found'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are separate writes; with Nagle on, a kept-alive
+            # connection waits for the client's delayed ACK (~40ms) between them
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                status, content_type, body = server._route(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve benchmark fixtures as a stand-in HacksNation')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds of latency per request')
+    args = parser.parse_args()
+
+    fixture_server = FixtureServer(latency=args.latency, port=args.port).start()
+    print(f'Serving fixtures on {fixture_server.base_url} (Ctrl+C to stop)')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fixture_server.stop()
@@ -0,0 +1,124 @@
+"""
+Configuration for the Udemy Coupon Finder, read from environment variables
+"""
+import os
+
+
+def env_int(name, default):
+    """Read an integer setting from the environment"""
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def env_float(name, default):
+    """Read a float setting from the environment"""
+    value = os.environ.get(name)
+    return float(value) if value not in (None, '') else default
+
+
+def env_bool(name, default):
+    """Read a boolean setting from the environment"""
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# Coupon listing cache (seconds)
+COUPON_CACHE_TTL = env_float('COUPON_CACHE_TTL', 300)
+COUPON_CACHE_STALE_TTL = env_float('COUPON_CACHE_STALE_TTL', 900)
+COUPON_CACHE_NEGATIVE_TTL = env_float('COUPON_CACHE_NEGATIVE_TTL', 60)
+
+# Read the listing from the Flarum JSON API before trying HTML scrapers
+LISTING_USE_API = env_bool('LISTING_USE_API', True)
+
+# Listing scraper backends tried in order: api, selenium, bs4. Selenium is
+# only imported when it is listed here and the backends before it found nothing
+SCRAPER_BACKENDS = os.environ.get(
+    'SCRAPER_BACKENDS', 'api,selenium,bs4' if LISTING_USE_API else 'selenium,bs4')
+
+# Listing sites, as a JSON list of {"type": hacksnation|flarum|html|module:Class, ...options}.
+# All are queried concurrently; a source slower than its timeout is left out of the feed
+LISTING_SOURCES = os.environ.get('LISTING_SOURCES', '[{"type": "hacksnation"}]')
+LISTING_SOURCE_TIMEOUT = env_float('LISTING_SOURCE_TIMEOUT', 30)
+
+# ChromeDriver binary: an explicit path, or the one resolved by webdriver_manager,
+# remembered on disk. Offline mode never downloads and uses the remembered or
+# PATH binary
+CHROMEDRIVER_PATH = os.environ.get('CHROMEDRIVER_PATH', '')
+CHROMEDRIVER_CACHE_PATH = os.environ.get('CHROMEDRIVER_CACHE_PATH', os.path.join('data', 'chromedriver.json'))
+CHROMEDRIVER_CACHE_TTL = env_float('CHROMEDRIVER_CACHE_TTL', 7 * 24 * 3600)
+SELENIUM_OFFLINE = env_bool('SELENIUM_OFFLINE', False)
+
+# SQLite database of scraped posts and courses
+DATABASE_PATH = os.environ.get('DATABASE_PATH', os.path.join('data', 'coupons.db'))
+
+# In-memory Bloom filter over every stored course URL; grows past its capacity
+SEEN_INDEX_CAPACITY = env_int('SEEN_INDEX_CAPACITY', 100000)
+SEEN_INDEX_ERROR_RATE = env_float('SEEN_INDEX_ERROR_RATE', 0.001)
+
+# Background refresh scheduler
+SCHEDULER_ENABLED = env_bool('SCHEDULER_ENABLED', True)
+SCHEDULER_INTERVAL = env_float('SCHEDULER_INTERVAL', 300)
+SCHEDULER_JITTER = env_float('SCHEDULER_JITTER', 30)
+SCHEDULER_TIMEOUT = env_float('SCHEDULER_TIMEOUT', 240)
+SCHEDULER_POST_LIMIT = env_int('SCHEDULER_POST_LIMIT', 5)
+
+# Batch course extraction
+BATCH_MAX_WORKERS = env_int('BATCH_MAX_WORKERS', 8)
+BATCH_MAX_URLS = env_int('BATCH_MAX_URLS', 50)
+
+# Seconds a request waits for an identical scrape already in flight
+SINGLEFLIGHT_WAIT_TIMEOUT = env_float('SINGLEFLIGHT_WAIT_TIMEOUT', 60)
+
+# Prometheus metrics on /metrics and per-request stage timing logs
+METRICS_ENABLED = env_bool('METRICS_ENABLED', True)
+TRACE_REQUESTS = env_bool('TRACE_REQUESTS', False)
+
+# Selenium fast-render mode: eager page loads, blocked media/ads, wait for the DOM to settle
+SELENIUM_FAST_RENDER = env_bool('SELENIUM_FAST_RENDER', True)
+SELENIUM_READY_TIMEOUT = env_float('SELENIUM_READY_TIMEOUT', 10)
+SELENIUM_QUIET_PERIOD = env_float('SELENIUM_QUIET_PERIOD', 0.5)
+
+# Udemy coupon validity checks
+UDEMY_API_BASE = os.environ.get('UDEMY_API_BASE', 'https://www.udemy.com')
+COUPON_CHECK_VALID_TTL = env_float('COUPON_CHECK_VALID_TTL', 900)
+COUPON_CHECK_EXPIRED_TTL = env_float('COUPON_CHECK_EXPIRED_TTL', 6 * 3600)
+COUPON_CHECK_UNKNOWN_TTL = env_float('COUPON_CHECK_UNKNOWN_TTL', 60)
+COUPON_CHECK_WORKERS = env_int('COUPON_CHECK_WORKERS', 32)
+COUPON_CHECK_HOST_CONCURRENCY = env_int('COUPON_CHECK_HOST_CONCURRENCY', 16)
+COUPON_CHECK_HOST_RATE = env_float('COUPON_CHECK_HOST_RATE', 50)
+# A request checks its URLs while it waits: up to two Udemy calls per URL at
+# COUPON_CHECK_HOST_RATE per second must fit well inside WEB_TIMEOUT
+COUPON_CHECK_MAX_URLS = env_int('COUPON_CHECK_MAX_URLS', 200)
+
+# Only one server process per machine runs the scheduler; it holds this lock file
+SCHEDULER_LOCK_PATH = os.environ.get('SCHEDULER_LOCK_PATH', os.path.join('data', 'scheduler.lock'))
+
+# Production server (serve.py)
+WEB_SERVER = os.environ.get('WEB_SERVER', 'auto')  # auto, gunicorn or waitress
+WEB_BIND = os.environ.get('WEB_BIND', '0.0.0.0:8000')
+WEB_WORKERS = env_int('WEB_WORKERS', min(os.cpu_count() or 1, 4))
+WEB_THREADS = env_int('WEB_THREADS', 32)
+WEB_TIMEOUT = env_int('WEB_TIMEOUT', 120)
+WEB_GRACEFUL_TIMEOUT = env_int('WEB_GRACEFUL_TIMEOUT', 30)
+WEB_KEEPALIVE = env_int('WEB_KEEPALIVE', 5)
+WEB_BACKLOG = env_int('WEB_BACKLOG', 2048)
+WEB_MAX_REQUESTS = env_int('WEB_MAX_REQUESTS', 0)
+
+# Worker processes for parsing in the async scrapers (0 = thread pool)
+ASYNC_PARSE_PROCESSES = env_int('ASYNC_PARSE_PROCESSES', 0)
+
+# Live feed of new posts and courses over Server-Sent Events (/api/events)
+SSE_HEARTBEAT = env_float('SSE_HEARTBEAT', 15)
+SSE_POLL_INTERVAL = env_float('SSE_POLL_INTERVAL', 1.0)
+SSE_REPLAY_SIZE = env_int('SSE_REPLAY_SIZE', 500)
+SSE_QUEUE_SIZE = env_int('SSE_QUEUE_SIZE', 100)
+# Every open stream holds one server thread, so at most half of a worker's
+# WEB_THREADS serve the live feed and the rest stay free for other requests
+# (with a single thread the live feed is off and answers 503)
+SSE_MAX_SUBSCRIBERS = max(0, min(env_int('SSE_MAX_SUBSCRIBERS', WEB_THREADS // 2), WEB_THREADS // 2))
+
+# Compressed archive of every fetched page, for offline re-parsing with reparse.py
+SNAPSHOT_ARCHIVE_ENABLED = env_bool('SNAPSHOT_ARCHIVE_ENABLED', True)
+SNAPSHOT_ARCHIVE_PATH = os.environ.get('SNAPSHOT_ARCHIVE_PATH', os.path.join('data', 'snapshots'))
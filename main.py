@@ -1,8 +1,10 @@
 """
 Entry point for Udemy Coupon Finder application
 """
-from app import app
+from app import app, start_background_refresh
 
 if __name__ == '__main__':
     # Import app and run it
+    app.debug = True
+    start_background_refresh()
     app.run(debug=True)
\ No newline at end of file
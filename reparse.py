@@ -0,0 +1,178 @@
+"""
+Re-run the extractors over the snapshot archive, without network access
+
+Every archived page is parsed again with the current rules in
+course_extractor.py and hacksnation.py, spread over a process pool using
+all cores. Results can be written back to the database and/or to a JSON
+Lines file:
+
+    python reparse.py --save
+    python reparse.py --since 2026-01-01 --output reparsed.jsonl
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+import config
+from snapshots import SnapshotArchive, load_blob
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+LISTING = 'listing'
+LISTING_API = 'listing_api'
+POST = 'post'
+
+
+def snapshot_kind(url):
+    """Which parser applies to an archived URL, or None for pages we do not parse"""
+    path = urlsplit(url).path
+    if path.startswith('/api/discussions'):
+        return LISTING_API
+    if path.startswith('/d/'):
+        return POST
+    if path.startswith('/t/'):
+        return LISTING
+    return None
+
+
+def _init_worker():
+    # The parsers log every link they look at; keep workers to warnings
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def reparse_snapshot(task):
+    """
+    Parse one archived page; runs in a worker process
+
+    Args:
+        task (tuple): (archive directory, url, sha256, fetched_at)
+
+    Returns:
+        dict: url, fetched_at, kind and either posts, courses or error
+    """
+    from scrapers.course_extractor import parse_courses
+    from scrapers.hacksnation import parse_coupon_posts_bs4, parse_flarum_discussions
+
+    root, url, sha256, fetched_at = task
+    kind = snapshot_kind(url)
+    result = {'url': url, 'fetched_at': fetched_at, 'kind': kind}
+    if kind is None:
+        return result
+
+    try:
+        text = load_blob(root, sha256)
+        # Keep posts of the year the page was fetched in, not of today
+        fetch_year = datetime.fromtimestamp(fetched_at).year
+        if kind == POST:
+            result['courses'] = parse_courses(text)
+        elif kind == LISTING_API:
+            parts = urlsplit(url)
+            base_url = f"{parts.scheme}://{parts.netloc}"
+            result['posts'] = parse_flarum_discussions(json.loads(text), fetch_year, base_url)
+        else:
+            result['posts'] = parse_coupon_posts_bs4(text, current_year=fetch_year, base_url=url)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def reparse_archive(archive, snapshots, workers=None, on_result=None):
+    """
+    Re-parse snapshots on a process pool
+
+    Results are handed to ``on_result`` in the order of ``snapshots``, so
+    when they are saved a newer snapshot of a URL overwrites an older one.
+
+    Args:
+        archive (SnapshotArchive): Archive the snapshots belong to
+        snapshots (list): Rows from SnapshotArchive.select()
+        workers (int): Worker processes; all cores by default
+        on_result (callable): Called with every result dictionary
+
+    Returns:
+        dict: Counts of snapshots by kind, posts, courses and errors
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(archive.root, row['url'], row['sha256'], row['fetched_at']) for row in snapshots]
+    chunksize = max(1, min(32, len(tasks) // (workers * 4)))
+    summary = Counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        for result in executor.map(reparse_snapshot, tasks, chunksize=chunksize):
+            summary['snapshots'] += 1
+            summary[result['kind'] or 'skipped'] += 1
+            if 'error' in result:
+                summary['errors'] += 1
+                logger.warning(f"Could not re-parse {result['url']}: {result['error']}")
+            summary['posts'] += len(result.get('posts') or [])
+            summary['courses'] += len(result.get('courses') or [])
+            if on_result:
+                on_result(result)
+    return dict(summary)
+
+
+def parse_date(value):
+    """Unix time of a YYYY-MM-DD date given on the command line"""
+    return datetime.strptime(value, '%Y-%m-%d').timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-parse archived pages with the current extractors')
+    parser.add_argument('--archive', default=config.SNAPSHOT_ARCHIVE_PATH, help='snapshot archive directory')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--since', type=parse_date, help='only pages fetched on or after this date (YYYY-MM-DD)')
+    parser.add_argument('--until', type=parse_date, help='only pages fetched before this date (YYYY-MM-DD)')
+    parser.add_argument('--url', help='only URLs containing this text')
+    parser.add_argument('--all-versions', action='store_true',
+                        help='parse every archived version instead of the newest of each URL')
+    parser.add_argument('--save', action='store_true', help='write the results to the database')
+    parser.add_argument('--output', help='JSON Lines file to write the results to')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if not os.path.isdir(args.archive):
+        parser.error(f"No snapshot archive at {args.archive}")
+
+    archive = SnapshotArchive(args.archive)
+    snapshots = archive.select(url_contains=args.url, since=args.since, until=args.until,
+                               latest_only=not args.all_versions)
+    logger.info(f"Re-parsing {len(snapshots)} snapshots with {args.workers} workers")
+
+    db = None
+    if args.save:
+        from storage import CouponDatabase
+        db = CouponDatabase(config.DATABASE_PATH)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+
+    def on_result(result):
+        if output:
+            output.write(json.dumps(result) + '\n')
+        if db is None or 'error' in result:
+            return
+        # Archived pages are history: dated when they were fetched, and kept off the live feed
+        if 'posts' in result:
+            db.upsert_posts(result['posts'], seen_at=result['fetched_at'], publish=False)
+        elif 'courses' in result:
+            db.save_post_courses(result['url'], result['courses'], seen_at=result['fetched_at'], publish=False)
+
+    started = time.perf_counter()
+    try:
+        summary = reparse_archive(archive, snapshots, workers=args.workers, on_result=on_result)
+    finally:
+        if output:
+            output.close()
+    elapsed = time.perf_counter() - started
+
+    rate = summary.get('snapshots', 0) / elapsed if elapsed else 0
+    logger.info(f"Re-parsed in {elapsed:.1f}s ({rate:.0f} pages/s): {summary}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+"""
+Background refresh scheduler that pre-scrapes coupon listings and post pages
+"""
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from storage import crawl_incremental
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def utc_now_iso():
+    """Current UTC time as an ISO 8601 string"""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def acquire_process_lock(path):
+    """
+    Take an exclusive lock on a file without waiting, so that only one of
+    several server processes runs the scheduler
+
+    The lock lasts as long as the returned file stays open, and is released
+    by the operating system when the process exits.
+
+    Returns:
+        file: The open lock file, or None if another process holds the lock
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    lock_file = open(path, 'a')
+    try:
+        import fcntl
+    except ImportError:
+        # No flock() on Windows; every process runs its own scheduler there
+        return lock_file
+
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class ScrapeStore:
+    """Thread-safe in-process store of the latest scraped posts and courses"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._posts = []
+        self._posts_updated_at = None
+        self._courses = {}
+
+    def set_posts(self, posts):
+        with self._lock:
+            self._posts = list(posts)
+            self._posts_updated_at = time.time()
+
+    def get_posts(self):
+        """Return the stored posts, or None if no refresh has published any"""
+        with self._lock:
+            if self._posts_updated_at is None:
+                return None
+            return list(self._posts)
+
+    def age(self):
+        """Seconds since posts were last published, or 0 if never"""
+        with self._lock:
+            if self._posts_updated_at is None:
+                return 0
+            return max(time.time() - self._posts_updated_at, 0)
+
+    def set_courses(self, url, courses):
+        with self._lock:
+            self._courses[url] = (list(courses), time.time())
+
+    def get_courses(self, url):
+        """Return the stored courses for a post URL, or None if not scraped yet"""
+        with self._lock:
+            entry = self._courses.get(url)
+            return list(entry[0]) if entry else None
+
+    def retain_courses(self, urls):
+        """Forget courses for posts that are no longer on the listing"""
+        keep = set(urls)
+        with self._lock:
+            self._courses = {url: entry for url, entry in self._courses.items() if url in keep}
+
+    def status(self):
+        with self._lock:
+            return {
+                'posts': len(self._posts),
+                'posts_updated_at': (
+                    datetime.fromtimestamp(self._posts_updated_at, timezone.utc).isoformat()
+                    if self._posts_updated_at else None
+                ),
+                'post_pages': len(self._courses),
+            }
+
+
+class ScheduledJob:
+    """A periodic job and the bookkeeping of its runs"""
+
+    def __init__(self, name, func, interval, jitter=0, timeout=None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.last_started_at = None
+        self.last_finished_at = None
+        self.last_success_at = None
+        self.last_duration = None
+        self.last_error = None
+        self.next_run_at = None
+        self._worker = None
+
+    @property
+    def running(self):
+        return self._worker is not None and self._worker.is_alive()
+
+    def next_delay(self):
+        """Interval until the next run, with random jitter applied"""
+        delay = self.interval + random.uniform(-self.jitter, self.jitter)
+        return max(delay, 0)
+
+    def _execute(self):
+        started = time.monotonic()
+        try:
+            self.func()
+            self.last_success_at = utc_now_iso()
+            self.last_error = None
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            logger.error(f"Scheduled job {self.name} failed: {e}")
+        finally:
+            self.last_duration = round(time.monotonic() - started, 3)
+            self.last_finished_at = utc_now_iso()
+
+    def run_once(self):
+        """
+        Run the job in a worker thread and wait for it up to the timeout
+
+        A run is skipped while the previous one is still going, so a slow
+        upstream never causes runs to pile up behind each other.
+
+        Returns:
+            bool: True if the job was started, False if it was skipped
+        """
+        if self.running:
+            self.skipped += 1
+            logger.warning(f"Skipping job {self.name}: previous run still in progress")
+            return False
+
+        self.runs += 1
+        self.last_started_at = utc_now_iso()
+        self._worker = threading.Thread(target=self._execute, name=f"job-{self.name}", daemon=True)
+        self._worker.start()
+        self._worker.join(self.timeout)
+
+        if self._worker.is_alive():
+            self.timeouts += 1
+            self.last_error = f"Timed out after {self.timeout}s"
+            logger.warning(f"Scheduled job {self.name} timed out after {self.timeout}s")
+        return True
+
+    def status(self):
+        return {
+            'name': self.name,
+            'interval': self.interval,
+            'jitter': self.jitter,
+            'timeout': self.timeout,
+            'running': self.running,
+            'runs': self.runs,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'skipped': self.skipped,
+            'last_started_at': self.last_started_at,
+            'last_finished_at': self.last_finished_at,
+            'last_success_at': self.last_success_at,
+            'last_duration': self.last_duration,
+            'last_error': self.last_error,
+            'next_run_at': self.next_run_at,
+        }
+
+
+class RefreshScheduler:
+    """Runs registered jobs on their own interval in daemon threads"""
+
+    def __init__(self):
+        self.jobs = {}
+        self._threads = []
+        self._stop = threading.Event()
+        self.started_at = None
+
+    def add_job(self, name, func, interval, jitter=0, timeout=None):
+        """
+        Register a periodic job
+
+        Args:
+            name (str): Unique job name
+            func (callable): Zero-argument function to run
+            interval (float): Seconds between runs
+            jitter (float): Maximum random deviation from the interval
+            timeout (float): Seconds after which a run is reported as timed out
+
+        Returns:
+            ScheduledJob: The registered job
+        """
+        job = ScheduledJob(name, func, interval, jitter, timeout)
+        self.jobs[name] = job
+        return job
+
+    def _loop(self, job, run_immediately):
+        if not run_immediately:
+            delay = job.next_delay()
+            job.next_run_at = datetime.fromtimestamp(time.time() + delay, timezone.utc).isoformat()
+            if self._stop.wait(delay):
+                return
+
+        while not self._stop.is_set():
+            job.run_once()
+            delay = job.next_delay()
+            job.next_run_at = datetime.fromtimestamp(time.time() + delay, timezone.utc).isoformat()
+            if self._stop.wait(delay):
+                return
+
+    def start(self, run_immediately=True):
+        """Start a thread per job; the first run happens right away by default"""
+        if self.running:
+            return
+        self._stop.clear()
+        self.started_at = utc_now_iso()
+        self._threads = []
+        for job in self.jobs.values():
+            thread = threading.Thread(
+                target=self._loop, args=(job, run_immediately),
+                name=f"scheduler-{job.name}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Scheduler started with {len(self.jobs)} job(s)")
+
+    def stop(self, timeout=None):
+        """Signal all job loops to stop and wait for them"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        logger.info("Scheduler stopped")
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def status(self):
+        return {
+            'running': self.running,
+            'started_at': self.started_at,
+            'jobs': [job.status() for job in self.jobs.values()],
+        }
+
+
+def refresh_coupon_data(store, db, load_posts, extract_courses):
+    """
+    Scrape the listing, crawl new posts into the database and publish both to the store
+
+    Args:
+        store (ScrapeStore): Store read by the Flask routes
+        db (CouponDatabase): Persistent database of posts and courses
+        load_posts (callable): Function returning the latest coupon posts
+        extract_courses (callable): Function extracting courses from a post URL,
+            raising on failure
+    """
+    posts = load_posts()
+    if not posts:
+        raise RuntimeError("Listing scrape returned no posts")
+
+    store.set_posts(posts)
+    logger.info(f"Scheduler published {len(posts)} posts")
+
+    # Only posts newer than the last crawl are fetched and parsed
+    crawl_incremental(db, posts, extract_courses)
+
+    urls = [post['url'] for post in posts]
+    for url in urls:
+        courses = db.get_post_courses(url)
+        if courses is not None:
+            store.set_courses(url, courses)
+
+    store.retain_courses(urls)
@@ -0,0 +1,297 @@
+"""
+Async variants of the HTML scrapers, built on aiohttp
+
+Fetching happens on the event loop with the same politeness rules as the
+blocking fetcher (per-host concurrency, token bucket rate limits, retries
+with backoff, conditional GETs), sharing its retry, backoff, validator and
+error helpers so both behave alike; parsing is CPU-bound and runs in an
+executor so that it never blocks the loop. Requires the optional
+``aiohttp`` package.
+
+Usage:
+
+    async with AsyncFetcher() as fetcher:
+        posts = await get_latest_coupon_posts_bs4_async(fetcher=fetcher)
+        courses = await extract_courses_from_urls_async([post['url'] for post in posts], fetcher=fetcher)
+"""
+import asyncio
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+import aiohttp
+import config
+from scrapers import hacksnation
+from scrapers.course_extractor import parse_courses
+from scrapers.fetcher import (
+    DEFAULT_BACKOFF, DEFAULT_HOST_BURST, DEFAULT_HOST_CONCURRENCY, DEFAULT_HOST_RATE,
+    DEFAULT_MAX_BACKOFF, DEFAULT_RETRIES, DEFAULT_TIMEOUT, DEFAULT_VALIDATOR_CACHE_SIZE,
+    FETCH_ATTEMPTS, NOT_MODIFIED, OK, USER_AGENT, FetchError, FetchResult, HTTPStatusError,
+    TokenBucket, ValidatorStore, backoff_delay, parser_key, response_outcome,
+)
+from scrapers.hacksnation import parse_coupon_posts_bs4
+from snapshots import get_snapshot_archive
+from utils.metrics import timed
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class AsyncTokenBucket(TokenBucket):
+    """Token bucket rate limiter that waits without blocking the event loop"""
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class _AsyncHostLimits:
+    """Concurrency and rate limits for a single host"""
+
+    def __init__(self, concurrency, rate, burst):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = AsyncTokenBucket(rate, burst)
+
+
+_parse_executor = None
+
+
+def get_parse_executor():
+    """
+    Executor shared by all async fetchers for parsing
+
+    A process pool with ASYNC_PARSE_PROCESSES workers when that is set, so
+    that parsing also escapes the GIL; otherwise None, which means the event
+    loop's default thread pool.
+    """
+    global _parse_executor
+    if _parse_executor is None and config.ASYNC_PARSE_PROCESSES > 0:
+        _parse_executor = ProcessPoolExecutor(max_workers=config.ASYNC_PARSE_PROCESSES)
+    return _parse_executor
+
+
+class AsyncFetcher:
+    """
+    Polite aiohttp client for the async scrapers
+
+    One instance belongs to one event loop; close it (or use it as an async
+    context manager) when done.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 max_backoff=DEFAULT_MAX_BACKOFF, host_concurrency=DEFAULT_HOST_CONCURRENCY,
+                 host_rate=DEFAULT_HOST_RATE, host_burst=DEFAULT_HOST_BURST,
+                 validator_cache_size=DEFAULT_VALIDATOR_CACHE_SIZE, parse_executor=None, archive=None):
+        """
+        Args:
+            timeout (tuple): (connect, read) timeouts in seconds
+            retries (int): Retries after the first attempt
+            backoff (float): Base delay of the exponential backoff
+            max_backoff (float): Upper bound of a single retry delay
+            host_concurrency (int): Requests in flight per host
+            host_rate (float): Requests per second per host
+            host_burst (int): Requests allowed in a burst per host
+            validator_cache_size (int): URLs whose ETag/Last-Modified are remembered
+            parse_executor (Executor): Where parsers run; defaults to get_parse_executor()
+            archive (SnapshotArchive): Where every downloaded page is archived, if anywhere
+        """
+        connect_timeout, read_timeout = timeout
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.host_concurrency = host_concurrency
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.validator_cache_size = validator_cache_size
+        self.parse_executor = parse_executor or get_parse_executor()
+        self.archive = archive
+        self._session = None
+        self._hosts = {}
+        self._validators = ValidatorStore(validator_cache_size)
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                headers={'User-Agent': USER_AGENT},
+                connector=aiohttp.TCPConnector(limit=0, limit_per_host=self.host_concurrency),
+            )
+        return self._session
+
+    def _limits_for(self, url):
+        host = urlsplit(url).netloc.lower()
+        limits = self._hosts.get(host)
+        if limits is None:
+            limits = self._hosts[host] = _AsyncHostLimits(
+                self.host_concurrency, self.host_rate, self.host_burst)
+        return limits
+
+    async def _archive_page(self, url, status, text, headers):
+        # Compressing and writing the page would block the event loop
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self.archive.record, url, text, headers, status)
+        except Exception as e:
+            logger.warning(f"Could not archive {url}: {e}")
+
+    async def fetch(self, url, headers=None, conditional=True):
+        """
+        GET a URL
+
+        Returns:
+            FetchResult: Response text and status; ``not_modified`` is True on a 304
+
+        Raises:
+            HTTPStatusError: On a client error status such as 404
+            FetchError: When every attempt failed
+        """
+        request_headers = dict(headers or {})
+        validated = self._validators.get(url) if conditional else None
+        if validated is not None:
+            request_headers = validated.conditional_headers(request_headers)
+
+        session = self._get_session()
+        limits = self._limits_for(url)
+        last_error = None
+
+        for attempt in range(self.retries + 1):
+            await limits.bucket.acquire()
+            retry_after = None
+            try:
+                async with limits.semaphore:
+                    with timed('http_fetch'):
+                        async with session.get(url, headers=request_headers) as response:
+                            status = response.status
+                            response_headers = response.headers
+                            retry_after = response_headers.get('Retry-After')
+                            text = await response.text() if status != 304 else None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                FETCH_ATTEMPTS.inc(outcome='error')
+                last_error = e
+                logger.warning(f"Async fetch of {url} failed (attempt {attempt + 1}): {e!r}")
+            else:
+                outcome = response_outcome(url, status, validated)
+                if outcome == NOT_MODIFIED:
+                    return FetchResult(url, 304, validated.text, response_headers, not_modified=True)
+
+                if outcome == OK:
+                    if conditional:
+                        self._validators.store(url, response_headers, text)
+                    if self.archive is not None:
+                        await self._archive_page(url, status, text, response_headers)
+                    return FetchResult(url, status, text, response_headers)
+
+                last_error = HTTPStatusError(url, status)
+                logger.warning(f"Async fetch of {url} returned {status} (attempt {attempt + 1})")
+
+            if attempt < self.retries:
+                await asyncio.sleep(backoff_delay(attempt, self.backoff, self.max_backoff, retry_after))
+
+        raise FetchError(f"Giving up on {url} after {self.retries + 1} attempts: {last_error}")
+
+    async def fetch_parsed(self, url, parser, key=None, headers=None):
+        """Fetch a URL and parse it in the parse executor, reusing the previous parse on a 304"""
+        key = parser_key(parser, key)
+        result = await self.fetch(url, headers=headers)
+
+        if result.not_modified:
+            found, parsed = self._validators.previous_parse(url, key)
+            if found:
+                return parsed
+
+        loop = asyncio.get_running_loop()
+        parsed = await loop.run_in_executor(self.parse_executor, parser, result.text)
+        self._validators.remember_parse(url, key, parsed)
+        return parsed
+
+    async def fetch_json(self, url, headers=None):
+        """Fetch a URL and decode its JSON body"""
+        request_headers = {'Accept': 'application/json'}
+        request_headers.update(headers or {})
+        return await self.fetch_parsed(url, json.loads, key='json', headers=request_headers)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+async def _with_fetcher(fetcher, func):
+    """Run ``func(fetcher)``, using a short-lived fetcher when none is given"""
+    if fetcher is not None:
+        return await func(fetcher)
+    async with AsyncFetcher(archive=get_snapshot_archive()) as own_fetcher:
+        return await func(own_fetcher)
+
+
+async def get_latest_coupon_posts_bs4_async(limit=5, fetcher=None):
+    """
+    Async variant of get_latest_coupon_posts_bs4()
+
+    Args:
+        limit (int): Number of coupon posts to return
+        fetcher (AsyncFetcher): Client to use; a temporary one when omitted
+
+    Returns:
+        list: List of dictionaries containing title and url of the latest posts
+    """
+    try:
+        coupon_posts = await _with_fetcher(
+            fetcher, lambda f: f.fetch_parsed(hacksnation.HACKSNATION_URL, parse_coupon_posts_bs4))
+
+        result = coupon_posts[:limit] if limit else coupon_posts
+        logger.info(f"Async BS4 Returning {len(result)} coupons")
+        return [dict(post) for post in result]
+
+    except Exception as e:
+        logger.error(f"Error scraping HacksNation with async BS4: {e}")
+        return []
+
+
+async def extract_courses_from_url_async(url, raise_errors=False, fetcher=None):
+    """
+    Async variant of extract_courses_from_url()
+
+    Args:
+        url (str): URL of the HacksNation page containing Udemy courses
+        raise_errors (bool): Re-raise fetch/parse errors instead of returning an empty list
+        fetcher (AsyncFetcher): Client to use; a temporary one when omitted
+
+    Returns:
+        list: List of dictionaries containing course title and enrollment link
+    """
+    try:
+        logger.info(f"Extracting courses from URL: {url}")
+        courses = await _with_fetcher(fetcher, lambda f: f.fetch_parsed(url, parse_courses))
+        return [dict(course) for course in courses]
+
+    except Exception as e:
+        logger.error(f"Error extracting courses from URL: {e}")
+        if raise_errors:
+            raise
+        return []
+
+
+async def extract_courses_from_urls_async(urls, fetcher=None):
+    """
+    Extract courses from many posts concurrently
+
+    Returns:
+        dict: Courses for every URL (an empty list for posts that failed)
+    """
+    async def extract_all(f):
+        results = await asyncio.gather(*(extract_courses_from_url_async(url, fetcher=f) for url in urls))
+        return dict(zip(urls, results))
+
+    return await _with_fetcher(fetcher, extract_all)
@@ -0,0 +1,109 @@
+"""
+Registry of listing scraper backends, imported lazily by name
+
+Each backend is a ``module:function`` path to a ``function(limit)`` that
+returns coupon posts. Nothing is imported until a backend is first used, so
+a deployment that never picks the Selenium backend never loads selenium,
+webdriver_manager or Chrome.
+"""
+import importlib
+import logging
+import threading
+from utils.metrics import count_fallback
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+LISTING_BACKENDS = {
+    'api': 'scrapers.hacksnation:get_latest_coupon_posts_api',
+    'bs4': 'scrapers.hacksnation:get_latest_coupon_posts_bs4',
+    'selenium': 'scrapers.selenium_listing:get_latest_coupon_posts_selenium',
+}
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+class UnknownBackendError(Exception):
+    """Raised for a backend name that is not registered"""
+
+
+def load_target(target):
+    """Import the module of a ``module:attribute`` path and return the attribute"""
+    module_name, _, attribute = target.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def register_backend(name, target):
+    """
+    Register a listing backend
+
+    Args:
+        name (str): Name used in SCRAPER_BACKENDS
+        target (str): ``module:function`` path of the scraper function
+    """
+    with _lock:
+        LISTING_BACKENDS[name] = target
+        _loaded.pop(name, None)
+
+
+def get_backend(name):
+    """
+    Import a backend on first use and return its scraper function
+
+    Raises:
+        UnknownBackendError: If no backend is registered under the name
+    """
+    function = _loaded.get(name)
+    if function is not None:
+        return function
+
+    with _lock:
+        target = LISTING_BACKENDS.get(name)
+        if target is None:
+            raise UnknownBackendError(
+                f"Unknown scraper backend {name!r}; choose from {', '.join(sorted(LISTING_BACKENDS))}")
+        logger.info(f"Loading scraper backend {name} from {target}")
+        function = _loaded[name] = load_target(target)
+        return function
+
+
+def parse_backend_chain(spec):
+    """
+    Read a comma-separated list of backends, tried in order
+
+    Raises:
+        UnknownBackendError: If a name is not registered
+    """
+    names = [name.strip().lower() for name in (spec or '').split(',') if name.strip()]
+    for name in names:
+        if name not in LISTING_BACKENDS:
+            raise UnknownBackendError(
+                f"Unknown scraper backend {name!r}; choose from {', '.join(sorted(LISTING_BACKENDS))}")
+    return names
+
+
+def run_backend_chain(names, limit=5):
+    """
+    Scrape the listing with each backend in turn until one finds posts
+
+    Args:
+        names (list): Backend names in the order they are tried
+        limit (int): Number of coupon posts to return
+
+    Returns:
+        list: Posts from the first backend that found any, or an empty list
+    """
+    coupon_posts = []
+    previous = None
+    for name in names:
+        if previous:
+            logger.info(f"No coupons found with {previous}, trying {name}")
+            count_fallback(previous, name)
+        coupon_posts = get_backend(name)(limit)
+        logger.info(f"{name} backend found {len(coupon_posts)} coupon posts")
+        if coupon_posts:
+            break
+        previous = name
+
+    return coupon_posts
@@ -0,0 +1,234 @@
+"""
+Udemy coupon validity checker
+
+Looks up each coupon link's course id and asks Udemy's course landing API
+whether the coupon still applies. Checks run concurrently through a
+dedicated fetcher with its own per-host limits, and results are cached by
+(course slug, coupon code).
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import quote
+from scrapers.fetcher import Fetcher, HTTPStatusError
+from utils.course_identity import parse_coupon_url
+from utils.metrics import REGISTRY, timed
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+UDEMY_API_BASE = "https://www.udemy.com"
+
+VALID = 'valid'
+EXPIRED = 'expired'
+UNKNOWN = 'unknown'
+
+# Checker defaults
+DEFAULT_VALID_TTL = 900
+DEFAULT_EXPIRED_TTL = 6 * 3600  # An expired coupon does not come back
+DEFAULT_UNKNOWN_TTL = 60
+DEFAULT_COURSE_ID_TTL = 24 * 3600  # Ids of existing courses never change
+DEFAULT_MAX_WORKERS = 32
+DEFAULT_HOST_CONCURRENCY = 16
+DEFAULT_HOST_RATE = 50
+DEFAULT_HOST_BURST = 50
+DEFAULT_CACHE_SIZE = 50000
+
+COUPON_CHECKS = REGISTRY.counter(
+    'coupon_checks_total', 'Coupon validity checks by result and whether they were cached', ('status', 'cached'))
+
+
+class CouponChecker:
+    """
+    Concurrent, cached Udemy coupon validity checks
+
+    A check returns ``{'status': 'valid'|'expired'|'unknown', 'checked_at': ISO time}``.
+    Coupons that could not be checked (network errors, unexpected answers) are
+    'unknown' and cached only briefly.
+    """
+
+    def __init__(self, api_base=UDEMY_API_BASE, fetcher=None, valid_ttl=DEFAULT_VALID_TTL,
+                 expired_ttl=DEFAULT_EXPIRED_TTL, unknown_ttl=DEFAULT_UNKNOWN_TTL,
+                 max_workers=DEFAULT_MAX_WORKERS, host_concurrency=DEFAULT_HOST_CONCURRENCY,
+                 host_rate=DEFAULT_HOST_RATE, host_burst=DEFAULT_HOST_BURST,
+                 cache_size=DEFAULT_CACHE_SIZE, course_id_ttl=DEFAULT_COURSE_ID_TTL, clock=time.monotonic):
+        """
+        Args:
+            api_base (str): Scheme and host of the Udemy API
+            fetcher (Fetcher): HTTP client; by default one with its own host limits
+            valid_ttl (float): Seconds a 'valid' result is reused
+            expired_ttl (float): Seconds an 'expired' result is reused
+            unknown_ttl (float): Seconds an 'unknown' result is reused
+            max_workers (int): Threads checking coupons concurrently
+            host_concurrency (int): Requests in flight per host
+            host_rate (float): Requests per second per host
+            host_burst (int): Requests allowed in a burst per host
+            cache_size (int): Maximum number of cached results
+            course_id_ttl (float): Seconds a course id is reused; a removed
+                course is remembered for ``expired_ttl``
+            clock (callable): Monotonic time source
+        """
+        self.api_base = api_base.rstrip('/')
+        self.fetcher = fetcher or Fetcher(
+            retries=1, host_concurrency=host_concurrency, host_rate=host_rate, host_burst=host_burst)
+        self.ttls = {VALID: valid_ttl, EXPIRED: expired_ttl, UNKNOWN: unknown_ttl}
+        self.cache_size = cache_size
+        self.course_id_ttl = course_id_ttl
+        self._clock = clock
+        self._results = OrderedDict()  # (slug, code) -> (result, expires_at)
+        self._course_ids = OrderedDict()  # slug -> (course id or None for a removed course, expires_at)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='coupon-check')
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                return None
+            result, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._results[key]
+                return None
+            return result
+
+    def _store(self, key, result):
+        with self._lock:
+            self._results[key] = (result, self._clock() + self.ttls[result['status']])
+            self._results.move_to_end(key)
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+
+    def _get_json(self, url):
+        result = self.fetcher.fetch(url, headers={'Accept': 'application/json'}, conditional=False)
+        return json.loads(result.text)
+
+    def _course_id(self, slug):
+        """Course id for a slug, or None when the course no longer exists"""
+        with self._lock:
+            entry = self._course_ids.get(slug)
+            if entry is not None:
+                course_id, expires_at = entry
+                if self._clock() < expires_at:
+                    return course_id
+                del self._course_ids[slug]
+
+        try:
+            document = self._get_json(f"{self.api_base}/api-2.0/courses/{quote(slug)}/?fields[course]=id")
+            course_id = document['id']
+        except HTTPStatusError as e:
+            # 403 is how Udemy throttles and blocks bots, not a removed course
+            if e.status_code != 404:
+                raise
+            course_id = None
+
+        ttl = self.course_id_ttl if course_id is not None else self.ttls[EXPIRED]
+        with self._lock:
+            self._course_ids[slug] = (course_id, self._clock() + ttl)
+            self._course_ids.move_to_end(slug)
+            while len(self._course_ids) > self.cache_size:
+                self._course_ids.popitem(last=False)
+        return course_id
+
+    def _check_uncached(self, slug, code):
+        """Ask Udemy whether a coupon applies to a course"""
+        try:
+            course_id = self._course_id(slug)
+            if course_id is None:
+                return EXPIRED
+
+            document = self._get_json(
+                f"{self.api_base}/api-2.0/course-landing-components/{course_id}/me/"
+                f"?couponCode={quote(code)}&components=redeem_coupon")
+            attempts = ((document.get('redeem_coupon') or {}).get('discount_attempts')) or []
+            for attempt in attempts:
+                if (attempt.get('code') or '').upper() == code.upper():
+                    return VALID if attempt.get('status') == 'applied' else EXPIRED
+            # Udemy leaves codes it does not recognise out of the answer
+            return EXPIRED if 'redeem_coupon' in document else UNKNOWN
+
+        except Exception as e:
+            logger.warning(f"Could not check coupon {code} for {slug}: {e}")
+            return UNKNOWN
+
+    def _check_key(self, key):
+        status = self._check_uncached(*key)
+        result = {'status': status, 'checked_at': datetime.now(timezone.utc).isoformat(timespec='seconds')}
+        self._store(key, result)
+        COUPON_CHECKS.inc(status=status, cached='false')
+        return result
+
+    def check_many(self, urls):
+        """
+        Check many coupon links concurrently
+
+        Links sharing a (slug, coupon code) pair are checked once.
+
+        Args:
+            urls (iterable): Udemy coupon links
+
+        Returns:
+            dict: Result for every URL; URLs that are not coupon links are 'unknown'
+        """
+        urls = list(dict.fromkeys(urls))
+        keys = {url: parse_coupon_url(url) for url in urls}
+
+        results = {}
+        pending = []
+        for key in dict.fromkeys(key for key in keys.values() if key):
+            result = self._cached(key)
+            if result is None:
+                pending.append(key)
+            else:
+                results[key] = result
+                COUPON_CHECKS.inc(status=result['status'], cached='true')
+
+        if pending:
+            with timed('coupon_check'):
+                for key, result in zip(pending, self._executor.map(self._check_key, pending)):
+                    results[key] = result
+            logger.info(f"Checked {len(pending)} coupons ({len(results) - len(pending)} cached)")
+
+        return {
+            url: dict(results[key]) if key else {'status': UNKNOWN, 'checked_at': None}
+            for url, key in keys.items()
+        }
+
+    def peek_many(self, urls):
+        """
+        Return the cached results of coupon links without checking any
+
+        Returns:
+            dict: Result for every URL, or None where no result is cached
+        """
+        peeked = {}
+        for url in urls:
+            key = parse_coupon_url(url)
+            peeked[url] = self._cached(key) if key else {'status': UNKNOWN, 'checked_at': None}
+        return peeked
+
+    def check(self, url):
+        """Check a single coupon link"""
+        return self.check_many([url])[url]
+
+    def annotate(self, courses):
+        """
+        Attach coupon status to course dictionaries
+
+        Returns:
+            list: Copies of the courses with ``coupon_status`` and ``coupon_checked_at``
+        """
+        results = self.check_many(course['url'] for course in courses)
+        annotated = []
+        for course in courses:
+            result = results[course['url']]
+            annotated.append(dict(course, coupon_status=result['status'], coupon_checked_at=result['checked_at']))
+        return annotated
+
+    def stats(self):
+        """Return the number of cached results and course ids"""
+        with self._lock:
+            return {'cached_results': len(self._results), 'cached_course_ids': len(self._course_ids)}
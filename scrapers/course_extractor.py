@@ -2,18 +2,26 @@
 Course extractor module for HacksNation course pages
 """
 import logging
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from scrapers.fetcher import get_fetcher
+from utils.course_identity import canonical_course_url
+from utils.helpers import get_html_parser
+from utils.metrics import REGISTRY, count_fallback, timed
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def extract_courses_from_url(url):
+COURSE_LINKS = REGISTRY.counter(
+    'course_links_total', 'Course links extracted by the strategy that found them', ('strategy',))
+
+@timed('course_extract')
+def extract_courses_from_url(url, raise_errors=False):
     """
     Extract the list of Udemy courses with their enrollment links from a specific HacksNation URL
 
     Args:
         url (str): URL of the HacksNation page containing Udemy courses
+        raise_errors (bool): Re-raise fetch/parse errors instead of returning an empty list
 
     Returns:
         list: List of dictionaries containing course title and enrollment link
@@ -21,137 +29,125 @@ def extract_courses_from_url(url):
     try:
         logger.info(f"Extracting courses from URL: {url}")
 
-        # Send HTTP request to the URL
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-
-        logger.info(f"Response status: {response.status_code}")
-
-        # Parse HTML content
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Find all course items
-        courses = []
-        processed_urls = set()  # Để theo dõi các URL đã xử lý để tránh trùng lặp
-
-        # Look for specific pattern where each course is listed with "Enroll for Free" link
-        # This can be li elements containing both course name and enrollment link
-        list_items = soup.find_all(['li', 'p'])
-        logger.info(f"Found {len(list_items)} potential course containers")
-
-        for item in list_items:
-            # Find "Enroll for Free" link
-            enroll_link = item.find('a', string='Enroll for Free')
-
-            if enroll_link:
-                # Get the href attribute for enrollment
-                enrollment_url = enroll_link.get('href')
-
-                # Kiểm tra nếu URL này đã được xử lý
-                if enrollment_url in processed_urls:
-                    logger.info(f"Skipping duplicate URL: {enrollment_url}")
-                    continue
-
-                processed_urls.add(enrollment_url)
-
-                # Extract course name: it's the text content of the list item minus the "Enroll for Free" text
-                # Remove any trailing dash and spaces that might be present
-                full_text = item.get_text(strip=True)
-                course_name = full_text.replace('Enroll for Free', '').strip()
-                if course_name.endswith('–'):
-                    course_name = course_name[:-1].strip()
-
-                courses.append({
-                    'title': course_name,
-                    'url': enrollment_url
-                })
-                logger.info(f"Added course: {course_name}")
-
-        # If the above method didn't work, try an alternative approach
-        if not courses:
-            logger.info("No courses found with the first method, trying alternative method")
-
-            # Look for strong tags that might contain "Enroll for Free" links
-            strong_tags = soup.find_all('strong')
-
-            for strong in strong_tags:
-                enroll_link = strong.find('a', string='Enroll for Free')
-
-                if enroll_link:
-                    enrollment_url = enroll_link.get('href')
-
-                    # Kiểm tra nếu URL này đã được xử lý
-                    if enrollment_url in processed_urls:
-                        logger.info(f"Skipping duplicate URL: {enrollment_url}")
-                        continue
-
-                    processed_urls.add(enrollment_url)
-
-                    # Find the parent paragraph that contains the course name
-                    parent = strong.find_parent('p') or strong.find_parent('li')
-
-                    if parent:
-                        # Extract course name
-                        full_text = parent.get_text(strip=True)
-                        course_name = full_text.replace('Enroll for Free', '').strip()
-                        if course_name.endswith('–'):
-                            course_name = course_name[:-1].strip()
-
-                        courses.append({
-                            'title': course_name,
-                            'url': enrollment_url
-                        })
-                        logger.info(f"Added course (alt method): {course_name}")
-
-        # Try another approach to find more courses, not just when courses list is empty
-        logger.info("Trying direct link extraction for additional courses")
-
-        # Find all links on the page
-        all_links = soup.find_all('a')
-
-        for link in all_links:
-            # Check if the link is for Udemy enrollment
-            href = link.get('href', '')
-            if 'udemy.com/course' in href and 'couponCode=' in href:
-                # Kiểm tra nếu URL này đã được xử lý
-                if href in processed_urls:
-                    logger.info(f"Skipping duplicate URL: {href}")
-                    continue
-
-                processed_urls.add(href)
-
-                # Find parent element containing the course name
-                parent = link.find_parent('p') or link.find_parent('li')
-
-                if parent:
-                    course_name = parent.get_text(strip=True).replace('Enroll for Free', '').strip()
-                    if course_name.endswith('–'):
-                        course_name = course_name[:-1].strip()
-
-                    courses.append({
-                        'title': course_name,
-                        'url': href
-                    })
-                    logger.info(f"Added course (direct link method): {course_name}")
-
-        # Final check for duplicate titles (in rare cases, different URLs might point to same course)
-        unique_courses = []
-        seen_titles = set()
-
-        for course in courses:
-            # Chuẩn hóa tiêu đề để so sánh tốt hơn
-            normalized_title = course['title'].lower()
-
-            if normalized_title not in seen_titles:
-                seen_titles.add(normalized_title)
-                unique_courses.append(course)
-
-        logger.info(f"Total unique courses extracted: {len(unique_courses)} (from {len(courses)} total)")
-        return unique_courses
+        # Fetch through the shared session; an unchanged page reuses the last parse
+        courses = get_fetcher().fetch_parsed(url, parse_courses)
+        return [dict(course) for course in courses]
 
     except Exception as e:
         logger.error(f"Error extracting courses from URL: {e}")
-        return []
\ No newline at end of file
+        if raise_errors:
+            raise
+        return []
+
+# Text of the enrollment links in HacksNation posts
+ENROLL_TEXT = 'Enroll for Free'
+
+# Elements that hold a course title together with its enrollment link
+CONTAINER_TAGS = ('li', 'p')
+
+# Only these elements (and everything inside them) are kept when parsing
+COURSE_STRAINER = SoupStrainer(list(CONTAINER_TAGS) + ['strong', 'a'])
+
+def is_coupon_link(href):
+    """Check whether a link points to a Udemy course with a coupon code"""
+    return 'udemy.com/course' in href and 'couponCode=' in href
+
+def course_title(container):
+    """Course name of a container: its text minus the enrollment link and trailing dash"""
+    course_name = container.get_text(strip=True).replace(ENROLL_TEXT, '').strip()
+    if course_name.endswith('–'):
+        course_name = course_name[:-1].strip()
+    return course_name
+
+@timed('course_parse')
+def parse_courses(html):
+    """
+    Extract the list of Udemy courses with their enrollment links from page HTML
+
+    Only ``li``/``p`` containers and links are built into the tree, and the
+    links are visited once. Results are, in order:
+
+    1. every "Enroll for Free" link, titled by the outermost ``li``/``p``
+       for which it is the first such link;
+    2. every other Udemy coupon link, titled by its closest ``p`` (or ``li``).
+
+    When step 1 finds nothing, URLs of "Enroll for Free" links wrapped in
+    ``<strong>`` are not reused in step 2. Udemy links are rewritten to their
+    canonical URL first, so tracking parameters, ``http``/``www.`` variants
+    and affiliate redirects of one coupon count as duplicates. Duplicate URLs
+    and case-insensitively equal titles are dropped.
+
+    Args:
+        html (str): HTML of a HacksNation post
+
+    Returns:
+        list: List of dictionaries containing course title and enrollment link
+    """
+    soup = BeautifulSoup(html, get_html_parser(), parse_only=COURSE_STRAINER)
+
+    courses = []
+    enroll_urls = set()  # Để theo dõi các URL đã xử lý để tránh trùng lặp
+    strong_enroll_urls = set()
+    claimed = set()  # Elements whose first "Enroll for Free" link was already seen
+    coupon_links = {}  # First link for every coupon URL, in document order
+
+    for link in soup.find_all('a'):
+        href = link.get('href')
+        if href and 'udemy' in href:
+            href = canonical_course_url(href)
+
+        if link.string == ENROLL_TEXT:
+            containers = []
+            for parent in link.parents:
+                if parent.name == 'strong':
+                    if id(parent) not in claimed:
+                        strong_enroll_urls.add(href)
+                    claimed.add(id(parent))
+                elif parent.name in CONTAINER_TAGS:
+                    containers.append(parent)
+            unclaimed = [container for container in containers if id(container) not in claimed]
+            claimed.update(id(container) for container in containers)
+
+            if unclaimed:
+                if href in enroll_urls:
+                    logger.debug(f"Skipping duplicate URL: {href}")
+                else:
+                    enroll_urls.add(href)
+                    # The outermost container is listed last
+                    courses.append({'title': course_title(unclaimed[-1]), 'url': href})
+
+        if href and href not in coupon_links and is_coupon_link(href):
+            coupon_links[href] = link
+
+    logger.info(f"Found {len(courses)} courses with enrollment links")
+    enroll_count = len(courses)
+
+    # Coupon links that are not behind an "Enroll for Free" link
+    skip_urls = enroll_urls if courses else strong_enroll_urls
+    for href, link in coupon_links.items():
+        if href in skip_urls:
+            continue
+
+        parent = link.find_parent('p') or link.find_parent('li')
+        if parent:
+            courses.append({'title': course_title(parent), 'url': href})
+
+    COURSE_LINKS.inc(enroll_count, strategy='enroll_link')
+    COURSE_LINKS.inc(len(courses) - enroll_count, strategy='coupon_link')
+    if not enroll_count and courses:
+        count_fallback('enroll_link', 'coupon_link')
+
+    # Final check for duplicate titles (in rare cases, different URLs might point to same course)
+    unique_courses = []
+    seen_titles = set()
+
+    for course in courses:
+        # Chuẩn hóa tiêu đề để so sánh tốt hơn
+        normalized_title = course['title'].lower()
+
+        if normalized_title not in seen_titles:
+            seen_titles.add(normalized_title)
+            unique_courses.append(course)
+
+    logger.info(f"Total unique courses extracted: {len(unique_courses)} (from {len(courses)} total)")
+    return unique_courses
@@ -0,0 +1,413 @@
+"""
+Pool of long-lived headless Chrome sessions for the Selenium scraper
+"""
+import atexit
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+import config
+from utils.metrics import timed
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Default pool settings
+DEFAULT_MAX_SIZE = 2
+DEFAULT_MAX_USES = 50
+DEFAULT_CHECKOUT_TIMEOUT = 30
+
+# Requests blocked in fast-render mode: media, fonts, stylesheets and ad/analytics hosts
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot', '*.css',
+    '*.mp4', '*.webm', '*.mp3',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*adservice.google.*', '*facebook.net*',
+    '*hotjar.com*', '*cloudflareinsights.com*', '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+]
+
+# Counts the elements matching a selector and the milliseconds since the DOM last changed
+QUIESCENCE_SCRIPT = """
+if (!window.__quietObserver) {
+    window.__lastMutation = performance.now();
+    window.__quietObserver = new MutationObserver(function () {
+        window.__lastMutation = performance.now();
+    });
+    window.__quietObserver.observe(document.documentElement,
+        {childList: true, subtree: true, characterData: true});
+}
+return [document.querySelectorAll(arguments[0]).length, performance.now() - window.__lastMutation];
+"""
+
+# Bytes transferred for the document and its subresources
+TRANSFER_SIZE_SCRIPT = """
+return performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))
+    .reduce(function (total, entry) { return total + (entry.transferSize || 0); }, 0);
+"""
+
+
+class DriverPoolExhausted(Exception):
+    """Raised when no driver could be checked out before the timeout"""
+
+
+class ChromeDriverNotFound(Exception):
+    """Raised when no ChromeDriver binary is available without going online"""
+
+
+def _read_driver_cache(path):
+    """Remembered driver path and when it was resolved, or (None, None)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            cached = json.load(f)
+        if os.path.isfile(cached['path']):
+            return cached['path'], cached['resolved_at']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None, None
+
+
+def _write_driver_cache(path, driver_path):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'path': driver_path, 'resolved_at': time.time()}, f)
+    os.replace(temp_path, path)
+
+
+def resolve_chromedriver(explicit_path=None, cache_path=None, cache_ttl=None, offline=None):
+    """
+    Find the ChromeDriver binary, going to the network at most once per cache_ttl
+
+    In order: an explicit path; the path remembered in the cache file while it
+    is younger than ``cache_ttl``; in offline mode a remembered path of any
+    age or ``chromedriver`` on PATH; otherwise webdriver_manager, whose answer
+    is remembered for every process on the machine. When webdriver_manager
+    fails, a remembered path of any age is used.
+
+    Returns:
+        str: Path of the ChromeDriver binary
+
+    Raises:
+        ChromeDriverNotFound: In offline mode when no binary is known
+    """
+    explicit_path = config.CHROMEDRIVER_PATH if explicit_path is None else explicit_path
+    cache_path = cache_path or config.CHROMEDRIVER_CACHE_PATH
+    cache_ttl = config.CHROMEDRIVER_CACHE_TTL if cache_ttl is None else cache_ttl
+    offline = config.SELENIUM_OFFLINE if offline is None else offline
+
+    if explicit_path:
+        return explicit_path
+
+    cached_path, resolved_at = _read_driver_cache(cache_path)
+    if cached_path and (offline or time.time() - resolved_at < cache_ttl):
+        return cached_path
+
+    if offline:
+        path_binary = shutil.which('chromedriver')
+        if path_binary:
+            return path_binary
+        raise ChromeDriverNotFound(
+            "Offline mode: set CHROMEDRIVER_PATH or put chromedriver on PATH")
+
+    try:
+        # Imported here: webdriver_manager is only needed when resolving online
+        from webdriver_manager.chrome import ChromeDriverManager
+        driver_path = ChromeDriverManager().install()
+    except Exception as e:
+        if cached_path:
+            logger.warning(f"Could not refresh ChromeDriver ({e}), using {cached_path}")
+            return cached_path
+        raise
+
+    try:
+        _write_driver_cache(cache_path, driver_path)
+    except OSError as e:
+        logger.warning(f"Could not remember ChromeDriver path in {cache_path}: {e}")
+    return driver_path
+
+
+def build_chrome_options(fast_render=False):
+    """
+    Build the Chrome options used for every pooled session
+
+    Args:
+        fast_render (bool): Return from navigation at DOMContentLoaded and skip images
+    """
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")  # Run in headless mode
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    if fast_render:
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option(
+            'prefs', {'profile.managed_default_content_settings.images': 2})
+    return chrome_options
+
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """Block URL patterns for the whole session through the DevTools protocol"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+    except Exception as e:
+        logger.warning(f"Could not block resources for Chrome session: {e}")
+
+
+def wait_until_quiet(driver, selector, timeout=10, quiet_period=0.5, poll_interval=0.1):
+    """
+    Wait until ``selector`` matches at least one element and the DOM stops changing
+
+    Args:
+        driver (WebDriver): Driver with a page loaded
+        selector (str): CSS selector of the content that must be present
+        timeout (float): Maximum number of seconds to wait
+        quiet_period (float): Seconds without DOM mutations that count as settled
+        poll_interval (float): Seconds between checks
+
+    Returns:
+        bool: True if the page settled, False if the timeout was reached first
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        items, quiet_ms = driver.execute_script(QUIESCENCE_SCRIPT, selector)
+        if items and quiet_ms >= quiet_period * 1000:
+            logger.info(f"Page settled with {items} '{selector}' elements")
+            return True
+        if time.monotonic() >= deadline:
+            logger.warning(f"Page not settled after {timeout}s ({items} '{selector}' elements)")
+            return False
+        time.sleep(poll_interval)
+
+
+def page_transfer_size(driver):
+    """Bytes transferred for the current page, or None if the browser does not report it"""
+    try:
+        return int(driver.execute_script(TRANSFER_SIZE_SCRIPT))
+    except Exception:
+        return None
+
+
+class DriverPool:
+    """
+    Thread-safe pool of warm WebDriver sessions
+
+    Drivers are created lazily up to ``max_size``. A driver is health-checked
+    before it is handed out, recycled after ``max_uses`` checkouts and thrown
+    away when it stops responding. All drivers are quit when the process exits.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, max_uses=DEFAULT_MAX_USES,
+                 checkout_timeout=DEFAULT_CHECKOUT_TIMEOUT, driver_factory=None, fast_render=False):
+        """
+        Args:
+            max_size (int): Maximum number of Chrome sessions alive at once
+            max_uses (int): Number of checkouts after which a session is recycled
+            checkout_timeout (float): Seconds to wait for a free session
+            driver_factory (callable): Function returning a new WebDriver
+            fast_render (bool): Start sessions with the eager page-load strategy
+                and non-essential resources blocked
+        """
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.checkout_timeout = checkout_timeout
+        self.fast_render = fast_render
+        self._driver_factory = driver_factory or self._create_chrome_driver
+        self._driver_path = None
+        self._idle = []
+        self._live = set()  # every driver not yet quit, idle or checked out
+        self._uses = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _create_chrome_driver(self):
+        """Start a new headless Chrome, resolving the driver binary only once"""
+        if self._driver_path is None:
+            logger.info("Resolving ChromeDriver binary...")
+            with timed('chromedriver_install'):
+                self._driver_path = resolve_chromedriver()
+        logger.info("Starting new pooled Chrome session...")
+        service = Service(self._driver_path)
+        with timed('chrome_startup'):
+            driver = webdriver.Chrome(service=service, options=build_chrome_options(self.fast_render))
+        if self.fast_render:
+            block_resources(driver)
+        return driver
+
+    @staticmethod
+    def is_healthy(driver):
+        """Check that the browser session still answers commands"""
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, driver):
+        """Quit a driver once, ignoring errors from an already dead browser"""
+        with self._cond:
+            if driver not in self._live:
+                return
+            self._live.discard(driver)
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting Chrome session: {e}")
+
+    def acquire(self, timeout=None):
+        """
+        Check out a healthy driver, starting a new one if the pool has room
+
+        Args:
+            timeout (float): Seconds to wait for a free driver
+
+        Returns:
+            WebDriver: A driver that must be handed back with release()
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise DriverPoolExhausted("Driver pool has been shut down")
+
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DriverPoolExhausted(
+                            f"No Chrome session available after {timeout}s")
+                    self._cond.wait(remaining)
+                    if self._closed:
+                        raise DriverPoolExhausted("Driver pool has been shut down")
+
+                if self._idle:
+                    driver = self._idle.pop()
+                else:
+                    driver = None
+                    # Reserve the slot before starting Chrome outside the lock
+                    self._size += 1
+
+            if driver is None:
+                try:
+                    driver = self._driver_factory()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._live.add(driver)
+                    closed = self._closed
+                if closed:
+                    # shutdown() ran while Chrome was starting and did not see this driver
+                    self._discard(driver)
+                    raise DriverPoolExhausted("Driver pool has been shut down")
+                self._uses[id(driver)] = 0
+            elif not self.is_healthy(driver):
+                logger.info("Discarding crashed Chrome session")
+                self._discard(driver)
+                continue
+
+            self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+            return driver
+
+    def _discard(self, driver):
+        """Quit a driver and free its slot in the pool"""
+        self._quit(driver)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def release(self, driver, discard=False):
+        """
+        Return a driver to the pool
+
+        Args:
+            driver (WebDriver): Driver obtained from acquire()
+            discard (bool): Quit the driver instead of keeping it
+        """
+        uses = self._uses.get(id(driver), 0)
+        if discard or self._closed or uses >= self.max_uses:
+            if uses >= self.max_uses:
+                logger.info(f"Recycling Chrome session after {uses} uses")
+            self._discard(driver)
+            return
+
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Context manager that checks out a driver and always returns it"""
+        with timed('driver_checkout'):
+            driver = self.acquire(timeout)
+        try:
+            yield driver
+        except WebDriverException:
+            # The session may have crashed; only keep it if it still responds
+            self.release(driver, discard=not self.is_healthy(driver))
+            raise
+        except BaseException:
+            self.release(driver)
+            raise
+        else:
+            self.release(driver)
+
+    def shutdown(self):
+        """
+        Quit every driver and refuse further checkouts
+
+        Checked-out drivers are quit as well so that no Chrome outlives the
+        process; handing one back afterwards only frees its slot.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            checked_out = [driver for driver in self._live if driver not in idle]
+            self._cond.notify_all()
+
+        for driver in idle:
+            self._discard(driver)
+        for driver in checked_out:
+            self._quit(driver)
+        if idle or checked_out:
+            logger.info(f"Shut down {len(idle)} idle and {len(checked_out)} checked-out "
+                        f"pooled Chrome session(s)")
+
+    def stats(self):
+        """Return a snapshot of the pool state"""
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+                'closed': self._closed,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """Return the process-wide driver pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(fast_render=config.SELENIUM_FAST_RENDER)
+            atexit.register(_pool.shutdown)
+        return _pool
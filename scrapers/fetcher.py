@@ -0,0 +1,416 @@
+"""
+Shared HTTP fetch layer for all scrapers
+
+Provides one pooled requests session, per-host concurrency limits and token
+bucket rate limiting, retries with exponential backoff and jitter, and
+conditional GETs so that an unchanged page (HTTP 304) reuses the previously
+parsed result instead of being downloaded and parsed again. Fetched pages
+can be kept in a snapshot archive for offline re-parsing.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from snapshots import get_snapshot_archive
+from utils.metrics import REGISTRY, timed
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Fetch defaults
+DEFAULT_TIMEOUT = (5, 20)  # (connect, read) seconds
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 10
+DEFAULT_HOST_CONCURRENCY = 4
+DEFAULT_HOST_RATE = 5  # requests per second
+DEFAULT_HOST_BURST = 10
+DEFAULT_VALIDATOR_CACHE_SIZE = 1024
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+FETCH_ATTEMPTS = REGISTRY.counter(
+    'fetch_attempts_total', 'HTTP fetch attempts by outcome', ('outcome',))
+
+
+def _accept_encoding():
+    """Advertise brotli only when a decoder is installed"""
+    try:
+        import brotli  # noqa: F401
+        return 'gzip, deflate, br'
+    except ImportError:
+        pass
+    try:
+        import brotlicffi  # noqa: F401
+        return 'gzip, deflate, br'
+    except ImportError:
+        return 'gzip, deflate'
+
+
+class FetchError(Exception):
+    """Raised when a URL could not be fetched after all retries"""
+
+
+class HTTPStatusError(FetchError):
+    """Raised when a URL answers with an HTTP error status"""
+
+    def __init__(self, url, status_code):
+        kind = 'Client' if status_code < 500 else 'Server'
+        super().__init__(f"{status_code} {kind} Error for url: {url}")
+        self.url = url
+        self.status_code = status_code
+
+
+# Outcomes of a received response, see response_outcome()
+OK = 'ok'
+NOT_MODIFIED = 'not_modified'
+RETRY = 'retry'
+
+
+def response_outcome(url, status_code, validated=None):
+    """
+    Decide what a fetcher does with a response status
+
+    Args:
+        url (str): URL that was fetched
+        status_code (int): HTTP status of the response
+        validated (Validated): Validators sent with the request, if any
+
+    Returns:
+        str: NOT_MODIFIED, OK or RETRY
+
+    Raises:
+        HTTPStatusError: For an error status that retrying will not fix
+    """
+    if status_code == 304 and validated is not None:
+        FETCH_ATTEMPTS.inc(outcome='not_modified')
+        logger.info(f"Not modified: {url}")
+        return NOT_MODIFIED
+    if status_code in RETRY_STATUSES:
+        FETCH_ATTEMPTS.inc(outcome='retryable_status')
+        return RETRY
+    if status_code >= 400:
+        FETCH_ATTEMPTS.inc(outcome='http_error')
+        raise HTTPStatusError(url, status_code)
+    FETCH_ATTEMPTS.inc(outcome='ok')
+    return OK
+
+
+def backoff_delay(attempt, backoff, max_backoff, retry_after=None):
+    """
+    Exponential backoff with full jitter, honouring Retry-After
+
+    Args:
+        attempt (int): Zero-based number of the attempt that just failed
+        backoff (float): Base delay of the exponential backoff
+        max_backoff (float): Upper bound of a single delay
+        retry_after (str): Retry-After header of the failed response, if any
+
+    Returns:
+        float: Seconds to wait before the next attempt
+    """
+    delay = random.uniform(0, min(max_backoff, backoff * (2 ** attempt)))
+    if retry_after and retry_after.isdigit():
+        delay = min(max_backoff, max(delay, int(retry_after)))
+    return delay
+
+
+class TokenBucket:
+    """Token bucket rate limiter"""
+
+    def __init__(self, rate, burst):
+        """
+        Args:
+            rate (float): Tokens added per second
+            burst (int): Maximum number of tokens held
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token if one is available
+
+        Returns:
+            float: 0 when a token was taken, otherwise seconds until one is
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class _HostLimits:
+    """Concurrency and rate limits for a single host"""
+
+    def __init__(self, concurrency, rate, burst):
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst)
+
+
+class Validated:
+    """Validators and parsed results remembered for a URL"""
+    __slots__ = ('etag', 'last_modified', 'text', 'parsed')
+
+    def __init__(self, etag, last_modified, text):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.text = text
+        self.parsed = {}
+
+    def conditional_headers(self, headers):
+        """Add If-None-Match/If-Modified-Since to a copy of the request headers"""
+        headers = dict(headers)
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ValidatorStore:
+    """LRU of the validators and parsed results of recently fetched URLs"""
+
+    def __init__(self, size=DEFAULT_VALIDATOR_CACHE_SIZE):
+        """
+        Args:
+            size (int): URLs whose ETag/Last-Modified are remembered
+        """
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """Validators remembered for a URL, or None"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def store(self, url, headers, text):
+        """
+        Remember the validators of a downloaded page
+
+        A page without ETag and Last-Modified forgets anything remembered
+        for its URL.
+
+        Returns:
+            Validated: The new entry, or None
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        with self._lock:
+            if not etag and not last_modified:
+                self._entries.pop(url, None)
+                return None
+            entry = self._entries[url] = Validated(etag, last_modified, text)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+            return entry
+
+    def previous_parse(self, url, key):
+        """
+        Parse remembered for an unchanged page
+
+        Returns:
+            tuple: (True, result) when known, otherwise (False, None)
+        """
+        entry = self.get(url)
+        if entry is not None and key in entry.parsed:
+            return True, entry.parsed[key]
+        return False, None
+
+    def remember_parse(self, url, key, parsed):
+        """Keep a parse for as long as the page's validators are remembered"""
+        entry = self.get(url)
+        if entry is not None:
+            entry.parsed[key] = parsed
+
+
+def parser_key(parser, key=None):
+    """Name under which a parser's results are remembered"""
+    return key or getattr(parser, '__qualname__', repr(parser))
+
+
+class FetchResult:
+    """Outcome of a fetch"""
+
+    def __init__(self, url, status_code, text, headers, not_modified=False):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+        self.not_modified = not_modified
+
+
+class Fetcher:
+    """Polite, pooled HTTP client shared by the scrapers"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 max_backoff=DEFAULT_MAX_BACKOFF, host_concurrency=DEFAULT_HOST_CONCURRENCY,
+                 host_rate=DEFAULT_HOST_RATE, host_burst=DEFAULT_HOST_BURST,
+                 validator_cache_size=DEFAULT_VALIDATOR_CACHE_SIZE, archive=None):
+        """
+        Args:
+            archive (SnapshotArchive): Where every downloaded page is archived, if anywhere
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.host_concurrency = host_concurrency
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.validator_cache_size = validator_cache_size
+        self.archive = archive
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(host_concurrency * 2, 10))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': _accept_encoding(),
+        })
+
+        self._hosts = {}
+        self._validators = ValidatorStore(validator_cache_size)
+        self._lock = threading.Lock()
+
+    def _limits_for(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            limits = self._hosts.get(host)
+            if limits is None:
+                limits = self._hosts[host] = _HostLimits(
+                    self.host_concurrency, self.host_rate, self.host_burst)
+            return limits
+
+    def _archive_page(self, url, response):
+        try:
+            self.archive.record(url, response.text, response.headers, response.status_code)
+        except Exception as e:
+            logger.warning(f"Could not archive {url}: {e}")
+
+    def fetch(self, url, headers=None, conditional=True):
+        """
+        GET a URL through the shared session
+
+        Args:
+            url (str): URL to fetch
+            headers (dict): Extra request headers
+            conditional (bool): Send If-None-Match/If-Modified-Since when known
+
+        Returns:
+            FetchResult: Response text and status; ``not_modified`` is True on a 304
+
+        Raises:
+            HTTPStatusError: On a client error status such as 404
+            FetchError: When every attempt failed
+        """
+        request_headers = dict(headers or {})
+        validated = self._validators.get(url) if conditional else None
+        if validated is not None:
+            request_headers = validated.conditional_headers(request_headers)
+
+        limits = self._limits_for(url)
+        last_error = None
+
+        for attempt in range(self.retries + 1):
+            limits.bucket.acquire()
+            response = None
+            try:
+                with limits.semaphore, timed('http_fetch'):
+                    response = self.session.get(url, headers=request_headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                FETCH_ATTEMPTS.inc(outcome='error')
+                last_error = e
+                logger.warning(f"Fetch of {url} failed (attempt {attempt + 1}): {e}")
+            else:
+                outcome = response_outcome(url, response.status_code, validated)
+                if outcome == NOT_MODIFIED:
+                    return FetchResult(url, 304, validated.text, response.headers, not_modified=True)
+
+                if outcome == OK:
+                    if conditional:
+                        self._validators.store(url, response.headers, response.text)
+                    if self.archive is not None:
+                        self._archive_page(url, response)
+                    return FetchResult(url, response.status_code, response.text, response.headers)
+
+                last_error = HTTPStatusError(url, response.status_code)
+                logger.warning(f"Fetch of {url} returned {response.status_code} (attempt {attempt + 1})")
+
+            if attempt < self.retries:
+                retry_after = response.headers.get('Retry-After') if response is not None else None
+                time.sleep(backoff_delay(attempt, self.backoff, self.max_backoff, retry_after))
+
+        raise FetchError(f"Giving up on {url} after {self.retries + 1} attempts: {last_error}")
+
+    def fetch_parsed(self, url, parser, key=None, headers=None):
+        """
+        Fetch a URL and parse it, reusing the previous parse on a 304
+
+        Args:
+            url (str): URL to fetch
+            parser (callable): Function turning the response text into a result
+            key (str): Name under which the parsed result is remembered
+            headers (dict): Extra request headers
+
+        Returns:
+            The parser's result
+        """
+        key = parser_key(parser, key)
+        result = self.fetch(url, headers=headers)
+
+        if result.not_modified:
+            found, parsed = self._validators.previous_parse(url, key)
+            if found:
+                return parsed
+
+        parsed = parser(result.text)
+        self._validators.remember_parse(url, key, parsed)
+        return parsed
+
+    def fetch_json(self, url, headers=None):
+        """Fetch a URL and decode its JSON body, reusing the decode on a 304"""
+        request_headers = {'Accept': 'application/json'}
+        request_headers.update(headers or {})
+        return self.fetch_parsed(url, json.loads, key='json', headers=request_headers)
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Return the process-wide fetcher, creating it on first use"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = Fetcher(archive=get_snapshot_archive())
+        return _fetcher
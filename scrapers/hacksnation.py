@@ -3,228 +3,243 @@ Scraper module for HacksNation coupon posts
 """
 import logging
 import re
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import requests
+from urllib.parse import parse_qs, urlencode, urljoin, urlsplit
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from scrapers.backends import run_backend_chain
+from scrapers.fetcher import get_fetcher
 from utils.helpers import month_to_num
+from utils.metrics import timed
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # URL to scrape
+HACKSNATION_BASE_URL = "https://hacksnation.com"
 HACKSNATION_URL = "https://hacksnation.com/t/free-coupons"
 
-def get_latest_coupon_posts(limit=5, use_selenium=False):
+# Flarum JSON:API discussion feed for the free coupons tag
+HACKSNATION_TAG = "free-coupons"
+FLARUM_PAGE_SIZE = 20
+FLARUM_MAX_PAGES = 5
+
+# A listing link is a coupon post when its title contains one of these. The
+# API feed and the rendered discussion list only hold discussion titles; the
+# static HTML page also has navigation and tag links, so it only keeps 'udemy'
+COUPON_TITLE_KEYWORDS = ('udemy', 'course', 'coupon')
+HTML_COUPON_TITLE_KEYWORDS = ('udemy',)
+
+def get_latest_coupon_posts(limit=5, use_selenium=False, use_api=False):
     """
     Scrape the HacksNation free coupons page and extract the latest coupon posts
 
     Args:
         limit (int): Number of coupon posts to return
         use_selenium (bool): Whether to use Selenium for handling AJAX content
+        use_api (bool): Whether to read the Flarum JSON API instead of the HTML page
 
     Returns:
         list: List of dictionaries containing title and url of the latest posts
     """
+    if use_api:
+        return get_latest_coupon_posts_api(limit)
     if use_selenium:
-        return get_latest_coupon_posts_selenium(limit)
+        # Selenium is only imported when it is actually used; BS4 takes over when it finds nothing
+        return run_backend_chain(['selenium', 'bs4'], limit)
     else:
         return get_latest_coupon_posts_bs4(limit)
 
-def get_latest_coupon_posts_bs4(limit=5):
-    """Use BeautifulSoup to scrape the static HTML content"""
+def make_coupon_post(title, href, current_year):
+    """
+    Build a coupon post dictionary, reading the date from a "for <day> <Month> <year>" title
+
+    Returns:
+        dict: The post, or None if it is dated in another year
+    """
+    coupon_data = {
+        'title': title,
+        'url': href
+    }
+
+    date_match = re.search(r'for\s+(\d+)\s+([A-Za-z]+)\s+(\d{4})', title)
+    if date_match:
+        year = int(date_match.group(3))
+        # Only keep posts from current year
+        if year != current_year:
+            return None
+        coupon_data['day'] = int(date_match.group(1))
+        coupon_data['month'] = date_match.group(2)
+        coupon_data['year'] = year
+
+    return coupon_data
+
+def is_coupon_title(title, keywords=COUPON_TITLE_KEYWORDS):
+    """Whether a listing title looks like a Udemy coupon post"""
+    lowered = title.lower()
+    return any(keyword in lowered for keyword in keywords)
+
+def sort_posts_newest_first(coupon_posts):
+    """Sort coupon posts by the date in their titles, newest first; undated posts go last"""
+    coupon_posts.sort(key=lambda x: (x.get('year', 0), month_to_num(x.get('month', '')), x.get('day', 0)), reverse=True)
+    return coupon_posts
+
+def parse_listing_links(links, current_year, base_url, label, keywords=COUPON_TITLE_KEYWORDS):
+    """
+    Turn the links of a rendered or static listing page into coupon posts
+
+    Args:
+        links (list): ``<a>`` tags of the listing
+        current_year (int): Year whose dated posts are kept
+        base_url (str): URL relative links are resolved against
+        label (str): Scraper name used in log messages
+        keywords (tuple): Words of which a coupon post title contains at least one
+
+    Returns:
+        list: Coupon post dictionaries sorted newest first
+    """
+    coupon_posts = []
+    for link in links:
+        href = link.get('href')
+        title = link.get_text(strip=True)
+
+        if href and is_coupon_title(title, keywords):
+            logger.info(f"{label} Found potential coupon: {title}")
+            coupon_data = make_coupon_post(title, urljoin(base_url, href), current_year)
+            if coupon_data:
+                coupon_posts.append(coupon_data)
+
+    logger.info(f"{label} Total coupons found: {len(coupon_posts)}")
+    return sort_posts_newest_first(coupon_posts)
+
+def flarum_discussions_url(offset=0, page_size=FLARUM_PAGE_SIZE, base_url=None, tag=None):
+    """URL of one page of the tag's discussion feed, newest first"""
+    query = urlencode({
+        'filter[tag]': tag or HACKSNATION_TAG,
+        'sort': '-createdAt',
+        'page[offset]': offset,
+        'page[limit]': page_size,
+    })
+    return f"{base_url or HACKSNATION_BASE_URL}/api/discussions?{query}"
+
+def parse_flarum_discussions(document, current_year, base_url=None):
+    """Map a Flarum discussions document to coupon post dictionaries"""
+    base_url = base_url or HACKSNATION_BASE_URL
+    coupon_posts = []
+    for item in document.get('data') or []:
+        if item.get('type') != 'discussions':
+            continue
+        attributes = item.get('attributes') or {}
+        title = (attributes.get('title') or '').strip()
+
+        if title and is_coupon_title(title):
+            slug = attributes.get('slug')
+            href = f"{base_url}/d/{item['id']}-{slug}" if slug else f"{base_url}/d/{item['id']}"
+            coupon_data = make_coupon_post(title, href, current_year)
+            if coupon_data:
+                coupon_posts.append(coupon_data)
+    return coupon_posts
+
+@timed('listing_api')
+def get_latest_coupon_posts_api(limit=5, max_pages=FLARUM_MAX_PAGES, base_url=None, tag=None):
+    """
+    Read the tag's discussion feed from the Flarum JSON API, without a browser
+
+    The first page tells us the page size used by the forum; when more posts
+    are needed the remaining pages are fetched concurrently by offset.
+
+    Args:
+        limit (int): Number of coupon posts to return
+        max_pages (int): Maximum number of feed pages to read
+        base_url (str): Forum address; HacksNation by default
+        tag (str): Tag slug of the coupon posts; HacksNation's free coupons by default
+    """
     try:
-        # Send HTTP request to the website
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(HACKSNATION_URL, headers=headers)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-
-        logger.info(f"BS4 Response status: {response.status_code}")
-
-        # Parse HTML content
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Find all link elements that might contain coupon posts
-        coupon_posts = []
-        links = soup.find_all('a')
-
-        logger.info(f"BS4 Found {len(links)} links on the page")
-
-        # Current date for filtering relevant posts
-        current_date = datetime.now()
-        current_year = current_date.year
-
-        # Process each link
-        for link in links:
-            href = link.get('href')
-            title = link.get_text(strip=True)
-
-            # Check if it's a Udemy coupon post by title pattern
-            if href and ('Udemy Free' in title or 'Udemy Courses' in title or 'udemy' in title.lower()):
-                logger.info(f"BS4 Found potential coupon: {title}")
-
-                # Make URL absolute if it's relative
-                if not href.startswith(('http://', 'https://')):
-                    href = f"https://hacksnation.com{href}"
-
-                # Extract date from title if possible
-                date_match = re.search(r'for\s+(\d+)\s+([A-Za-z]+)\s+(\d{4})', title)
-
-                # Add to list with date info if available
-                coupon_data = {
-                    'title': title,
-                    'url': href
-                }
-
-                if date_match:
-                    day = int(date_match.group(1))
-                    month = date_match.group(2)
-                    year = int(date_match.group(3))
-
-                    # Only add posts from current year
-                    if year == current_year:
-                        coupon_data['day'] = day
-                        coupon_data['month'] = month
-                        coupon_data['year'] = year
-                        coupon_posts.append(coupon_data)
-                        logger.info(f"BS4 Added coupon with date: {title}")
-                else:
-                    # If no date in title, still add it
-                    coupon_posts.append(coupon_data)
-                    logger.info(f"BS4 Added coupon without date: {title}")
-
-        logger.info(f"BS4 Total coupons found: {len(coupon_posts)}")
-
-        # Sort by most recent (assuming higher day value is more recent within same month)
-        coupon_posts.sort(key=lambda x: (x.get('year', 0), month_to_num(x.get('month', '')), x.get('day', 0)), reverse=True)
+        fetcher = get_fetcher()
+        current_year = datetime.now().year
+
+        first_page = fetcher.fetch_json(flarum_discussions_url(base_url=base_url, tag=tag))
+        coupon_posts = parse_flarum_discussions(first_page, current_year, base_url)
+        logger.info(f"API Found {len(coupon_posts)} coupons on the first page")
+
+        next_link = (first_page.get('links') or {}).get('next')
+        if next_link and max_pages > 1 and (not limit or len(coupon_posts) < limit):
+            # Follow page[offset] links concurrently instead of one after another
+            next_query = parse_qs(urlsplit(next_link).query)
+            step = int(next_query.get('page[offset]', [FLARUM_PAGE_SIZE])[0]) or FLARUM_PAGE_SIZE
+            page_size = int(next_query.get('page[limit]', [step])[0])
+            urls = [flarum_discussions_url(step * page, page_size, base_url, tag) for page in range(1, max_pages)]
+
+            with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+                futures = [(page_url, executor.submit(fetcher.fetch_json, page_url)) for page_url in urls]
+                for page_url, future in futures:
+                    # A failed page only loses its own posts
+                    try:
+                        document = future.result()
+                    except Exception as e:
+                        logger.warning(f"Skipping Flarum API page {page_url}: {e}")
+                        continue
+                    coupon_posts.extend(parse_flarum_discussions(document, current_year, base_url))
+
+        # Drop posts seen twice when the feed shifted between page requests
+        coupon_posts = list({post['url']: post for post in coupon_posts}.values())
+        logger.info(f"API Total coupons found: {len(coupon_posts)}")
+
+        # Sort by most recent date
+        sort_posts_newest_first(coupon_posts)
 
-        # Return the specified number of latest posts
         result = coupon_posts[:limit] if limit else coupon_posts
-        logger.info(f"BS4 Returning {len(result)} coupons")
-        return result
+        logger.info(f"API Returning {len(result)} coupons")
+        return [dict(post) for post in result]
 
     except Exception as e:
-        logger.error(f"Error scraping HacksNation with BS4: {e}")
+        logger.error(f"Error reading Flarum API of {base_url or HACKSNATION_BASE_URL}: {e}")
         return []
 
-def get_latest_coupon_posts_selenium(limit=5):
-    """Use Selenium to scrape dynamically loaded content"""
-    try:
-        logger.info("Starting Selenium scraping...")
-
-        # Setup Chrome options
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")  # Run in headless mode
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-
-        # Initialize Chrome driver
-        logger.info("Initializing Chrome driver...")
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-
-        # Navigate to the URL
-        logger.info(f"Navigating to {HACKSNATION_URL}...")
-        driver.get(HACKSNATION_URL)
-
-        # Wait for the page to load (adjust timeout as needed)
-        logger.info("Waiting for page to load...")
-        wait = WebDriverWait(driver, 10)
-        wait.until(EC.presence_of_element_located((By.TAG_NAME, "a")))
-
-        # Allow time for AJAX content to load
-        logger.info("Waiting for AJAX content...")
-        time.sleep(3)
-
-        # Get the page source after JavaScript execution
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-
-        # Find all links
-        links = soup.find_all('a')
-        logger.info(f"Selenium Found {len(links)} links on the page")
-
-        coupon_posts = []
-
-        # Current date for filtering relevant posts
-        current_date = datetime.now()
-        current_year = current_date.year
-
-        # Add a more specific selector for discussion items if we can identify them
-        discussion_links = soup.select('a.PostItem-title')
-        if discussion_links:
-            logger.info(f"Selenium Found {len(discussion_links)} discussion links")
-            links = discussion_links
-
-        # Process each link
-        for link in links:
-            href = link.get('href')
-            title = link.get_text(strip=True)
-
-            # Check if it's a Udemy coupon post by title pattern with more relaxed criteria
-            if href and ('udemy' in title.lower() or 'course' in title.lower() or 'coupon' in title.lower()):
-                logger.info(f"Selenium Found potential coupon: {title}")
-
-                # Make URL absolute if it's relative
-                if not href.startswith(('http://', 'https://')):
-                    href = f"https://hacksnation.com{href}"
-
-                # Extract date from title if possible
-                date_match = re.search(r'for\s+(\d+)\s+([A-Za-z]+)\s+(\d{4})', title)
-
-                # Add to list with date info if available
-                coupon_data = {
-                    'title': title,
-                    'url': href
-                }
-
-                if date_match:
-                    day = int(date_match.group(1))
-                    month = date_match.group(2)
-                    year = int(date_match.group(3))
-
-                    # Only add posts from current year
-                    if year == current_year:
-                        coupon_data['day'] = day
-                        coupon_data['month'] = month
-                        coupon_data['year'] = year
-                        coupon_posts.append(coupon_data)
-                        logger.info(f"Selenium Added coupon with date: {title}")
-                else:
-                    # If no date in title, still add it
-                    coupon_posts.append(coupon_data)
-                    logger.info(f"Selenium Added coupon without date: {title}")
-
-        # Close the driver
-        driver.quit()
-
-        logger.info(f"Selenium Total coupons found: {len(coupon_posts)}")
-
-        # If no coupons found with Selenium, try a more general approach
-        if not coupon_posts:
-            logger.info("No coupons found with specific selectors, trying general approach")
-            # Try BS4 as fallback
-            return get_latest_coupon_posts_bs4(limit)
+@timed('listing_bs4')
+def get_latest_coupon_posts_bs4(limit=5, url=None):
+    """
+    Use BeautifulSoup to scrape the static HTML content
 
-        # Sort by most recent date
-        coupon_posts.sort(key=lambda x: (x.get('year', 0), month_to_num(x.get('month', '')), x.get('day', 0)), reverse=True)
+    Args:
+        limit (int): Number of coupon posts to return
+        url (str): Listing page to read; the HacksNation free coupons page by default
+    """
+    url = url or HACKSNATION_URL
+    try:
+        # Fetch through the shared session; an unchanged page reuses the last parse
+        coupon_posts = get_fetcher().fetch_parsed(
+            url, lambda html: parse_coupon_posts_bs4(html, base_url=url), key='parse_coupon_posts_bs4')
 
         # Return the specified number of latest posts
         result = coupon_posts[:limit] if limit else coupon_posts
-        logger.info(f"Selenium Returning {len(result)} coupons")
-        return result
+        logger.info(f"BS4 Returning {len(result)} coupons")
+        return [dict(post) for post in result]
 
     except Exception as e:
-        logger.error(f"Error scraping HacksNation with Selenium: {e}")
-        # Fallback to BS4 if Selenium fails
-        logger.info("Falling back to BS4 scraping method")
-        return get_latest_coupon_posts_bs4(limit)
\ No newline at end of file
+        logger.error(f"Error scraping {url} with BS4: {e}")
+        return []
+
+@timed('listing_parse_bs4')
+def parse_coupon_posts_bs4(html, current_year=None, base_url=None):
+    """
+    Parse the static HTML of the listing page into coupon posts
+
+    Args:
+        html (str): HTML of the HacksNation listing page
+        current_year (int): Year whose posts are kept; this year by default
+        base_url (str): URL relative links are resolved against; HacksNation by default
+
+    Returns:
+        list: Coupon post dictionaries sorted newest first
+    """
+    # Parse HTML content
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Find all link elements that might contain coupon posts
+    links = soup.find_all('a')
+    logger.info(f"BS4 Found {len(links)} links on the page")
+
+    # Current date for filtering relevant posts
+    current_year = current_year or datetime.now().year
+    return parse_listing_links(links, current_year, base_url or HACKSNATION_URL, 'BS4', HTML_COUPON_TITLE_KEYWORDS)
@@ -0,0 +1,101 @@
+"""
+Selenium backend for the HacksNation listing
+
+Kept apart from hacksnation.py so that selenium, webdriver_manager and the
+driver pool are only imported when this backend is chosen (see backends.py).
+"""
+import logging
+import time
+from datetime import datetime
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+import config
+from scrapers import hacksnation
+from scrapers.driver_pool import get_driver_pool, page_transfer_size, wait_until_quiet
+from utils.metrics import REGISTRY, timed
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Discussion titles whose presence means the listing has rendered
+RENDER_READY_SELECTOR = '.PostItem-title, .DiscussionListItem-title'
+
+PAGE_TRANSFER_BYTES = REGISTRY.histogram(
+    'selenium_page_transfer_bytes', 'Bytes transferred per Selenium page load', ('mode',),
+    buckets=(50e3, 100e3, 250e3, 500e3, 1e6, 2.5e6, 5e6, 10e6))
+
+@timed('listing_selenium')
+def get_latest_coupon_posts_selenium(limit=5):
+    """
+    Use Selenium to scrape dynamically loaded content
+
+    Returns an empty list when the page has no coupon posts or Selenium
+    fails; falling back to another backend is left to run_backend_chain().
+    """
+    try:
+        logger.info("Starting Selenium scraping...")
+
+        # Check out a warm Chrome session from the shared pool
+        logger.info("Checking out Chrome driver from pool...")
+        pool = get_driver_pool()
+        with pool.driver() as driver:
+            # Navigate to the URL
+            logger.info(f"Navigating to {hacksnation.HACKSNATION_URL}...")
+            with timed('selenium_navigate'):
+                driver.get(hacksnation.HACKSNATION_URL)
+
+            if pool.fast_render:
+                # Wait for the discussion list to render and settle instead of sleeping
+                logger.info("Waiting for discussion list to render...")
+                with timed('selenium_wait_render'):
+                    wait_until_quiet(driver, RENDER_READY_SELECTOR,
+                                     timeout=config.SELENIUM_READY_TIMEOUT,
+                                     quiet_period=config.SELENIUM_QUIET_PERIOD)
+            else:
+                # Wait for the page to load (adjust timeout as needed)
+                logger.info("Waiting for page to load...")
+                with timed('selenium_wait_page'):
+                    wait = WebDriverWait(driver, 10)
+                    wait.until(EC.presence_of_element_located((By.TAG_NAME, "a")))
+
+                # Allow time for AJAX content to load
+                logger.info("Waiting for AJAX content...")
+                with timed('selenium_wait_ajax'):
+                    time.sleep(3)
+
+            transferred = page_transfer_size(driver)
+            if transferred is not None:
+                PAGE_TRANSFER_BYTES.observe(transferred, mode='fast' if pool.fast_render else 'full')
+
+            # Get the page source after JavaScript execution
+            page_source = driver.page_source
+
+        with timed('listing_parse_selenium'):
+            soup = BeautifulSoup(page_source, 'html.parser')
+
+        # Find all links
+        links = soup.find_all('a')
+        logger.info(f"Selenium Found {len(links)} links on the page")
+
+        # Current date for filtering relevant posts
+        current_year = datetime.now().year
+
+        # Add a more specific selector for discussion items if we can identify them
+        discussion_links = soup.select('a.PostItem-title')
+        if discussion_links:
+            logger.info(f"Selenium Found {len(discussion_links)} discussion links")
+            links = discussion_links
+
+        coupon_posts = hacksnation.parse_listing_links(links, current_year, hacksnation.HACKSNATION_URL, 'Selenium')
+
+        # Return the specified number of latest posts
+        result = coupon_posts[:limit] if limit else coupon_posts
+        logger.info(f"Selenium Returning {len(result)} coupons")
+        return result
+
+    except Exception as e:
+        logger.error(f"Error scraping HacksNation with Selenium: {e}")
+        # The next backend of the chain (run_backend_chain) takes over
+        return []
\ No newline at end of file
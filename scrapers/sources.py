@@ -0,0 +1,315 @@
+"""
+Pluggable coupon listing sources and the concurrent fan-out across them
+
+A source is anything with a ``fetch_posts(limit)`` method returning coupon
+post dictionaries. HacksNation is one source; other Flarum forums and static
+HTML listings can be added through the LISTING_SOURCES setting, and custom
+classes by their ``module:Class`` path. All sources are queried at once, each
+with its own timeout, and their posts are merged into one feed ranked by the
+date in their titles.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from urllib.parse import urlsplit
+import config
+from scrapers import hacksnation
+from scrapers.backends import UnknownBackendError, load_target, parse_backend_chain, run_backend_chain
+from utils.metrics import REGISTRY, timed
+from utils.singleflight import normalize_scrape_key
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SOURCE_TYPES = {
+    'hacksnation': 'scrapers.sources:HacksNationSource',
+    'flarum': 'scrapers.sources:FlarumSource',
+    'html': 'scrapers.sources:HtmlListingSource',
+}
+
+DEFAULT_SOURCE_TIMEOUT = 30
+
+SOURCE_RESULTS = REGISTRY.counter(
+    'listing_source_results_total', 'Listing source fetches by outcome', ('source', 'outcome'))
+
+
+class ListingSource:
+    """
+    A site listing Udemy coupon posts
+
+    Subclasses implement fetch_posts(). Posts are dictionaries with title and
+    url, plus day, month and year when the title carries a date.
+    """
+
+    def __init__(self, name, timeout=DEFAULT_SOURCE_TIMEOUT):
+        """
+        Args:
+            name (str): Unique name, recorded on every post as ``source``
+            timeout (float): Seconds the feed waits for this source
+        """
+        if not isinstance(name, str) or not name:
+            raise ValueError(f"name must be a non-empty string, got {name!r}")
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise ValueError(f"timeout must be a positive number of seconds, got {timeout!r}")
+        self.name = name
+        self.timeout = timeout
+
+    @property
+    def hosts(self):
+        """Hosts whose post pages courses may be extracted from"""
+        return set()
+
+    def fetch_posts(self, limit):
+        """Return up to ``limit`` coupon posts, newest first"""
+        raise NotImplementedError
+
+
+def _host(url):
+    return (urlsplit(url).hostname or '').lower()
+
+
+def _http_url(option, value):
+    """Check that an option is an http(s) URL with a host and return it"""
+    if not isinstance(value, str) or urlsplit(value).scheme not in ('http', 'https') or not _host(value):
+        raise ValueError(f"{option} must be an http(s) URL, got {value!r}")
+    return value
+
+
+class HacksNationSource(ListingSource):
+    """HacksNation's free coupons tag, read with the SCRAPER_BACKENDS chain"""
+
+    def __init__(self, name='hacksnation', timeout=DEFAULT_SOURCE_TIMEOUT, backends=None):
+        """
+        Args:
+            backends (str): Comma-separated backends tried in order; SCRAPER_BACKENDS by default
+        """
+        super().__init__(name, timeout)
+        if backends is not None and not isinstance(backends, str):
+            raise ValueError(f"backends must be a comma-separated string, got {backends!r}")
+        try:
+            self.backends = parse_backend_chain(backends or config.SCRAPER_BACKENDS)
+        except UnknownBackendError as e:
+            raise ValueError(str(e)) from e
+        if not self.backends:
+            raise ValueError(f"backends names no scraper backend: {backends!r}")
+
+    @property
+    def hosts(self):
+        return {_host(hacksnation.HACKSNATION_BASE_URL)}
+
+    def fetch_posts(self, limit):
+        return run_backend_chain(self.backends, limit)
+
+
+class FlarumSource(ListingSource):
+    """A tag of any Flarum forum, read from its JSON API"""
+
+    def __init__(self, name, base_url, tag, timeout=DEFAULT_SOURCE_TIMEOUT,
+                 max_pages=hacksnation.FLARUM_MAX_PAGES):
+        """
+        Args:
+            base_url (str): Forum address, e.g. https://forum.example.com
+            tag (str): Slug of the tag holding the coupon posts
+            max_pages (int): Maximum number of feed pages to read
+        """
+        super().__init__(name, timeout)
+        if not isinstance(tag, str) or not tag:
+            raise ValueError(f"tag must be a non-empty string, got {tag!r}")
+        if isinstance(max_pages, bool) or not isinstance(max_pages, int) or max_pages < 1:
+            raise ValueError(f"max_pages must be a positive integer, got {max_pages!r}")
+        self.base_url = _http_url('base_url', base_url).rstrip('/')
+        self.tag = tag
+        self.max_pages = max_pages
+
+    @property
+    def hosts(self):
+        return {_host(self.base_url)}
+
+    def fetch_posts(self, limit):
+        return hacksnation.get_latest_coupon_posts_api(limit, self.max_pages, base_url=self.base_url, tag=self.tag)
+
+
+class HtmlListingSource(ListingSource):
+    """A static HTML page linking to coupon posts"""
+
+    def __init__(self, name, url, timeout=DEFAULT_SOURCE_TIMEOUT):
+        """
+        Args:
+            url (str): Listing page address
+        """
+        super().__init__(name, timeout)
+        self.url = _http_url('url', url)
+
+    @property
+    def hosts(self):
+        return {_host(self.url)}
+
+    def fetch_posts(self, limit):
+        return hacksnation.get_latest_coupon_posts_bs4(limit, url=self.url)
+
+
+def build_sources(spec, default_timeout=DEFAULT_SOURCE_TIMEOUT):
+    """
+    Create the listing sources described by a JSON list
+
+    Each entry has a ``type`` (hacksnation, flarum, html or a ``module:Class``
+    path) and the keyword arguments of that class, e.g.
+    ``[{"type": "hacksnation"}, {"type": "flarum", "name": "other",
+    "base_url": "https://forum.example.com", "tag": "udemy"}]``.
+
+    Raises:
+        ValueError: For malformed entries, unknown types, classes that are not
+            ListingSource subclasses, invalid options or duplicate names
+    """
+    entries = json.loads(spec) if isinstance(spec, str) else spec
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("LISTING_SOURCES must be a non-empty JSON list")
+
+    sources = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError(f"Listing source entries must be JSON objects, got {entry!r}")
+        options = dict(entry)
+        source_type = options.pop('type', None)
+        target = None
+        if isinstance(source_type, str):
+            target = SOURCE_TYPES.get(source_type) or (source_type if ':' in source_type else None)
+        if target is None:
+            raise ValueError(f"Unknown listing source type {source_type!r}; "
+                             f"use one of {', '.join(sorted(SOURCE_TYPES))} or module:Class")
+
+        try:
+            source_class = load_target(target)
+        except (ImportError, AttributeError) as e:
+            raise ValueError(f"Cannot load listing source {target!r}: {e}") from e
+        # Only ListingSource classes are built, not any callable named in the setting
+        if not (isinstance(source_class, type) and issubclass(source_class, ListingSource)):
+            raise ValueError(f"Listing source {target!r} is not a ListingSource subclass")
+
+        options.setdefault('timeout', default_timeout)
+        try:
+            sources.append(source_class(**options))
+        except (TypeError, ValueError, AttributeError, UnknownBackendError) as e:
+            # Custom classes may not check their options as the built-in ones do
+            raise ValueError(f"Invalid options for listing source {source_type!r}: {e}") from e
+
+    names = [source.name for source in sources]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Listing source names must be unique: {names}")
+    return sources
+
+
+def merge_posts(results, limit=None):
+    """
+    Merge the posts of several sources into one feed
+
+    A post listed by more than one source is kept once, from the first
+    source. Posts are ranked by the date in their title; posts of the same
+    day keep the order of their sources.
+
+    Args:
+        results (list): (source name, posts) pairs in priority order
+        limit (int): Maximum number of posts to return
+
+    Returns:
+        list: Post dictionaries with a ``source`` key, newest first
+    """
+    merged = {}
+    for name, posts in results:
+        for post in posts:
+            key = normalize_scrape_key(post['url'])
+            if key not in merged:
+                merged[key] = dict(post, source=name)
+
+    feed = hacksnation.sort_posts_newest_first(list(merged.values()))
+    return feed[:limit] if limit else feed
+
+
+class SourceFanout:
+    """
+    Query every listing source concurrently and merge their posts
+
+    A source that does not answer within its timeout contributes the posts
+    of its last completed fetch, if any. Its call keeps running in the
+    background and later requests join it instead of starting another, so a
+    hung site never uses up the pool.
+    """
+
+    def __init__(self, sources, max_workers=None):
+        """
+        Args:
+            sources (list): ListingSource instances in priority order
+            max_workers (int): Threads running source fetches
+        """
+        self.sources = list(sources)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or max(4, 2 * len(self.sources)), thread_name_prefix='listing-source')
+        self._inflight = {}
+        self._last_posts = {}
+        self._lock = threading.Lock()
+
+    @property
+    def hosts(self):
+        """Hosts of every source"""
+        return set().union(*(source.hosts for source in self.sources))
+
+    def _fetch_source(self, source, limit):
+        with timed(f"source_{source.name}"):
+            posts = source.fetch_posts(limit)
+        if posts:
+            self._last_posts[(source.name, limit)] = posts
+        return posts
+
+    def _submit(self, source, limit):
+        """Start a fetch of a source, or join the one still running"""
+        key = (source.name, limit)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None or future.done():
+                future = self._inflight[key] = self._executor.submit(self._fetch_source, source, limit)
+            return future
+
+    def fetch(self, limit=5):
+        """
+        Fetch every source and return the merged feed
+
+        Returns:
+            list: At most ``limit`` posts, newest first
+        """
+        started = time.monotonic()
+        futures = [(source, self._submit(source, limit)) for source in self.sources]
+
+        results = []
+        for source, future in futures:
+            remaining = source.timeout - (time.monotonic() - started)
+            try:
+                posts = future.result(timeout=max(remaining, 0))
+            except FutureTimeout:
+                SOURCE_RESULTS.inc(source=source.name, outcome='timeout')
+                logger.warning(f"Listing source {source.name} did not answer within {source.timeout}s")
+                posts = self._last_posts.get((source.name, limit))
+                if posts:
+                    results.append((source.name, posts))
+                continue
+            except Exception as e:
+                SOURCE_RESULTS.inc(source=source.name, outcome='error')
+                logger.error(f"Listing source {source.name} failed: {e}")
+                continue
+
+            SOURCE_RESULTS.inc(source=source.name, outcome='ok' if posts else 'empty')
+            logger.info(f"Listing source {source.name} returned {len(posts)} posts")
+            results.append((source.name, posts))
+
+        return merge_posts(results, limit)
+
+    def stats(self):
+        """Return the configured sources and whether a fetch of each is running"""
+        with self._lock:
+            running = {name for (name, _), future in self._inflight.items() if not future.done()}
+        return [
+            {'name': source.name, 'type': type(source).__name__, 'timeout': source.timeout,
+             'running': source.name in running}
+            for source in self.sources
+        ]
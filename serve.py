@@ -0,0 +1,156 @@
+"""
+Production entry point for Udemy Coupon Finder
+
+Serves the Flask app with gunicorn (threaded workers) on Linux/macOS, or
+with waitress where gunicorn is not available (e.g. Windows). Workers,
+threads, timeouts and the bind address come from config.py. SIGTERM and
+SIGINT shut down gracefully: requests in progress are allowed to finish
+and the background scheduler is stopped.
+
+    python serve.py
+"""
+import logging
+import os
+import signal
+import threading
+import time
+import config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def post_worker_init(worker):
+    """Start the background refresh in the worker that wins the scheduler lock"""
+    from app import start_background_refresh
+    start_background_refresh()
+    close_live_feed_on_shutdown(worker)
+
+
+def close_live_feed_on_shutdown(worker):
+    """
+    End the worker's live-feed streams as soon as it starts shutting down
+
+    gunicorn calls worker_exit only after the graceful wait for running
+    requests, which open /api/events streams would stretch to the full
+    graceful timeout. The hub is closed on SIGTERM instead, and when the
+    worker stops itself after max_requests (which sends no signal).
+    """
+    from app import event_hub
+    handle_exit = worker.handle_exit
+
+    def close_hub():
+        # Not called from the signal handler itself, which must not wait on the hub's lock
+        threading.Thread(target=event_hub.close, name='live-feed-close', daemon=True).start()
+
+    def handle_exit_and_close(sig, frame):
+        close_hub()
+        handle_exit(sig, frame)
+
+    def watch_worker():
+        while worker.alive:
+            time.sleep(0.5)
+        close_hub()
+
+    # init_signals() registered the bound handle_exit before this hook runs
+    signal.signal(signal.SIGTERM, handle_exit_and_close)
+    threading.Thread(target=watch_worker, name='live-feed-watch', daemon=True).start()
+
+
+def worker_exit(server, worker):
+    """Stop the scheduler so the next worker can take it over"""
+    from app import stop_background_refresh
+    stop_background_refresh()
+
+
+def gunicorn_options():
+    """gunicorn settings built from config.py"""
+    return {
+        'bind': config.WEB_BIND,
+        'workers': config.WEB_WORKERS,
+        'worker_class': 'gthread',
+        'threads': config.WEB_THREADS,
+        'timeout': config.WEB_TIMEOUT,
+        'graceful_timeout': config.WEB_GRACEFUL_TIMEOUT,
+        'keepalive': config.WEB_KEEPALIVE,
+        'backlog': config.WEB_BACKLOG,
+        'max_requests': config.WEB_MAX_REQUESTS,
+        'max_requests_jitter': config.WEB_MAX_REQUESTS // 10,
+        'accesslog': '-',
+        'post_worker_init': post_worker_init,
+        'worker_exit': worker_exit,
+    }
+
+
+def run_gunicorn():
+    from gunicorn.app.base import BaseApplication
+
+    class CouponApplication(BaseApplication):
+        """Runs the app without a separate gunicorn config file"""
+
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # Imported in each worker after the fork, so no connections or
+            # threads are shared between processes
+            from app import app
+            return app
+
+    logger.info(f"Serving with gunicorn on {config.WEB_BIND} "
+                f"({config.WEB_WORKERS} workers x {config.WEB_THREADS} threads)")
+    CouponApplication(gunicorn_options()).run()
+
+
+def run_waitress():
+    from waitress import create_server
+    from app import app, start_background_refresh, stop_background_refresh
+
+    server = create_server(
+        app,
+        listen=config.WEB_BIND,
+        threads=config.WEB_THREADS,
+        channel_timeout=config.WEB_TIMEOUT,
+        backlog=config.WEB_BACKLOG,
+    )
+
+    def shutdown(signum, frame):
+        logger.info("Shutting down...")
+        # waitress stops its serving loop and lets running requests finish
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+
+    start_background_refresh()
+    logger.info(f"Serving with waitress on {config.WEB_BIND} ({config.WEB_THREADS} threads)")
+    try:
+        server.run()
+    finally:
+        stop_background_refresh()
+
+
+def main():
+    server = config.WEB_SERVER
+    if server == 'auto':
+        try:
+            import gunicorn  # noqa: F401
+            server = 'gunicorn' if os.name != 'nt' else 'waitress'
+        except ImportError:
+            server = 'waitress'
+
+    if server == 'gunicorn':
+        run_gunicorn()
+    elif server == 'waitress':
+        run_waitress()
+    else:
+        raise SystemExit(f"Unknown WEB_SERVER {server!r}; use auto, gunicorn or waitress")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+Compressed, content-addressed archive of every page the scrapers fetch
+
+Bodies are stored once per SHA-256 as gzip files under ``objects/``; an
+SQLite index records which URL returned which body, when, and with which
+headers. Refetching an unchanged page only moves its ``last_fetched_at``.
+The archive lets reparse.py re-run the extractors over past pages without
+touching the network.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+INDEX_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    status INTEGER,
+    headers TEXT,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_url ON snapshots (url, fetched_at);
+CREATE INDEX IF NOT EXISTS idx_snapshots_fetched ON snapshots (fetched_at);
+'''
+
+
+def blob_path(root, sha256):
+    """Path of the compressed body with the given hash"""
+    return os.path.join(root, 'objects', sha256[:2], f"{sha256}.gz")
+
+
+def load_blob(root, sha256):
+    """
+    Read an archived body
+
+    A plain function of the archive directory so that worker processes can
+    read bodies without opening the index.
+
+    Returns:
+        str: The decompressed body
+    """
+    with open(blob_path(root, sha256), 'rb') as f:
+        return gzip.decompress(f.read()).decode('utf-8')
+
+
+class SnapshotArchive:
+    """
+    Archive of fetched pages in a directory
+
+    Safe to share between threads and between processes using the same
+    directory: bodies are written atomically and the index is SQLite in WAL mode.
+    """
+
+    def __init__(self, root):
+        """
+        Args:
+            root (str): Archive directory, created when missing
+        """
+        self.root = root
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        with self.connection as connection:
+            connection.executescript(INDEX_SCHEMA)
+
+    @property
+    def connection(self):
+        """Index connection for the current thread"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(os.path.join(self.root, 'index.db'), timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _write_blob(self, sha256, data):
+        """Store a body unless it is already archived; returns its compressed size"""
+        path = blob_path(self.root, sha256)
+        if os.path.exists(path):
+            return os.path.getsize(path)
+
+        compressed = gzip.compress(data, compresslevel=6, mtime=0)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compressed)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return len(compressed)
+
+    def record(self, url, text, headers=None, status=200, fetched_at=None):
+        """
+        Archive one fetched page
+
+        Args:
+            url (str): URL that was fetched
+            text (str): Response body
+            headers (Mapping): Response headers
+            status (int): HTTP status code
+            fetched_at (float): Unix time of the fetch; now when omitted
+
+        Returns:
+            str: SHA-256 of the body
+        """
+        fetched_at = fetched_at or time.time()
+        data = text.encode('utf-8')
+        sha256 = hashlib.sha256(data).hexdigest()
+        stored_size = self._write_blob(sha256, data)
+
+        with self._write_lock, self.connection as connection:
+            latest = connection.execute(
+                'SELECT id, sha256 FROM snapshots WHERE url = ? ORDER BY fetched_at DESC LIMIT 1', (url,)
+            ).fetchone()
+            if latest is not None and latest['sha256'] == sha256:
+                connection.execute('UPDATE snapshots SET last_fetched_at = ? WHERE id = ?', (fetched_at, latest['id']))
+            else:
+                connection.execute(
+                    'INSERT INTO snapshots (url, sha256, status, headers, size, stored_size, fetched_at, last_fetched_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (url, sha256, status, json.dumps(dict(headers or {})), len(data), stored_size, fetched_at, fetched_at)
+                )
+        return sha256
+
+    def read(self, sha256):
+        """Return an archived body by hash"""
+        return load_blob(self.root, sha256)
+
+    def select(self, url_contains=None, since=None, until=None, latest_only=True):
+        """
+        List archived snapshots, oldest first
+
+        Args:
+            url_contains (str): Only URLs containing this text
+            since (float): Only snapshots fetched at or after this Unix time
+            until (float): Only snapshots fetched before this Unix time
+            latest_only (bool): Only the newest matching snapshot of each URL
+
+        Returns:
+            list: Dictionaries with url, sha256, status and fetched_at
+        """
+        conditions, params = [], []
+        if url_contains:
+            conditions.append("instr(url, ?) > 0")
+            params.append(url_contains)
+        if since is not None:
+            conditions.append('fetched_at >= ?')
+            params.append(since)
+        if until is not None:
+            conditions.append('fetched_at < ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        if latest_only:
+            # SQLite takes the bare columns from the row holding MAX(fetched_at)
+            query = (f"SELECT url, sha256, status, MAX(fetched_at) AS fetched_at FROM snapshots {where} "
+                     f"GROUP BY url ORDER BY fetched_at")
+        else:
+            query = f"SELECT url, sha256, status, fetched_at FROM snapshots {where} ORDER BY fetched_at"
+        return [dict(row) for row in self.connection.execute(query, params)]
+
+    def stats(self):
+        """Return the number of snapshots, URLs and bodies and their sizes"""
+        connection = self.connection
+        snapshots, urls = connection.execute('SELECT COUNT(*), COUNT(DISTINCT url) FROM snapshots').fetchone()
+        blobs, size, stored_size = connection.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) '
+            'FROM (SELECT size, stored_size FROM snapshots GROUP BY sha256)'
+        ).fetchone()
+        return {
+            'snapshots': snapshots,
+            'urls': urls,
+            'blobs': blobs,
+            'bytes': size,
+            'stored_bytes': stored_size,
+        }
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_snapshot_archive():
+    """Return the process-wide archive, or None when archiving is disabled"""
+    global _archive
+    if not config.SNAPSHOT_ARCHIVE_ENABLED:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = SnapshotArchive(config.SNAPSHOT_ARCHIVE_PATH)
+        return _archive
@@ -23,66 +23,165 @@ document.addEventListener('DOMContentLoaded', function () {
   // Pagination state
   let currentPage = 1;
   let itemsPerPage = parseInt(perPageSelect.value);
-  let allCourses = [];
+  let allCourses = []; // Trang khóa học hiện tại do server trả về
+  let courseTotal = 0; // Tổng số khóa học của bài đăng hiện tại
+  let currentUrl = '';
+  let courseRequest = 0; // Bỏ qua các phản hồi trang khóa học đã cũ
   let filteredCourses = []; // Thêm cho chức năng tìm kiếm
   let isReverseSorted = true; // Default is reversed (newest first)
   let searchTerm = ''; // Thêm cho chức năng tìm kiếm
+  let searchTotal = 0; // Tổng số kết quả tìm kiếm trên server
+  let searchTimer = null;
+  let searchRequest = 0; // Bỏ qua các phản hồi tìm kiếm đã cũ
+  // Mã khóa học mới nhất đã thấy ở lần truy cập trước (null nếu là lần đầu)
+  const lastVisitCursor = localStorage.getItem('courseCursor');
 
   // Function to display a specific page of courses
-  function displayPage(page, courses = null) {
-    courseList.innerHTML = '';
+  function displayPage(page) {
+    // Khi tìm kiếm, filteredCourses chỉ chứa trang hiện tại do server trả về
+    if (searchTerm) {
+      renderCourses(filteredCourses, (page - 1) * itemsPerPage, searchTotal);
+      return;
+    }
+
+    // allCourses chỉ chứa trang hiện tại; server đã phân trang và sắp xếp
+    renderCourses(allCourses, (page - 1) * itemsPerPage, courseTotal);
+  }
+
+  // Nhãn trạng thái coupon (valid/expired/unknown) do server kiểm tra
+  const couponBadges = {
+    valid: ['Còn hiệu lực', 'bg-green-100 text-green-800'],
+    expired: ['Hết hạn', 'bg-red-100 text-red-800'],
+    unknown: ['Chưa rõ', 'bg-gray-100 text-gray-600']
+  };
+
+  // Function to build a small badge; text and tooltip are set as plain text
+  function createBadge(text, colors, tooltip) {
+    const badge = document.createElement('span');
+    badge.className = `ml-2 text-xs px-2 py-0.5 rounded-full ${colors}`;
+    badge.textContent = text;
+    if (tooltip) badge.setAttribute('title', tooltip);
+    return badge;
+  }
+
+  function couponBadge(course) {
+    const badge = couponBadges[course.coupon_status];
+    if (!badge) return null;
+    const checkedAt = course.coupon_checked_at ? `Kiểm tra lúc ${new Date(course.coupon_checked_at).toLocaleString()}` : '';
+    return createBadge(badge[0], badge[1], checkedAt);
+  }
 
-    // Sử dụng danh sách đã lọc nếu đang tìm kiếm, nếu không thì dùng tất cả
-    const displayCourses = courses || (searchTerm ? filteredCourses : allCourses);
+  // Nhãn khóa học mới kể từ lần truy cập trước, hoặc đã đăng trong bài khác
+  function historyBadge(course) {
+    if (course.is_new) {
+      return createBadge('Mới', 'bg-blue-100 text-blue-800');
+    }
+    if (course.repeat) {
+      const count = course.post_count ? `Có trong ${course.post_count} bài đăng` : '';
+      return createBadge('Đã đăng trước đó', 'bg-yellow-100 text-yellow-800', count);
+    }
+    return null;
+  }
+
+  // Chỉ nhận liên kết http(s); trả về null cho javascript:, data:, ...
+  function safeHref(url) {
+    if (typeof url !== 'string' || !url) return null;
+    try {
+      const parsed = new URL(url, window.location.href);
+      return parsed.protocol === 'http:' || parsed.protocol === 'https:' ? parsed.href : null;
+    } catch (error) {
+      return null;
+    }
+  }
 
-    // Calculate start and end indices
-    const startIndex = (page - 1) * itemsPerPage;
-    const endIndex = Math.min(startIndex + itemsPerPage, displayCourses.length);
+  // Function to write a title into an element, highlighting the search words
+  function setHighlightedText(element, text, highlightRegex) {
+    if (!highlightRegex) {
+      element.textContent = text;
+      return;
+    }
+    let last = 0;
+    for (const match of text.matchAll(highlightRegex)) {
+      if (!match[0]) continue;
+      element.appendChild(document.createTextNode(text.slice(last, match.index)));
+      const mark = document.createElement('span');
+      mark.className = 'highlight';
+      mark.textContent = match[0];
+      element.appendChild(mark);
+      last = match.index + match[0].length;
+    }
+    element.appendChild(document.createTextNode(text.slice(last)));
+  }
+
+  const enrollIcon = `
+                    <svg xmlns="http://www.w3.org/2000/svg" class="h-4 w-4 mr-1" fill="none" viewBox="0 0 24 24" stroke="currentColor">
+                        <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M15 15l-2 5L9 9l11 4-5 2zm0 0l5 5M7.188 2.239l.777 2.897M5.136 7.965l-2.898-.777M13.95 4.05l-2.122 2.122m-5.657 5.656l-2.12 2.122" />
+                    </svg>`;
+
+  // Function to render one page of courses
+  function renderCourses(pageCourses, startIndex, total) {
+    courseList.innerHTML = '';
 
     // Update the showing info
-    showingFrom.textContent = displayCourses.length > 0 ? startIndex + 1 : 0;
-    showingTo.textContent = endIndex;
-    totalItems.textContent = displayCourses.length;
+    showingFrom.textContent = pageCourses.length > 0 ? startIndex + 1 : 0;
+    showingTo.textContent = startIndex + pageCourses.length;
+    totalItems.textContent = total;
 
-    // Display courses for current page
-    for (let i = startIndex; i < endIndex; i++) {
-      const course = displayCourses[i];
+    // Tạo regex để highlight từng từ tìm kiếm (case insensitive)
+    const searchWords = searchTerm.split(/\s+/).filter(Boolean)
+      .map(word => word.replace(/[.*+?^${}()|[\]\\]/g, '\\$&'));
+    const highlightRegex = searchWords.length > 0 ? new RegExp(searchWords.join('|'), 'gi') : null;
+
+    // Display courses for current page; server data only goes in as text and attributes
+    for (const course of pageCourses) {
       const courseItem = document.createElement('div');
       courseItem.className = 'p-4 hover:bg-gray-50 transition-colors';
 
+      const header = document.createElement('div');
+      header.className = 'mb-2';
+      const heading = document.createElement('h3');
+      heading.className = 'font-medium text-gray-800';
       // Highlight search term in course title if searching
-      let title = course.title;
-      if (searchTerm) {
-        // Tạo regex để highlight tất cả kết quả (case insensitive)
-        const regex = new RegExp(searchTerm.replace(/[.*+?^${}()|[\]\\]/g, '\\$&'), 'gi');
-        title = title.replace(regex, match => `<span class="highlight">${match}</span>`);
+      setHighlightedText(heading, String(course.title || ''), highlightRegex);
+      for (const badge of [historyBadge(course), couponBadge(course)]) {
+        if (badge) heading.appendChild(badge);
+      }
+      header.appendChild(heading);
+      courseItem.appendChild(header);
+
+      const href = safeHref(course.url);
+      if (href) {
+        const link = document.createElement('a');
+        link.setAttribute('href', href);
+        link.setAttribute('target', '_blank');
+        link.setAttribute('rel', 'noopener noreferrer');
+        link.className = 'inline-flex items-center text-sm px-3 py-1.5 bg-primary hover:bg-blue-600 text-white rounded-md transition-colors';
+        link.innerHTML = enrollIcon;
+        link.appendChild(document.createTextNode('Đăng ký miễn phí'));
+        courseItem.appendChild(link);
       }
-
-      courseItem.innerHTML = `
-                <div class="mb-2">
-                    <h3 class="font-medium text-gray-800">${title}</h3>
-                </div>
-                <a href="${course.url}" target="_blank"
-                   class="inline-flex items-center text-sm px-3 py-1.5 bg-primary hover:bg-blue-600 text-white rounded-md transition-colors">
-                    <svg xmlns="http://www.w3.org/2000/svg" class="h-4 w-4 mr-1" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                        <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M15 15l-2 5L9 9l11 4-5 2zm0 0l5 5M7.188 2.239l.777 2.897M5.136 7.965l-2.898-.777M13.95 4.05l-2.122 2.122m-5.657 5.656l-2.12 2.122" />
-                    </svg>
-                    Đăng ký miễn phí
-                </a>
-            `;
       courseList.appendChild(courseItem);
     }
 
     // Update pagination controls
-    updatePaginationControls(displayCourses);
+    updatePaginationControls(total);
+  }
+
+  // Function to go to a page, asking the server for it
+  function goToPage(page) {
+    currentPage = page;
+    if (searchTerm) {
+      fetchSearchPage(page);
+    } else if (currentUrl) {
+      fetchCoursePage(page).catch(showExtractError);
+    }
   }
 
   // Function to update pagination controls
-  function updatePaginationControls(courses) {
+  function updatePaginationControls(total) {
     paginationControls.innerHTML = '';
 
-    const displayCourses = courses || (searchTerm ? filteredCourses : allCourses);
-    const totalPages = Math.ceil(displayCourses.length / itemsPerPage);
+    const totalPages = Math.ceil(total / itemsPerPage);
 
     // Previous button
     const prevBtn = document.createElement('button');
@@ -92,8 +191,7 @@ document.addEventListener('DOMContentLoaded', function () {
     prevBtn.disabled = currentPage === 1;
     prevBtn.addEventListener('click', () => {
       if (currentPage > 1) {
-        currentPage--;
-        displayPage(currentPage);
+        goToPage(currentPage - 1);
       }
     });
     paginationControls.appendChild(prevBtn);
@@ -113,10 +211,7 @@ document.addEventListener('DOMContentLoaded', function () {
       const firstBtn = document.createElement('button');
       firstBtn.textContent = '1';
       firstBtn.className = 'px-3 py-1 mx-1 border border-gray-300 rounded-md hover:bg-gray-100';
-      firstBtn.addEventListener('click', () => {
-        currentPage = 1;
-        displayPage(currentPage);
-      });
+      firstBtn.addEventListener('click', () => goToPage(1));
       paginationControls.appendChild(firstBtn);
 
       // Ellipsis if there's a gap
@@ -137,10 +232,7 @@ document.addEventListener('DOMContentLoaded', function () {
       } else {
         pageBtn.className = 'px-3 py-1 mx-1 border border-gray-300 rounded-md hover:bg-gray-100';
       }
-      pageBtn.addEventListener('click', () => {
-        currentPage = i;
-        displayPage(currentPage);
-      });
+      pageBtn.addEventListener('click', () => goToPage(i));
       paginationControls.appendChild(pageBtn);
     }
 
@@ -157,10 +249,7 @@ document.addEventListener('DOMContentLoaded', function () {
       const lastBtn = document.createElement('button');
       lastBtn.textContent = totalPages;
       lastBtn.className = 'px-3 py-1 mx-1 border border-gray-300 rounded-md hover:bg-gray-100';
-      lastBtn.addEventListener('click', () => {
-        currentPage = totalPages;
-        displayPage(currentPage);
-      });
+      lastBtn.addEventListener('click', () => goToPage(totalPages));
       paginationControls.appendChild(lastBtn);
     }
 
@@ -172,8 +261,7 @@ document.addEventListener('DOMContentLoaded', function () {
     nextBtn.disabled = currentPage === totalPages || totalPages === 0;
     nextBtn.addEventListener('click', () => {
       if (currentPage < totalPages) {
-        currentPage++;
-        displayPage(currentPage);
+        goToPage(currentPage + 1);
       }
     });
     paginationControls.appendChild(nextBtn);
@@ -182,42 +270,126 @@ document.addEventListener('DOMContentLoaded', function () {
   // Function to toggle sort order
   function toggleSortOrder() {
     isReverseSorted = !isReverseSorted;
-    allCourses.reverse();
     if (searchTerm) {
       filteredCourses.reverse();
+      displayPage(currentPage);
+    } else {
+      goToPage(1);
     }
-    currentPage = 1;
-    displayPage(currentPage);
     sortToggleBtn.textContent = isReverseSorted ? 'Show Oldest First' : 'Show Newest First';
   }
 
-  // Function to search courses
+  // Function to leave search mode and show the extracted courses again
+  function resetSearch() {
+    clearTimeout(searchTimer);
+    searchRequest++;
+    searchTerm = '';
+    searchTotal = 0;
+    filteredCourses = [];
+    searchResults.textContent = '';
+    if (currentUrl) {
+      goToPage(1);
+    } else {
+      resultsDiv.style.display = 'none';
+    }
+  }
+
+  // Function to fetch one page of search results from the server
+  function fetchSearchPage(page) {
+    const requestId = ++searchRequest;
+    const query = encodeURIComponent(searchTerm);
+
+    fetch(`/api/search?q=${query}&page=${page}&per_page=${itemsPerPage}`)
+      .then(response => response.json())
+      .then(data => {
+        // Một tìm kiếm mới hơn đã bắt đầu
+        if (requestId !== searchRequest) return;
+
+        filteredCourses = data.results || [];
+        searchTotal = data.total || 0;
+
+        // Update search results count
+        if (searchTotal > 0) {
+          searchResults.textContent = `Tìm thấy ${searchTotal} khóa học phù hợp với "${searchTerm}"`;
+        } else {
+          searchResults.textContent = `Không tìm thấy khóa học nào phù hợp với "${searchTerm}"`;
+        }
+
+        resultsDiv.style.display = 'block';
+        courseCount.textContent = searchTotal;
+        currentPage = page;
+        displayPage(currentPage);
+      })
+      .catch(error => {
+        if (requestId !== searchRequest) return;
+        searchResults.textContent = `Lỗi khi tìm kiếm: ${error.message}`;
+      });
+  }
+
+  // Function to search courses across every extracted post
   function searchCourses(term) {
+    clearTimeout(searchTimer);
     searchTerm = term.trim().toLowerCase();
 
     if (searchTerm === '') {
-      filteredCourses = [];
-      searchResults.textContent = '';
-      currentPage = 1;
-      displayPage(currentPage);
+      courseCount.textContent = courseTotal;
+      resetSearch();
       return;
     }
 
-    // Filter courses based on search term
-    filteredCourses = allCourses.filter(course =>
-      course.title.toLowerCase().includes(searchTerm)
-    );
+    // Chờ người dùng ngừng gõ trước khi gửi yêu cầu
+    searchTimer = setTimeout(() => fetchSearchPage(1), 250);
+  }
 
-    // Update search results count
-    if (filteredCourses.length > 0) {
-      searchResults.textContent = `Tìm thấy ${filteredCourses.length} khóa học phù hợp với "${searchTerm}"`;
-    } else {
-      searchResults.textContent = `Không tìm thấy khóa học nào phù hợp với "${searchTerm}"`;
-    }
+  // Function to fetch one page of the current post's courses from the server
+  function fetchCoursePage(page) {
+    const requestId = ++courseRequest;
+    const order = isReverseSorted ? 'desc' : 'asc';
+    const offset = (page - 1) * itemsPerPage;
+
+    // Đánh dấu các khóa học mới kể từ lần truy cập trước
+    const since = lastVisitCursor !== null ? `&since=${encodeURIComponent(lastVisitCursor)}` : '';
+
+    // Trình duyệt tự gửi If-None-Match, server trả về 304 nếu không đổi
+    return fetch(`/api/extract-courses?url=${encodeURIComponent(currentUrl)}&limit=${itemsPerPage}&offset=${offset}&order=${order}&validate=1${since}`)
+      .then(response => response.json())
+      .then(data => {
+        // Một yêu cầu mới hơn đã bắt đầu
+        if (requestId !== courseRequest) return;
+
+        loadingDiv.style.display = 'none';
+        resultsDiv.style.display = 'block';
 
-    // Reset to first page and display filtered results
-    currentPage = 1;
-    displayPage(currentPage, filteredCourses);
+        courseTotal = data.count || 0;
+        courseCount.textContent = courseTotal;
+
+        if (data.courses && data.courses.length > 0) {
+          allCourses = data.courses;
+          currentPage = page;
+          displayPage(currentPage);
+        } else {
+          allCourses = [];
+          courseList.innerHTML = '<div class="p-8 text-center text-gray-500">Không tìm thấy khóa học nào trên trang này.</div>';
+          paginationControls.innerHTML = '';
+          showingFrom.textContent = '0';
+          showingTo.textContent = '0';
+          totalItems.textContent = '0';
+          searchResults.textContent = '';
+        }
+      });
+  }
+
+  // Function to show an extraction error in place of the course list
+  function showExtractError(error) {
+    loadingDiv.style.display = 'none';
+    courseList.innerHTML = '<div class="p-8 text-center text-red-500"></div>';
+    courseList.firstChild.textContent = `Lỗi khi trích xuất khóa học: ${error.message}`;
+    resultsDiv.style.display = 'block';
+    paginationControls.innerHTML = '';
+    showingFrom.textContent = '0';
+    showingTo.textContent = '0';
+    totalItems.textContent = '0';
+    searchResults.textContent = '';
   }
 
   // Function to extract courses from a URL
@@ -226,12 +398,18 @@ document.addEventListener('DOMContentLoaded', function () {
 
     // Reset search
     searchInput.value = '';
+    clearTimeout(searchTimer);
+    searchRequest++;
     searchTerm = '';
+    searchTotal = 0;
     filteredCourses = [];
     searchResults.textContent = '';
 
     // Fill the input field with the URL
     urlInput.value = url;
+    currentUrl = url;
+    allCourses = [];
+    courseTotal = 0;
 
     // Show loading indicator
     loadingDiv.style.display = 'block';
@@ -241,46 +419,8 @@ document.addEventListener('DOMContentLoaded', function () {
     // Scroll to the top of the page
     window.scrollTo({ top: 0, behavior: 'smooth' });
 
-    // Fetch courses from API
-    fetch(`/api/extract-courses?url=${encodeURIComponent(url)}`)
-      .then(response => response.json())
-      .then(data => {
-        loadingDiv.style.display = 'none';
-        resultsDiv.style.display = 'block';
-
-        courseCount.textContent = data.count;
-
-        if (data.courses && data.courses.length > 0) {
-          // Store all courses
-          allCourses = data.courses;
-
-          // Default is reversed (newest first)
-          if (isReverseSorted) {
-            allCourses.reverse();
-          }
-
-          // Reset to first page and display
-          currentPage = 1;
-          displayPage(currentPage);
-        } else {
-          courseList.innerHTML = '<div class="p-8 text-center text-gray-500">Không tìm thấy khóa học nào trên trang này.</div>';
-          paginationControls.innerHTML = '';
-          showingFrom.textContent = '0';
-          showingTo.textContent = '0';
-          totalItems.textContent = '0';
-          searchResults.textContent = '';
-        }
-      })
-      .catch(error => {
-        loadingDiv.style.display = 'none';
-        courseList.innerHTML = `<div class="p-8 text-center text-red-500">Lỗi khi trích xuất khóa học: ${error.message}</div>`;
-        resultsDiv.style.display = 'block';
-        paginationControls.innerHTML = '';
-        showingFrom.textContent = '0';
-        showingTo.textContent = '0';
-        totalItems.textContent = '0';
-        searchResults.textContent = '';
-      });
+    // Fetch the first page of courses from API
+    fetchCoursePage(1).catch(showExtractError);
   }
 
   // Event listeners
@@ -293,11 +433,8 @@ document.addEventListener('DOMContentLoaded', function () {
   // Event listener for clear search button
   clearSearch.addEventListener('click', function () {
     searchInput.value = '';
-    searchTerm = '';
-    filteredCourses = [];
-    searchResults.textContent = '';
-    currentPage = 1;
-    displayPage(currentPage);
+    courseCount.textContent = courseTotal;
+    resetSearch();
   });
 
   // Event listener for sort toggle
@@ -307,8 +444,7 @@ document.addEventListener('DOMContentLoaded', function () {
   // Event listener for items per page change
   perPageSelect.addEventListener('change', function () {
     itemsPerPage = parseInt(this.value);
-    currentPage = 1;
-    displayPage(currentPage);
+    goToPage(1);
   });
 
   // Extract courses button handler
@@ -317,14 +453,118 @@ document.addEventListener('DOMContentLoaded', function () {
     extractCoursesFromUrl(url);
   });
 
-  // Add click handler to all coupon boxes
-  const couponBoxes = document.querySelectorAll('.coupon-box');
-  couponBoxes.forEach(box => {
+  // Add click handler to a coupon box
+  function attachCouponBox(box) {
     box.addEventListener('click', function () {
       const url = this.getAttribute('data-url');
       extractCoursesFromUrl(url);
     });
-  });
+  }
+
+  document.querySelectorAll('.coupon-box').forEach(attachCouponBox);
+
+  // Live feed: server đẩy bài đăng và khóa học mới qua Server-Sent Events
+  const couponPosts = document.getElementById('coupon-posts');
+
+  function findCouponBox(url) {
+    return Array.from(couponPosts.querySelectorAll('.coupon-box'))
+      .find(box => box.getAttribute('data-url') === url);
+  }
+
+  function liveBadge(box, text) {
+    let badge = box.querySelector('.live-badge');
+    if (!badge) {
+      badge = document.createElement('span');
+      badge.className = 'live-badge ml-2 text-xs px-2 py-0.5 rounded-full bg-green-100 text-green-800';
+      box.querySelector('.coupon-title').appendChild(badge);
+    }
+    badge.textContent = text;
+  }
+
+  // Function to build a coupon box like the ones rendered by the template
+  function createCouponBox(post) {
+    const box = document.createElement('div');
+    box.className = 'coupon-box bg-white rounded-lg shadow-md p-5 mb-4 cursor-pointer hover:bg-accent hover:border-primary hover:shadow-lg transition-all border border-transparent';
+    box.setAttribute('data-url', post.url);
+    box.innerHTML = `
+      <h2 class="coupon-title text-lg font-medium text-secondary"></h2>
+      <div class="flex items-center mt-2">
+        <p class="text-primary font-medium">Extract courses from this post</p>
+        <a target="_blank" class="ml-2 text-xs text-gray-500 hover:text-gray-700 inline-flex items-center">Open in new tab</a>
+      </div>`;
+    box.querySelector('.coupon-title').textContent = post.title;
+    const link = box.querySelector('a');
+    const href = safeHref(post.url);
+    if (href) {
+      link.setAttribute('href', href);
+    } else {
+      link.remove();
+    }
+    link.addEventListener('click', event => event.stopPropagation());
+    attachCouponBox(box);
+    return box;
+  }
+
+  // Function to add posts the page does not show yet, newest on top
+  function addCouponPosts(posts, markNew) {
+    const placeholder = document.getElementById('no-coupons');
+    posts.slice().reverse().forEach(post => {
+      if (!post.url || !post.title || findCouponBox(post.url)) return;
+      if (placeholder) placeholder.remove();
+      const box = createCouponBox(post);
+      if (markNew) liveBadge(box, 'Mới');
+      couponPosts.prepend(box);
+    });
+  }
+
+  function subscribeLiveFeed() {
+    if (!window.EventSource || !couponPosts) return;
+    // Trình duyệt tự kết nối lại và gửi Last-Event-ID để nhận các sự kiện bị lỡ
+    const source = new EventSource('/api/events');
+
+    source.addEventListener('posts', event => {
+      const data = JSON.parse(event.data);
+      addCouponPosts(data.posts || [], true);
+    });
+
+    source.addEventListener('courses', event => {
+      const data = JSON.parse(event.data);
+      const box = findCouponBox(data.post_url);
+      if (box) liveBadge(box, `+${data.courses.length} khóa học mới`);
+      // Tải lại trang khóa học đang xem, trừ khi người dùng đang tìm kiếm
+      if (data.post_url === currentUrl && !searchTerm) {
+        fetchCoursePage(currentPage).catch(showExtractError);
+      }
+    });
+
+    // Đã lỡ quá nhiều sự kiện: tải lại danh sách bài đăng
+    source.addEventListener('reset', () => {
+      fetch('/api/coupons')
+        .then(response => response.json())
+        .then(posts => addCouponPosts(posts || [], false))
+        .catch(() => {});
+    });
+  }
+
+  subscribeLiveFeed();
+
+  // Số khóa học mới kể từ lần truy cập trước; lưu vị trí hiện tại cho lần sau
+  function showNewCourses() {
+    const newCourses = document.getElementById('new-courses');
+    const since = lastVisitCursor !== null ? `?since=${encodeURIComponent(lastVisitCursor)}` : '';
+    fetch(`/api/courses/new${since}`)
+      .then(response => response.json())
+      .then(data => {
+        if (data.cursor !== undefined) localStorage.setItem('courseCursor', data.cursor);
+        if (newCourses && data.new_count > 0) {
+          newCourses.textContent = `${data.new_count} khóa học mới kể từ lần truy cập trước`;
+          newCourses.style.display = 'block';
+        }
+      })
+      .catch(() => {});
+  }
+
+  showNewCourses();
 
   // Scroll to top button functionality
   window.addEventListener('scroll', function () {
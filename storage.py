@@ -0,0 +1,691 @@
+"""
+SQLite storage for scraped coupon posts and courses
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from utils.course_identity import canonical_course_url
+from utils.helpers import month_to_num, normalize_title
+from utils.seen_index import DEFAULT_CAPACITY, DEFAULT_ERROR_RATE, SeenIndex
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    discussion_id INTEGER,
+    title TEXT,
+    day INTEGER,
+    month TEXT,
+    month_num INTEGER NOT NULL DEFAULT 0,
+    year INTEGER,
+    first_seen_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    crawled_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_discussion_id ON posts (discussion_id);
+CREATE INDEX IF NOT EXISTS idx_posts_recent ON posts (year DESC, month_num DESC, day DESC, discussion_id DESC);
+
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    first_seen_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS post_courses (
+    post_id INTEGER NOT NULL REFERENCES posts (id) ON DELETE CASCADE,
+    course_id INTEGER NOT NULL REFERENCES courses (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (post_id, course_id)
+);
+CREATE INDEX IF NOT EXISTS idx_post_courses_course ON post_courses (course_id);
+CREATE INDEX IF NOT EXISTS idx_post_courses_position ON post_courses (post_id, position);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+'''
+
+# Full-text index over normalized course titles; rowid is the course id
+SEARCH_SCHEMA = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5 (
+    title,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3 4'
+);
+'''
+
+# Above this many matches, results are ordered newest first instead of by
+# BM25, which would have to score every match
+MAX_RANKED_MATCHES = 5000
+
+# Number of most recent events kept for live-feed replay
+EVENT_RETENTION = 1000
+
+# Courses stored after a "since" cursor only count as new when first seen at
+# most this many seconds before the cursor's course: writers read the clock
+# before waiting for the write lock, while re-parsed archives are far older
+FIRST_SEEN_SLACK = 300
+
+# Key in the meta table holding the newest discussion processed by the crawler
+LAST_CRAWLED_KEY = 'last_crawled_discussion_id'
+
+# Key in the meta table set once stored course URLs have been canonicalised
+CANONICAL_URLS_KEY = 'course_urls_canonical'
+
+# Maximum number of parameters bound in one IN (...) lookup
+LOOKUP_CHUNK = 500
+
+# Earliest post a course ``c`` was listed in. Listings are stored newest
+# first, so among posts without a Flarum discussion id seen at the same
+# time the higher row id is the older one
+FIRST_POST = '''
+    (SELECT pc.post_id FROM post_courses pc JOIN posts fp ON fp.id = pc.post_id
+     WHERE pc.course_id = c.id
+     ORDER BY fp.discussion_id IS NULL, fp.discussion_id, fp.first_seen_at, fp.id DESC LIMIT 1)
+'''
+
+
+def isoformat(timestamp):
+    """ISO 8601 UTC time of a Unix timestamp"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def discussion_id_from_url(url):
+    """Extract the numeric Flarum discussion id from a /d/<id>-slug URL"""
+    match = re.search(r'/d/(\d+)', url or '')
+    return int(match.group(1)) if match else None
+
+
+class CouponDatabase:
+    """
+    SQLite database (WAL mode) holding posts, courses and the links between them
+
+    Every thread gets its own connection; writes are upserts so re-crawling
+    the same post only updates what changed. Courses are keyed by their
+    canonical URL, and a seen index over that key skips courses already stored.
+    """
+
+    def __init__(self, path, seen_capacity=DEFAULT_CAPACITY, seen_error_rate=DEFAULT_ERROR_RATE):
+        """
+        Args:
+            path (str): Database file path, or ':memory:'
+            seen_capacity (int): Courses the seen index's Bloom filter is first sized for
+            seen_error_rate (float): False-positive rate of the Bloom filter
+        """
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        if path != ':memory:':
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+        # Room for the stored courses to double before the filter has to grow
+        stored = self.connection.execute('SELECT COALESCE(MAX(id), 0) FROM courses').fetchone()[0]
+        self.seen_index = SeenIndex(
+            self._course_urls_after, capacity=max(seen_capacity, 2 * stored), error_rate=seen_error_rate)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA foreign_keys=ON')
+        return connection
+
+    @property
+    def connection(self):
+        """Connection for the current thread"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def _init_schema(self):
+        with self._write_lock, self.connection:
+            self.connection.executescript(SCHEMA)
+
+        try:
+            with self._write_lock, self.connection:
+                self.connection.executescript(SEARCH_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite FTS5 unavailable, search falls back to LIKE: {e}")
+            self.fts_enabled = False
+
+        if self.get_meta(CANONICAL_URLS_KEY) is None:
+            self._canonicalize_course_urls()
+
+        # Also catches courses merged by the canonicalisation
+        if self.fts_enabled:
+            indexed = self.connection.execute('SELECT COUNT(*) FROM courses_fts').fetchone()[0]
+            stored = self.connection.execute('SELECT COUNT(*) FROM courses').fetchone()[0]
+            if indexed != stored:
+                self.rebuild_search_index()
+
+    def _canonicalize_course_urls(self):
+        """Rewrite course URLs stored before canonicalisation, merging variants of one course"""
+        renamed = merged = 0
+        with self._write_lock, self.connection as connection:
+            # Every server process starts with this check; take the write lock
+            # before reading so that only the first one migrates
+            connection.execute('BEGIN IMMEDIATE')
+            done = connection.execute('SELECT 1 FROM meta WHERE key = ?', (CANONICAL_URLS_KEY,)).fetchone()
+            rows = [] if done else connection.execute(
+                'SELECT id, url, first_seen_at FROM courses ORDER BY id').fetchall()
+            for row in rows:
+                url = canonical_course_url(row['url'])
+                if url == row['url']:
+                    continue
+                existing = connection.execute('SELECT id FROM courses WHERE url = ?', (url,)).fetchone()
+                if existing is not None and existing['id'] == row['id']:
+                    continue
+                if existing is None:
+                    connection.execute('UPDATE courses SET url = ? WHERE id = ?', (url, row['id']))
+                    renamed += 1
+                    continue
+
+                # Keep the earliest sighting; links left over are removed with the row
+                connection.execute(
+                    'UPDATE courses SET first_seen_at = MIN(first_seen_at, ?) WHERE id = ?',
+                    (row['first_seen_at'], existing['id']))
+                connection.execute(
+                    'UPDATE OR IGNORE post_courses SET course_id = ? WHERE course_id = ?', (existing['id'], row['id']))
+                connection.execute('DELETE FROM courses WHERE id = ?', (row['id'],))
+                merged += 1
+
+            connection.execute(
+                'INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                (CANONICAL_URLS_KEY, '1'))
+        if renamed or merged:
+            logger.info(f"Canonicalised course URLs: {renamed} rewritten, {merged} merged into existing courses")
+
+    def close(self):
+        """Close the current thread's connection"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    # Meta
+
+    def get_meta(self, key, default=None):
+        row = self.connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else default
+
+    def set_meta(self, key, value):
+        with self._write_lock, self.connection:
+            self.connection.execute(
+                'INSERT INTO meta (key, value) VALUES (?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                (key, str(value))
+            )
+
+    # Posts
+
+    def _upsert_post(self, connection, post, now):
+        connection.execute(
+            '''
+            INSERT INTO posts (url, discussion_id, title, day, month, month_num, year, first_seen_at, updated_at)
+            VALUES (:url, :discussion_id, :title, :day, :month, :month_num, :year, :now, :now)
+            ON CONFLICT(url) DO UPDATE SET
+                title = COALESCE(excluded.title, posts.title),
+                day = COALESCE(excluded.day, posts.day),
+                month = COALESCE(excluded.month, posts.month),
+                month_num = CASE WHEN excluded.month IS NULL THEN posts.month_num ELSE excluded.month_num END,
+                year = COALESCE(excluded.year, posts.year),
+                updated_at = MAX(posts.updated_at, excluded.updated_at)
+            ''',
+            {
+                'url': post['url'],
+                'discussion_id': discussion_id_from_url(post['url']),
+                'title': post.get('title'),
+                'day': post.get('day'),
+                'month': post.get('month'),
+                'month_num': month_to_num(post.get('month', '')),
+                'year': post.get('year'),
+                'now': now,
+            }
+        )
+        return connection.execute('SELECT id FROM posts WHERE url = ?', (post['url'],)).fetchone()['id']
+
+    def upsert_posts(self, posts, seen_at=None, publish=True):
+        """
+        Insert or update listing posts
+
+        Posts seen on the listing for the first time are recorded as a
+        ``posts`` event.
+
+        Args:
+            posts (list): Post dictionaries with title and url
+            seen_at (float): Unix time the listing was fetched; now by default
+            publish (bool): Whether new posts are recorded as an event for the
+                live feed; off for offline re-parses of archived pages
+
+        Returns:
+            list: The posts that were not on the listing before
+        """
+        now = seen_at or time.time()
+        new_posts = []
+        with self._write_lock, self.connection as connection:
+            for post in posts:
+                row = connection.execute('SELECT title FROM posts WHERE url = ?', (post['url'],)).fetchone()
+                if row is None or row['title'] is None:
+                    new_posts.append(post)
+                self._upsert_post(connection, post, now)
+            if new_posts and publish:
+                self._append_event(connection, 'posts', {'posts': new_posts}, now)
+        return new_posts
+
+    def get_latest_posts(self, limit=5):
+        """Return the newest posts, sorted the same way as the scrapers"""
+        rows = self.connection.execute(
+            '''
+            SELECT url, title, day, month, year FROM posts
+            WHERE title IS NOT NULL
+            ORDER BY year DESC, month_num DESC, day DESC, discussion_id DESC
+            LIMIT ?
+            ''',
+            (limit if limit else -1,)
+        ).fetchall()
+        return [self._post_dict(row) for row in rows]
+
+    @staticmethod
+    def _post_dict(row):
+        post = {'title': row['title'], 'url': row['url']}
+        if row['year'] is not None:
+            post['day'] = row['day']
+            post['month'] = row['month']
+            post['year'] = row['year']
+        return post
+
+    def is_crawled(self, url):
+        row = self.connection.execute('SELECT crawled_at FROM posts WHERE url = ?', (url,)).fetchone()
+        return bool(row and row['crawled_at'] is not None)
+
+    # Courses
+
+    def _course_urls_after(self, course_id, limit):
+        """(id, url) pairs of the courses stored after ``course_id``, for the seen index"""
+        rows = self.connection.execute(
+            'SELECT id, url FROM courses WHERE id > ? ORDER BY id LIMIT ?', (course_id, limit)).fetchall()
+        return [(row['id'], row['url']) for row in rows]
+
+    @staticmethod
+    def _stored_courses(connection, urls):
+        """Stored rows of the given course URLs, by URL"""
+        stored = {}
+        for start in range(0, len(urls), LOOKUP_CHUNK):
+            chunk = urls[start:start + LOOKUP_CHUNK]
+            placeholders = ', '.join('?' * len(chunk))
+            for row in connection.execute(
+                    f'SELECT id, url, title FROM courses WHERE url IN ({placeholders})', chunk):
+                stored[row['url']] = row
+        return stored
+
+    def _index_title(self, connection, course_id, title):
+        if self.fts_enabled:
+            connection.execute(
+                'INSERT OR REPLACE INTO courses_fts (rowid, title) VALUES (?, ?)',
+                (course_id, normalize_title(title))
+            )
+
+    def save_post_courses(self, post_url, courses, seen_at=None, publish=True):
+        """
+        Store the courses extracted from a post, replacing its previous links
+
+        Course URLs are canonicalised, so a course listed in many posts is
+        stored once and linked to each of them. Courses the seen index already
+        knows are only rewritten when their title changed; courses never stored
+        before are recorded as a ``courses`` event.
+
+        Args:
+            post_url (str): URL of the post the courses were extracted from
+            courses (list): Course dictionaries with title and url
+            seen_at (float): Unix time the post was fetched, used as the first-seen
+                time of new courses; now by default
+            publish (bool): Whether new courses are recorded as an event for the
+                live feed; off for offline re-parses of archived pages
+
+        Returns:
+            list: The courses that were not in the database before
+        """
+        now = seen_at or time.time()
+        courses = [dict(course, url=canonical_course_url(course['url'])) for course in courses if course.get('url')]
+        # While another thread fills the filter, courses it misses are upserted
+        self.seen_index.sync(blocking=False)
+
+        new_courses = []
+        with self._write_lock, self.connection as connection:
+            post_id = self._upsert_post(connection, {'url': post_url}, now)
+            connection.execute('DELETE FROM post_courses WHERE post_id = ?', (post_id,))
+            stored = self.seen_index.lookup(
+                [course['url'] for course in courses], lambda urls: self._stored_courses(connection, urls))
+
+            for position, course in enumerate(courses):
+                row = stored.get(course['url'])
+                if row is None:
+                    # Upsert: another process may have stored it since the last sync
+                    connection.execute(
+                        '''
+                        INSERT INTO courses (url, title, first_seen_at, updated_at)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT(url) DO UPDATE SET title = excluded.title, updated_at = excluded.updated_at
+                        ''',
+                        (course['url'], course['title'], now, now)
+                    )
+                    row = connection.execute(
+                        'SELECT id, first_seen_at FROM courses WHERE url = ?', (course['url'],)).fetchone()
+                    course_id = row['id']
+                    self._index_title(connection, course_id, course['title'])
+                    if row['first_seen_at'] == now:
+                        new_courses.append({'title': course['title'], 'url': course['url']})
+                else:
+                    course_id = row['id']
+                    if row['title'] != course['title']:
+                        connection.execute(
+                            'UPDATE courses SET title = ?, updated_at = ? WHERE id = ?', (course['title'], now, course_id))
+                        self._index_title(connection, course_id, course['title'])
+
+                connection.execute(
+                    'INSERT OR IGNORE INTO post_courses (post_id, course_id, position) VALUES (?, ?, ?)',
+                    (post_id, course_id, position)
+                )
+
+            connection.execute('UPDATE posts SET crawled_at = ? WHERE id = ?', (now, post_id))
+            if new_courses and publish:
+                self._append_event(connection, 'courses', {
+                    'post_url': post_url,
+                    'total': len(courses),
+                    'courses': new_courses,
+                }, now)
+        return new_courses
+
+    def get_post_courses(self, post_url):
+        """Return the stored courses of a post, or None if it was never crawled"""
+        if not self.is_crawled(post_url):
+            return None
+        rows = self.connection.execute(
+            '''
+            SELECT c.title, c.url FROM posts p
+            JOIN post_courses pc ON pc.post_id = p.id
+            JOIN courses c ON c.id = pc.course_id
+            WHERE p.url = ?
+            ORDER BY pc.position
+            ''',
+            (post_url,)
+        ).fetchall()
+        return [{'title': row['title'], 'url': row['url']} for row in rows]
+
+    def _cursor_seen_at(self, course_id):
+        """Earliest first-seen time of a course that is new after a ``since`` cursor; 0 if any is"""
+        row = self.connection.execute(
+            'SELECT first_seen_at FROM courses WHERE id <= ? ORDER BY id DESC LIMIT 1', (course_id,)).fetchone()
+        return row['first_seen_at'] - FIRST_SEEN_SLACK if row else 0
+
+    def get_course_history(self, urls, since=None):
+        """
+        Look up when and where courses were first seen
+
+        Args:
+            urls (list): Course URLs, canonical or not
+            since (int): Cursor from get_courses_since(); entries are marked
+                ``is_new`` the same way that method counts them
+
+        Returns:
+            dict: For every stored course, keyed by the URL as given: course_id,
+                first_seen_at (ISO time), first_post_url, post_count, the
+                number of posts listing it, and is_new
+        """
+        since_seen_at = self._cursor_seen_at(since) if since is not None else None
+        canonical = {}
+        for url in urls:
+            canonical.setdefault(canonical_course_url(url), []).append(url)
+        keys = list(canonical)
+
+        history = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[start:start + LOOKUP_CHUNK]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = self.connection.execute(
+                f'''
+                SELECT c.id, c.url, c.first_seen_at, p.url AS first_post_url,
+                       (SELECT COUNT(*) FROM post_courses WHERE course_id = c.id) AS post_count
+                FROM courses c
+                LEFT JOIN posts p ON p.id = {FIRST_POST}
+                WHERE c.url IN ({placeholders})
+                ''',
+                chunk
+            ).fetchall()
+            for row in rows:
+                entry = {
+                    'course_id': row['id'],
+                    'first_seen_at': isoformat(row['first_seen_at']),
+                    'first_post_url': row['first_post_url'],
+                    'post_count': row['post_count'],
+                    'is_new': since is not None and row['id'] > since and row['first_seen_at'] >= since_seen_at,
+                }
+                for url in canonical[row['url']]:
+                    history[url] = entry
+        return history
+
+    def get_courses_since(self, course_id, limit=20):
+        """
+        Count the courses stored after a given course id
+
+        Course ids only grow, so the newest id a client saw is a cursor for
+        "new since my last visit". Courses stored later but first seen before
+        the cursor's course (re-parsed from archived pages) do not count.
+
+        Args:
+            course_id (int): Newest course id the client has seen; None on a
+                first visit, when nothing counts as new
+            limit (int): Maximum number of new courses to return
+
+        Returns:
+            tuple: (newest course id, number of newer courses, the newest of them)
+        """
+        connection = self.connection
+        latest = connection.execute('SELECT COALESCE(MAX(id), 0) FROM courses').fetchone()[0]
+        if course_id is None:
+            return latest, 0, []
+        since_seen_at = self._cursor_seen_at(course_id)
+        count = connection.execute(
+            'SELECT COUNT(*) FROM courses WHERE id > ? AND first_seen_at >= ?', (course_id, since_seen_at)).fetchone()[0]
+        rows = connection.execute(
+            f'''
+            SELECT c.id, c.title, c.url, c.first_seen_at, p.url AS post_url
+            FROM courses c
+            LEFT JOIN posts p ON p.id = {FIRST_POST}
+            WHERE c.id > ? AND c.first_seen_at >= ?
+            ORDER BY c.id DESC
+            LIMIT ?
+            ''',
+            (course_id, since_seen_at, limit)
+        ).fetchall()
+        courses = [
+            {'course_id': row['id'], 'title': row['title'], 'url': row['url'],
+             'first_seen_at': isoformat(row['first_seen_at']), 'post_url': row['post_url']}
+            for row in rows
+        ]
+        return latest, count, courses
+
+    # Events
+
+    def _append_event(self, connection, event_type, data, now):
+        connection.execute(
+            'INSERT INTO events (type, data, created_at) VALUES (?, ?, ?)',
+            (event_type, json.dumps(data), now)
+        )
+        connection.execute(
+            'DELETE FROM events WHERE id <= (SELECT MAX(id) FROM events) - ?', (EVENT_RETENTION,))
+
+    def get_events_after(self, event_id=None, limit=100):
+        """
+        Return stored events in id order
+
+        Args:
+            event_id (int): Return events after this id; None for the latest ``limit`` events
+            limit (int): Maximum number of events
+
+        Returns:
+            list: (id, type, JSON data) tuples
+        """
+        if event_id is None:
+            rows = self.connection.execute(
+                'SELECT id, type, data FROM events ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+            rows.reverse()
+        else:
+            rows = self.connection.execute(
+                'SELECT id, type, data FROM events WHERE id > ? ORDER BY id LIMIT ?', (event_id, limit)).fetchall()
+        return [(row['id'], row['type'], row['data']) for row in rows]
+
+    # Search
+
+    def rebuild_search_index(self):
+        """Re-index every stored course title"""
+        with self._write_lock, self.connection as connection:
+            connection.execute('DELETE FROM courses_fts')
+            rows = connection.execute('SELECT id, title FROM courses').fetchall()
+            connection.executemany(
+                'INSERT INTO courses_fts (rowid, title) VALUES (?, ?)',
+                ((row['id'], normalize_title(row['title'])) for row in rows)
+            )
+        logger.info(f"Rebuilt course search index with {len(rows)} titles")
+
+    def search_courses(self, query, limit=20, offset=0):
+        """
+        Full-text search over every stored course title
+
+        Every word of the query must match the start of a word in the title;
+        results are ranked by BM25, or newest first for very broad queries.
+
+        Args:
+            query (str): Search text
+            limit (int): Maximum number of results
+            offset (int): Number of results to skip
+
+        Returns:
+            tuple: (total number of matches, list of course dictionaries)
+        """
+        terms = normalize_title(query).split()
+        if not terms:
+            return 0, []
+
+        # Latest post each course appeared in
+        latest_post = '''
+            (SELECT p.url FROM post_courses pc JOIN posts p ON p.id = pc.post_id
+             WHERE pc.course_id = c.id ORDER BY p.discussion_id DESC LIMIT 1)
+        '''
+        connection = self.connection
+
+        if self.fts_enabled:
+            match = ' '.join(f'"{term}"*' for term in terms)
+            total = connection.execute(
+                'SELECT COUNT(*) FROM courses_fts WHERE courses_fts MATCH ?', (match,)).fetchone()[0]
+            order = 'f.rank' if total <= MAX_RANKED_MATCHES else 'f.rowid DESC'
+            rows = connection.execute(
+                f'''
+                SELECT c.title, c.url, {latest_post} AS post_url
+                FROM courses_fts f JOIN courses c ON c.id = f.rowid
+                WHERE courses_fts MATCH ?
+                ORDER BY {order}
+                LIMIT ? OFFSET ?
+                ''',
+                (match, limit, offset)
+            ).fetchall()
+        else:
+            where = ' AND '.join('c.title LIKE ?' for _ in terms)
+            params = [f'%{term}%' for term in terms]
+            total = connection.execute(
+                f'SELECT COUNT(*) FROM courses c WHERE {where}', params).fetchone()[0]
+            rows = connection.execute(
+                f'''
+                SELECT c.title, c.url, {latest_post} AS post_url
+                FROM courses c WHERE {where}
+                ORDER BY c.title LIMIT ? OFFSET ?
+                ''',
+                params + [limit, offset]
+            ).fetchall()
+
+        return total, [
+            {'title': row['title'], 'url': row['url'], 'post_url': row['post_url']} for row in rows
+        ]
+
+    def stats(self):
+        connection = self.connection
+        return {
+            'posts': connection.execute('SELECT COUNT(*) FROM posts').fetchone()[0],
+            'crawled_posts': connection.execute(
+                'SELECT COUNT(*) FROM posts WHERE crawled_at IS NOT NULL').fetchone()[0],
+            'courses': connection.execute('SELECT COUNT(*) FROM courses').fetchone()[0],
+            'last_crawled_discussion_id': self.get_meta(LAST_CRAWLED_KEY),
+        }
+
+
+def crawl_incremental(db, posts, extract_courses):
+    """
+    Crawl only posts that are newer than the last processed one
+
+    Posts newer than the stored cursor, and older posts that were never
+    crawled successfully, are fetched and parsed; everything else is left
+    alone. The cursor only moves past posts that were stored successfully.
+
+    Args:
+        db (CouponDatabase): Database to write to
+        posts (list): Latest listing posts
+        extract_courses (callable): Function extracting courses from a post URL,
+            raising on failure
+
+    Returns:
+        dict: Counts of listed, crawled, skipped and failed posts
+    """
+    db.upsert_posts(posts)
+    cursor = int(db.get_meta(LAST_CRAWLED_KEY, 0))
+    newest = cursor
+    crawled = skipped = failed = 0
+
+    for post in posts:
+        discussion_id = discussion_id_from_url(post['url'])
+        is_new = discussion_id is not None and discussion_id > cursor
+        if not is_new and db.is_crawled(post['url']):
+            skipped += 1
+            continue
+
+        try:
+            courses = extract_courses(post['url'])
+        except Exception as e:
+            failed += 1
+            logger.error(f"Incremental crawl of {post['url']} failed: {e}")
+            continue
+
+        db.save_post_courses(post['url'], courses)
+        crawled += 1
+        if discussion_id is not None:
+            newest = max(newest, discussion_id)
+        logger.info(f"Stored {len(courses)} courses for {post['url']}")
+
+    if newest > cursor:
+        db.set_meta(LAST_CRAWLED_KEY, newest)
+
+    summary = {'listed': len(posts), 'crawled': crawled, 'skipped': skipped, 'failed': failed}
+    logger.info(f"Incremental crawl finished: {summary}")
+    return summary
@@ -0,0 +1,106 @@
+"""
+Parity of the single-pass parse_courses() with the three-strategy parser it replaced
+
+The previous implementation is kept here as the reference: it ran the
+"Enroll for Free" ``li``/``p`` search, the ``<strong>`` fallback and the direct
+coupon-link search one after the other. Both must return the same courses,
+in the same order, for the benchmark fixtures and generated threads.
+"""
+import pytest
+from bs4 import BeautifulSoup
+from benchmarks.fixtures import generate_giant_thread, load_fixture
+from scrapers.course_extractor import parse_courses
+from utils.course_identity import canonical_course_url
+
+
+def clean_title(text):
+    course_name = text.replace('Enroll for Free', '').strip()
+    if course_name.endswith('–'):
+        course_name = course_name[:-1].strip()
+    return course_name
+
+
+def legacy_parse_courses(html):
+    """The three-strategy parser as it was before the single-pass rewrite"""
+    soup = BeautifulSoup(html, 'html.parser')
+    courses = []
+    processed_urls = set()
+
+    for item in soup.find_all(['li', 'p']):
+        enroll_link = item.find('a', string='Enroll for Free')
+        if enroll_link:
+            enrollment_url = enroll_link.get('href')
+            if enrollment_url in processed_urls:
+                continue
+            processed_urls.add(enrollment_url)
+            courses.append({'title': clean_title(item.get_text(strip=True)), 'url': enrollment_url})
+
+    if not courses:
+        for strong in soup.find_all('strong'):
+            enroll_link = strong.find('a', string='Enroll for Free')
+            if enroll_link:
+                enrollment_url = enroll_link.get('href')
+                if enrollment_url in processed_urls:
+                    continue
+                processed_urls.add(enrollment_url)
+                parent = strong.find_parent('p') or strong.find_parent('li')
+                if parent:
+                    courses.append({'title': clean_title(parent.get_text(strip=True)), 'url': enrollment_url})
+
+    for link in soup.find_all('a'):
+        href = link.get('href', '')
+        if 'udemy.com/course' in href and 'couponCode=' in href:
+            if href in processed_urls:
+                continue
+            processed_urls.add(href)
+            parent = link.find_parent('p') or link.find_parent('li')
+            if parent:
+                courses.append({'title': clean_title(parent.get_text(strip=True)), 'url': href})
+
+    unique_courses = []
+    seen_titles = set()
+    for course in courses:
+        normalized_title = course['title'].lower()
+        if normalized_title not in seen_titles:
+            seen_titles.add(normalized_title)
+            unique_courses.append(course)
+    return unique_courses
+
+
+def baseline(html):
+    """Reference output, with the URLs the current parser stores"""
+    return [{'title': course['title'], 'url': canonical_course_url(course['url'])}
+            for course in legacy_parse_courses(html)]
+
+
+# The <strong> fallback only runs when no li/p holds an "Enroll for Free" link
+STRONG_ONLY = '''
+<div><strong>Python Basics – <a href="https://www.udemy.com/course/python-basics/?couponCode=PY1">Enroll for Free</a></strong></div>
+<div><strong><a href="https://www.udemy.com/course/sql/?couponCode=SQ1">Enroll for Free</a></strong></div>
+<p>Excel Tricks – <a href="https://www.udemy.com/course/excel/?couponCode=XL1">https://www.udemy.com/course/excel/?couponCode=XL1</a></p>
+<li>SQL again <a href="https://www.udemy.com/course/sql/?couponCode=SQ1">https://www.udemy.com/course/sql/?couponCode=SQ1</a></li>
+'''
+
+NESTED = '''
+<ul><li>Outer <ul><li>Docker – <strong><a href="https://www.udemy.com/course/docker/?couponCode=D1">Enroll for Free</a></strong></li>
+<li>AWS – <a href="https://www.udemy.com/course/aws/?couponCode=A1">Enroll for Free</a></li></ul></li></ul>
+<p>DOCKER – <a href="https://www.udemy.com/course/docker-2/?couponCode=D2">Enroll for Free</a></p>
+<p>Nothing here <a href="https://hacksnation.com/d/1-other">other post</a></p>
+'''
+
+
+@pytest.mark.parametrize('html', [
+    pytest.param(load_fixture('discussion.html'), id='discussion'),
+    pytest.param(load_fixture('listing.html'), id='listing'),
+    pytest.param(STRONG_ONLY, id='strong-only'),
+    pytest.param(NESTED, id='nested'),
+] + [
+    pytest.param(generate_giant_thread(count, seed=seed), id=f'giant-{count}-{seed}')
+    for count, seed in ((1, 0), (50, 1), (500, 2), (2000, 3))
+])
+def test_parse_courses_matches_three_strategy_parser(html):
+    assert parse_courses(html) == baseline(html)
+
+
+def test_discussion_fixture_has_courses():
+    assert len(parse_courses(load_fixture('discussion.html'))) > 0
@@ -0,0 +1,30 @@
+"""
+Title filters of the HacksNation listing parsers
+"""
+from datetime import datetime
+from benchmarks.fixtures import load_fixture
+from scrapers.hacksnation import parse_coupon_posts_bs4, parse_flarum_discussions
+
+
+def test_static_listing_only_keeps_udemy_titles():
+    posts = parse_coupon_posts_bs4(load_fixture('listing.html'))
+
+    assert len(posts) == 25
+    assert all('udemy' in post['title'].lower() for post in posts)
+    # Tag links and the coupon request thread mention courses or coupons, not Udemy
+    urls = {post['url'] for post in posts}
+    assert 'https://hacksnation.com/t/courses' not in urls
+    assert 'https://hacksnation.com/d/36432-coupon-requests-ask-for-a-course-here' not in urls
+
+
+def test_api_listing_keeps_course_and_coupon_titles():
+    year = datetime.now().year
+    document = {'data': [
+        {'type': 'discussions', 'id': '2', 'attributes': {'title': f'Free Course Coupons for 2 May {year}', 'slug': 'free'}},
+        {'type': 'discussions', 'id': '1', 'attributes': {'title': f'Udemy Free Courses for 1 May {year}', 'slug': 'udemy'}},
+        {'type': 'discussions', 'id': '0', 'attributes': {'title': 'Weekly Discussion', 'slug': 'weekly'}},
+    ]}
+
+    posts = parse_flarum_discussions(document, year)
+
+    assert [post['url'] for post in posts] == ['https://hacksnation.com/d/2-free', 'https://hacksnation.com/d/1-udemy']
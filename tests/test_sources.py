@@ -0,0 +1,37 @@
+"""
+Validation of the LISTING_SOURCES setting
+"""
+import pytest
+from scrapers.sources import FlarumSource, HacksNationSource, build_sources
+
+
+def test_build_sources_creates_listed_sources():
+    sources = build_sources('[{"type": "hacksnation"}, '
+                            '{"type": "flarum", "name": "other", "base_url": "https://forum.example.com", "tag": "udemy"}]')
+
+    assert [type(source) for source in sources] == [HacksNationSource, FlarumSource]
+
+
+@pytest.mark.parametrize('spec', [
+    '[{"type": "os:system", "command": "true"}]',
+    '[{"type": "scrapers.sources:merge_posts"}]',
+    '[{"type": "scrapers.sources:NoSuchSource"}]',
+    '[{"type": "no_such_module:Source"}]',
+    '[{"type": "flarum", "name": "other"}]',
+    '[{"type": "hacksnation", "colour": "blue"}]',
+    '[{"type": ["hacksnation"]}]',
+    '[{"type": "hacksnation", "backends": "foo"}]',
+    '[{"type": "hacksnation", "backends": ["api"]}]',
+    '[{"type": "hacksnation", "backends": " , "}]',
+    '[{"type": "hacksnation", "timeout": "fast"}]',
+    '[{"type": "flarum", "name": "other", "base_url": 42, "tag": "udemy"}]',
+    '[{"type": "flarum", "name": "other", "base_url": "forum.example.com", "tag": "udemy"}]',
+    '[{"type": "flarum", "name": "other", "base_url": "https://forum.example.com", "tag": "udemy", "max_pages": 0}]',
+    '[{"type": "html", "name": "page", "url": null}]',
+    '[{"type": "html", "name": "", "url": "https://example.com/deals"}]',
+    '["hacksnation"]',
+    '[{"type": "hacksnation"}, {"type": "hacksnation"}]',
+])
+def test_build_sources_rejects_invalid_entries(spec):
+    with pytest.raises(ValueError):
+        build_sources(spec)
@@ -0,0 +1,138 @@
+"""
+In-memory result cache with TTL, stale-while-revalidate and negative caching
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Result of a cache lookup: the value, its age in seconds and how it was served
+# (one of 'fresh', 'stale', 'miss' or 'negative')
+CacheResult = namedtuple('CacheResult', ['value', 'age', 'status'])
+
+
+class _Entry:
+    """A cached value together with its bookkeeping"""
+    __slots__ = ('value', 'stored_at', 'failed_at', 'refreshing')
+
+    def __init__(self):
+        self.value = None
+        self.stored_at = None
+        self.failed_at = None
+        self.refreshing = False
+
+
+class ResultCache:
+    """
+    Cache for expensive scraper results
+
+    * Values younger than ``ttl`` are served directly.
+    * Values up to ``ttl + stale_ttl`` old are served while a single
+      background thread refreshes them.
+    * A failed load (an exception or a result for which ``is_failure`` is
+      true) is remembered for ``negative_ttl`` seconds, during which no new
+      load is attempted and the last good value (if any) keeps being served.
+    """
+
+    def __init__(self, ttl=300, stale_ttl=900, negative_ttl=60, is_failure=None, clock=time.monotonic):
+        """
+        Args:
+            ttl (float): Seconds a value is considered fresh
+            stale_ttl (float): Extra seconds a value may be served stale
+            negative_ttl (float): Seconds to wait before retrying a failed load
+            is_failure (callable): Predicate marking a loaded value as a failure
+            clock (callable): Monotonic time source
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.is_failure = is_failure or (lambda value: not value)
+        self._clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry()
+        return entry
+
+    def _load(self, key, loader):
+        """Run the loader and store its outcome; returns True on success"""
+        try:
+            value = loader()
+            failed = self.is_failure(value)
+        except Exception as e:
+            logger.error(f"Cache loader for {key!r} failed: {e}")
+            value, failed = None, True
+
+        now = self._clock()
+        with self._lock:
+            entry = self._entry(key)
+            entry.refreshing = False
+            if failed:
+                entry.failed_at = now
+            else:
+                entry.value = value
+                entry.stored_at = now
+                entry.failed_at = None
+        return not failed
+
+    def _refresh_in_background(self, key, loader):
+        logger.info(f"Refreshing stale cache entry {key!r} in background")
+        thread = threading.Thread(target=self._load, args=(key, loader), daemon=True)
+        thread.start()
+
+    def get(self, key, loader, default=None):
+        """
+        Look up a key, loading it with ``loader`` when needed
+
+        Args:
+            key (hashable): Cache key
+            loader (callable): Zero-argument function producing the value
+            default: Value returned when nothing good has ever been loaded
+
+        Returns:
+            CacheResult: The value, its age in seconds and the lookup status
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entry(key)
+            age = None if entry.stored_at is None else now - entry.stored_at
+
+            if age is not None and age < self.ttl:
+                return CacheResult(entry.value, age, 'fresh')
+
+            in_negative_window = (entry.failed_at is not None
+                                  and now - entry.failed_at < self.negative_ttl)
+
+            if age is not None and age < self.ttl + self.stale_ttl:
+                if not entry.refreshing and not in_negative_window:
+                    entry.refreshing = True
+                    self._refresh_in_background(key, loader)
+                return CacheResult(entry.value, age, 'stale')
+
+            if in_negative_window:
+                value = entry.value if entry.stored_at is not None else default
+                return CacheResult(value, age or 0, 'negative')
+
+        if self._load(key, loader):
+            with self._lock:
+                return CacheResult(self._entries[key].value, 0, 'miss')
+
+        with self._lock:
+            entry = self._entries[key]
+            if entry.stored_at is not None:
+                return CacheResult(entry.value, self._clock() - entry.stored_at, 'negative')
+        return CacheResult(default, 0, 'negative')
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
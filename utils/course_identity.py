@@ -0,0 +1,69 @@
+"""
+Canonical identity of Udemy enrollment links
+
+The same course is linked in many forms: with or without ``www.``, over
+http, with tracking parameters, affiliate redirects or extra path segments.
+A coupon link is identified by its course slug and coupon code, and every
+variant is rewritten to one canonical URL, which is what the database stores.
+"""
+import re
+from urllib.parse import parse_qs, quote, urlsplit
+
+UDEMY_COURSE_URL = "https://www.udemy.com/course/{slug}/?couponCode={code}"
+
+# Links already in canonical form, which most posts use, are returned as they are
+CANONICAL_URL_PATTERN = re.compile(r'https://www\.udemy\.com/course/[a-z0-9_-]+/\?couponCode=[A-Za-z0-9_.~-]+')
+
+# Query parameters of affiliate and redirect links that carry the target URL
+REDIRECT_PARAMS = ('murl', 'u', 'url', 'RD_PARM1', 'dest')
+
+
+def is_udemy_host(host):
+    return host == 'udemy.com' or host.endswith('.udemy.com')
+
+
+def parse_coupon_url(url):
+    """
+    Read the course slug and coupon code from a Udemy coupon link
+
+    Affiliate links wrapping a Udemy link in their query string are unwrapped.
+
+    Returns:
+        tuple: (slug, coupon code), or None if the URL is not a Udemy coupon link
+    """
+    parts = urlsplit((url or '').strip())
+    host = (parts.hostname or '').lower()
+    query = parse_qs(parts.query)
+    if not is_udemy_host(host):
+        for name in REDIRECT_PARAMS:
+            target = (query.get(name) or [''])[0]
+            if 'udemy.com' in target:
+                return parse_coupon_url(target)
+        return None
+
+    segments = [segment for segment in parts.path.split('/') if segment]
+    if len(segments) < 2 or segments[0] != 'course':
+        return None
+
+    code = (query.get('couponCode') or [''])[0].strip()
+    if not code:
+        return None
+    return segments[1].lower(), code
+
+
+def canonical_course_url(url):
+    """
+    Rewrite a coupon link to ``https://www.udemy.com/course/<slug>/?couponCode=<code>``
+
+    Links that are not Udemy coupon links are returned unchanged, apart from
+    surrounding whitespace.
+    """
+    if url and CANONICAL_URL_PATTERN.fullmatch(url):
+        return url
+
+    parsed = parse_coupon_url(url)
+    if parsed is None:
+        return (url or '').strip()
+    slug, code = parsed
+    # The slug is kept as it appears in the path; the code was decoded from the query
+    return UDEMY_COURSE_URL.format(slug=slug, code=quote(code, safe=''))
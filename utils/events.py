@@ -0,0 +1,242 @@
+"""
+Server-Sent Events hub: one upstream poll fanned out to many subscribers
+
+Events are rows of the database's ``events`` table, so every server process
+sees the same events with the same ids. Each process runs a single poller
+thread that reads new rows and pushes their pre-rendered SSE text to the
+bounded queue of every subscriber. Recent events are kept in a replay buffer
+so that a reconnecting client sending ``Last-Event-ID`` gets what it missed.
+"""
+import json
+import logging
+import queue
+import threading
+from collections import deque, namedtuple
+from utils.metrics import REGISTRY
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Hub defaults
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_REPLAY_SIZE = 500
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_MAX_SUBSCRIBERS = 1000
+DEFAULT_RETRY_MS = 5000
+
+# An event with its SSE wire format rendered once for all subscribers
+Event = namedtuple('Event', ['id', 'type', 'chunk'])
+
+SSE_EVENTS = REGISTRY.counter('sse_events_total', 'Events published to live-feed subscribers', ('type',))
+SSE_DROPPED = REGISTRY.counter('sse_subscribers_dropped_total', 'Subscribers disconnected for falling behind')
+
+
+class EventHubFull(Exception):
+    """Raised when the hub already serves its maximum number of subscribers, or is closed"""
+
+
+def render_event(event_id, event_type, data):
+    """Render one event in SSE wire format; ``data`` is a JSON string"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    """A connected client: the events it still has to receive"""
+
+    def __init__(self, backlog, queue_size):
+        self.backlog = backlog
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.closed = False
+
+
+class EventHub:
+    """
+    Fan out stored events to SSE subscribers
+
+    A subscriber whose queue fills up (a client reading slower than events
+    arrive) is dropped instead of buffering without bound; its stream ends
+    and the browser reconnects with ``Last-Event-ID``, catching up from the
+    replay buffer. A client whose last event is older than the buffer gets a
+    ``reset`` event telling it to reload.
+    """
+
+    def __init__(self, load_after, poll_interval=DEFAULT_POLL_INTERVAL, replay_size=DEFAULT_REPLAY_SIZE,
+                 queue_size=DEFAULT_QUEUE_SIZE, max_subscribers=DEFAULT_MAX_SUBSCRIBERS,
+                 retry_ms=DEFAULT_RETRY_MS):
+        """
+        Args:
+            load_after (callable): ``load_after(event_id, limit)`` returning (id, type, JSON data)
+                tuples in id order; ``event_id`` None means the latest ``limit`` events
+            poll_interval (float): Seconds between polls for new events
+            replay_size (int): Number of recent events kept for reconnecting clients
+            queue_size (int): Events buffered per subscriber before it is dropped
+            max_subscribers (int): Concurrent subscribers allowed in this process
+            retry_ms (int): Reconnection delay suggested to browsers
+        """
+        self.load_after = load_after
+        self.poll_interval = poll_interval
+        self.replay_size = replay_size
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.retry_ms = retry_ms
+        self._replay = deque(maxlen=replay_size)
+        self._subscribers = set()
+        self._last_id = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._closed = False
+        self.published = 0
+        self.dropped = 0
+
+    def _ensure_started(self):
+        """Prime the replay buffer and start the poller on first use"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            for event_id, event_type, data in self.load_after(None, self.replay_size):
+                self._replay.append(Event(event_id, event_type, render_event(event_id, event_type, data)))
+            self._last_id = self._replay[-1].id if self._replay else 0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='event-hub', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Event hub poll failed: {e}")
+
+    def poll(self):
+        """Read events stored since the last poll and publish them"""
+        while True:
+            rows = self.load_after(self._last_id, self.replay_size)
+            if not rows:
+                return
+            for event_id, event_type, data in rows:
+                self._publish(Event(event_id, event_type, render_event(event_id, event_type, data)))
+            if len(rows) < self.replay_size:
+                return
+
+    def _publish(self, event):
+        with self._lock:
+            self._replay.append(event)
+            self._last_id = event.id
+            subscribers = list(self._subscribers)
+        self.published += 1
+        SSE_EVENTS.inc(type=event.type)
+
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event.chunk)
+            except queue.Full:
+                self._drop(subscription)
+
+    def _drop(self, subscription):
+        with self._lock:
+            if subscription not in self._subscribers:
+                return
+            self._subscribers.discard(subscription)
+        subscription.closed = True
+        self.dropped += 1
+        SSE_DROPPED.inc()
+        logger.info("Dropped a live-feed subscriber that fell behind")
+
+    def subscribe(self, last_event_id=None):
+        """
+        Register a subscriber
+
+        Args:
+            last_event_id (int): Id of the last event the client received, if reconnecting
+
+        Returns:
+            Subscription: Pass it to stream()
+
+        Raises:
+            EventHubFull: When max_subscribers are already connected, or the hub is closed
+        """
+        if self._closed:
+            raise EventHubFull("The live feed is shutting down")
+        self._ensure_started()
+        with self._lock:
+            if self._closed:
+                raise EventHubFull("The live feed is shutting down")
+            if len(self._subscribers) >= self.max_subscribers:
+                raise EventHubFull(f"{len(self._subscribers)} subscribers connected")
+
+            if last_event_id is None or last_event_id == self._last_id:
+                backlog = []
+            elif self._replay and self._replay[0].id - 1 <= last_event_id < self._last_id:
+                backlog = [event.chunk for event in self._replay if event.id > last_event_id]
+            else:
+                # Missed more than the replay buffer holds (or the ids are from another database)
+                backlog = [render_event(self._last_id, 'reset', json.dumps({'last_event_id': self._last_id}))]
+
+            # Registered under the lock so nothing is published between the backlog and the queue
+            subscription = Subscription(backlog, self.queue_size)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+        subscription.closed = True
+
+    def stream(self, subscription, heartbeat=15):
+        """
+        Generate the SSE response body for a subscriber
+
+        Sends a comment line every ``heartbeat`` seconds without events so that
+        proxies keep the connection open and disconnected clients are noticed.
+        """
+        try:
+            yield f"retry: {self.retry_ms}\n\n"
+            for chunk in subscription.backlog:
+                yield chunk
+            subscription.backlog = None
+
+            while True:
+                if subscription.closed and subscription.queue.empty():
+                    return
+                try:
+                    chunk = subscription.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            self.unsubscribe(subscription)
+
+    def close(self):
+        """Stop polling and end every stream; later subscribers are turned away"""
+        self._stop.set()
+        with self._lock:
+            self._closed = True
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+            self._thread = None
+        for subscription in subscribers:
+            subscription.closed = True
+            try:
+                subscription.queue.put_nowait(None)
+            except queue.Full:
+                pass
+
+    def stats(self):
+        """Return the hub's subscriber and event counters"""
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'last_event_id': self._last_id,
+                'replay_buffered': len(self._replay),
+                'published': self.published,
+                'dropped': self.dropped,
+            }
@@ -1,6 +1,10 @@
 """
 Utility functions for the Udemy coupon finder application
 """
+import importlib.util
+import re
+import unicodedata
+from functools import lru_cache
 
 def month_to_num(month_name):
     """Convert month name to numerical value for sorting"""
@@ -9,4 +13,18 @@ def month_to_num(month_name):
         'May': 5, 'June': 6, 'July': 7, 'August': 8,
         'September': 9, 'October': 10, 'November': 11, 'December': 12
     }
-    return months.get(month_name, 0)
\ No newline at end of file
+    return months.get(month_name, 0)
+
+@lru_cache(maxsize=None)
+def get_html_parser():
+    """Return the fastest installed BeautifulSoup tree builder (lxml if available)"""
+    if importlib.util.find_spec('lxml') is not None:
+        return 'lxml'
+    return 'html.parser'
+
+
+def normalize_title(title):
+    """Normalize a course title for search: no accents, case-folded, punctuation removed"""
+    decomposed = unicodedata.normalize('NFKD', title or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^\w]+', ' ', stripped.casefold()).split())
@@ -0,0 +1,74 @@
+"""
+Helpers for paginated, cacheable and compressed API responses
+"""
+import base64
+import gzip
+import hashlib
+import json
+
+# Responses smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 1024
+
+# Content types that are compressed
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/javascript', 'text/html', 'text/css', 'text/plain',
+}
+
+
+def encode_cursor(offset):
+    """Encode an offset as an opaque pagination cursor"""
+    payload = json.dumps({'offset': offset}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor made by encode_cursor()
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded.encode()))['offset']
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError('Invalid cursor')
+    return offset
+
+
+def result_etag(*parts):
+    """Stable ETag value for a result set and the parameters that shaped it"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, separators=(',', ':')).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def gzip_response(response, accept_encoding, min_size=COMPRESS_MIN_SIZE):
+    """
+    Gzip a Flask response in place when the client accepts it and it is worth it
+
+    Streamed responses, already encoded responses and small bodies are left alone.
+    """
+    response.vary.add('Accept-Encoding')
+
+    if (response.direct_passthrough or response.is_streamed
+            or 'gzip' not in (accept_encoding or '').lower()
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    # A compressed body is a different representation of the same resource
+    if response.headers.get('ETag', '').startswith('"'):
+        response.headers['ETag'] = 'W/' + response.headers['ETag']
+    return response
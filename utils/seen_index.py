@@ -0,0 +1,182 @@
+"""
+Global index of every course stored so far: a Bloom filter over an exact map
+
+The Bloom filter lives in memory and answers "never seen" for a key without
+touching the database; only keys it may have seen are looked up in the exact
+on-disk map (the ``courses`` table and its unique URL index). The filter is
+filled from the map's row ids, so a sync picks up keys stored by other
+processes, and it is rebuilt twice as large when it outgrows its capacity.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from utils.metrics import REGISTRY
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Index defaults
+DEFAULT_CAPACITY = 100000
+DEFAULT_ERROR_RATE = 0.001
+SYNC_BATCH = 10000
+
+SEEN_LOOKUPS = REGISTRY.counter(
+    'seen_index_lookups_total', 'Seen-index lookups by answer (new, known or false_positive)', ('result',))
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings
+
+    Sized for ``capacity`` keys at the given false-positive rate: about 1.8
+    bytes per key at 0.1%. Bit positions come from one BLAKE2b digest split
+    into two halves (double hashing).
+    """
+
+    def __init__(self, capacity, error_rate=DEFAULT_ERROR_RATE):
+        """
+        Args:
+            capacity (int): Number of keys the filter is sized for
+            error_rate (float): False-positive rate at capacity
+        """
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        value = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest(), 'little')
+        size = self.size
+        position = value % size
+        step = (value >> 64) % size | 1
+        positions = []
+        for _ in range(self.hash_count):
+            positions.append(position)
+            position = (position + step) % size
+        return positions
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def false_positive_rate(self):
+        """Expected false-positive rate with the keys added so far"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+
+class SeenIndex:
+    """
+    Membership index of the keys of an append-mostly table
+
+    ``sync()`` adds the rows stored since the last sync; ``lookup()`` answers
+    from the filter and confirms possible hits against the table. Until a
+    sync catches up, keys stored in the meantime are reported as new, so
+    writers must still upsert them.
+    """
+
+    def __init__(self, load_after, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        """
+        Args:
+            load_after (callable): load_after(row_id, limit) returning up to ``limit``
+                (row id, key) pairs with a larger row id, in id order
+            capacity (int): Keys the filter is first sized for
+            error_rate (float): False-positive rate of the filter
+        """
+        self._load_after = load_after
+        self._filter = BloomFilter(capacity, error_rate)
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def _fill(self, bloom, last_id):
+        """Add every row after ``last_id`` to a filter; returns the last row id"""
+        while True:
+            rows = self._load_after(last_id, SYNC_BATCH)
+            for row_id, key in rows:
+                bloom.add(key)
+                last_id = row_id
+            if len(rows) < SYNC_BATCH:
+                return last_id
+
+    def sync(self, blocking=True):
+        """
+        Add the keys stored since the last sync, growing the filter when full
+
+        Args:
+            blocking (bool): Wait for a sync running in another thread instead
+                of returning at once
+
+        Returns:
+            bool: Whether this call synced the filter
+        """
+        if not self._lock.acquire(blocking=blocking):
+            return False
+        try:
+            self._last_id = self._fill(self._filter, self._last_id)
+            if self._filter.count > self._filter.capacity:
+                # Deleted and merged rows are left out of the new filter
+                bloom = BloomFilter(2 * self._filter.count, self._filter.error_rate)
+                self._last_id = self._fill(bloom, 0)
+                self._filter = bloom
+                logger.info(f"Seen index grown to {bloom.capacity} keys ({len(bloom.bits)} bytes)")
+        finally:
+            self._lock.release()
+        return True
+
+    def _warm(self):
+        try:
+            started = time.monotonic()
+            self.sync()
+            logger.info(f"Seen index filled with {self._filter.count} keys in {time.monotonic() - started:.1f}s")
+        except Exception as e:
+            logger.error(f"Could not fill the seen index: {e}")
+
+    def warm(self):
+        """Fill the filter on a background thread, off the request path"""
+        threading.Thread(target=self._warm, name='seen-index-warm', daemon=True).start()
+
+    def might_contain(self, key):
+        """False when the key was certainly not stored before the last sync"""
+        return key in self._filter
+
+    def lookup(self, keys, fetch):
+        """
+        Find which keys are already stored
+
+        Args:
+            keys (list): Keys to look up
+            fetch (callable): fetch(keys) returning a dict of the given keys
+                that exist, mapped to their stored rows
+
+        Returns:
+            dict: Stored keys mapped to what ``fetch`` returned for them
+        """
+        candidates = [key for key in keys if key in self._filter]
+        found = fetch(candidates) if candidates else {}
+
+        false_positives = len(candidates) - len(found)
+        SEEN_LOOKUPS.inc(len(keys) - len(candidates), result='new')
+        SEEN_LOOKUPS.inc(len(found), result='known')
+        if false_positives:
+            SEEN_LOOKUPS.inc(false_positives, result='false_positive')
+        return found
+
+    def stats(self):
+        """Return the number of keys, the filter size and its expected error rate"""
+        bloom = self._filter
+        return {
+            'keys': bloom.count,
+            'capacity': bloom.capacity,
+            'bytes': len(bloom.bits),
+            'hash_count': bloom.hash_count,
+            'false_positive_rate': round(bloom.false_positive_rate(), 6),
+            'last_id': self._last_id,
+        }
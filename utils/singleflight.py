@@ -0,0 +1,136 @@
+"""
+Single-flight request coalescing: one call in flight per key, shared by all waiters
+"""
+import logging
+import re
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightTimeout(Exception):
+    """Raised when a waiter gives up on a call another thread is running"""
+
+
+class _Call:
+    """A call in flight and the waiters attached to it"""
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for the same result or exception instead of running it again.
+    Results are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, timeout=None):
+        """
+        Args:
+            timeout (float): Default number of seconds a waiter waits for the leader
+        """
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    def do(self, key, func, timeout=None):
+        """
+        Run ``func`` for ``key`` unless a call for that key is already running
+
+        Args:
+            key (hashable): Identity of the work
+            func (callable): Zero-argument function doing the work
+            timeout (float): Seconds to wait when joining another caller's call
+
+        Returns:
+            The function's result
+
+        Raises:
+            SingleFlightTimeout: If the shared call did not finish in time
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self.executions += 1
+            else:
+                call.waiters += 1
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            logger.info(f"Coalescing request for {key!r}")
+            timeout = self.timeout if timeout is None else timeout
+            if not call.done.wait(timeout):
+                with self._lock:
+                    self.timeouts += 1
+                raise SingleFlightTimeout(f"Timed out after {timeout}s waiting for {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self):
+        """Return counters describing how much work was coalesced"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'timeouts': self.timeouts,
+                'in_flight': len(self._calls),
+            }
+
+
+def normalize_scrape_key(url):
+    """
+    Normalize a listing or post URL so equivalent URLs share one scrape
+
+    Lower-cases the scheme and host, drops fragments, tracking parameters and
+    trailing slashes, sorts the query and reduces Flarum ``/d/<id>-<slug>``
+    discussion URLs to their id.
+    """
+    parts = urlsplit((url or '').strip())
+    scheme = (parts.scheme or 'https').lower()
+    if scheme == 'http':
+        scheme = 'https'
+    host = parts.netloc.lower().rsplit('@', 1)[-1]
+    if host.startswith('www.'):
+        host = host[4:]
+
+    path = parts.path.rstrip('/') or '/'
+    discussion = re.match(r'^/d/(\d+)', path)
+    if discussion:
+        path = f"/d/{discussion.group(1)}"
+
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith('utm_')
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))